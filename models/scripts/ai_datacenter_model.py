@@ -20,6 +20,9 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import r2_score, mean_absolute_error
 import joblib
 import warnings
+from processed_data import load_processed
+from energy_physics import estimate_energy_mwh, lookup
+from dc_classifier import RULES_VERSION, classify_ai_category, is_planned
 warnings.filterwarnings('ignore')
 
 
@@ -54,75 +57,6 @@ DC_PARAMS = {
     }
 }
 
-# Crypto mining keywords
-CRYPTO_KEYWORDS = [
-    'riot', 'marathon', 'core scientific', 'bitdeer', 'cipher', 'cleanspark',
-    'hut 8', 'hut8', 'iren', 'terawulf', 'iris energy', 'bit digital',
-    'greenidge', 'stronghold', 'argo blockchain', 'hive blockchain',
-    'bitcoin', 'btc', 'mining', 'miner', 'crypto', 'blockchain',
-    'antminer', 'asic', 'hash', 'bitfarms', 'canaan', 'bitmain',
-    'crusoe', 'applied digital', 'compute north', 'lancium'
-]
-
-# AI/Hyperscaler keywords (cloud + AI, NOT crypto)
-AI_HYPERSCALER_KEYWORDS = [
-    'google', 'amazon', 'aws', 'meta', 'facebook', 'microsoft', 'azure',
-    'apple', 'nvidia', 'openai', 'anthropic', 'oracle cloud', 'ibm cloud',
-    'alibaba', 'tencent', 'bytedance', 'coreweave', 'lambda labs'
-]
-
-
-def classify_datacenter(row):
-    """
-    Classify data center into Small, Decent, Crypto, or Big AI
-    
-    Returns: 'small', 'decent', 'crypto', or 'big_ai'
-    """
-    name = str(row.get('data_center_name', '')).lower()
-    capacity = row.get('capacity_mw', None)
-    
-    # Check crypto FIRST (before AI, as some crypto companies use cloud keywords)
-    is_crypto = any(kw in name for kw in CRYPTO_KEYWORDS)
-    if is_crypto:
-        return 'crypto'
-    
-    # Check if it's an AI/hyperscaler by name
-    is_ai_hyperscaler = any(kw in name for kw in AI_HYPERSCALER_KEYWORDS)
-    
-    # If capacity is known, use it
-    if pd.notna(capacity):
-        if capacity >= 50 or is_ai_hyperscaler:
-            return 'big_ai'
-        elif capacity >= 10:
-            return 'decent'
-        else:
-            return 'small'
-    
-    # If no capacity but is hyperscaler, it's big AI
-    if is_ai_hyperscaler:
-        return 'big_ai'
-    
-    # Check for colocation keywords (usually medium)
-    colo_keywords = ['equinix', 'digital realty', 'cyrusone', 'coresite', 
-                     'qts', 'switch', 'colocation', 'colo', 'vantage', 
-                     'flexential', 'databank']
-    if any(kw in name for kw in colo_keywords):
-        return 'decent'
-    
-    # Default: small (conservative)
-    return 'small'
-
-
-def is_planned_facility(name):
-    """Check if facility is planned/announced (not operational yet)"""
-    name_lower = str(name).lower()
-    planned_keywords = [
-        'project ', 'proposed', 'planned', 'future', 'phase 2', 'phase 3',
-        'upcoming', 'announced', 'under construction', 'expansion',
-        'campus',  # Campuses are often umbrella entries, not individual DCs
-    ]
-    return any(kw in name_lower for kw in planned_keywords)
-
 
 def load_and_classify_data(operational_only=True, require_year=True):
     """
@@ -133,15 +67,13 @@ def load_and_classify_data(operational_only=True, require_year=True):
         require_year: If True, only include DCs with known operational year
     """
     # Load data
-    dc = pd.read_csv('data/datacenter_specs.csv')
-    dc['year_operational'] = pd.to_numeric(dc['year_operational'], errors='coerce')
-    dc['capacity_mw'] = pd.to_numeric(dc['capacity_mw'], errors='coerce')
+    dc = load_processed('datacenter_specs')
     
     original_count = len(dc)
     
     # Filter 1: Remove planned/announced facilities
     if operational_only:
-        dc['is_planned'] = dc['data_center_name'].apply(is_planned_facility)
+        dc['is_planned'] = is_planned(dc['data_center_name'])
         planned_count = dc['is_planned'].sum()
         dc = dc[~dc['is_planned']].copy()
         print(f"  Filtered out {planned_count} planned/announced facilities")
@@ -165,19 +97,19 @@ def load_and_classify_data(operational_only=True, require_year=True):
     print(f"  Final count: {len(dc)} DCs (from {original_count} total)")
     
     # Classify each DC
-    dc['dc_category'] = dc.apply(classify_datacenter, axis=1)
+    dc['dc_category'] = classify_ai_category(dc['data_center_name'], dc['capacity_mw'])
+    dc['rules_version'] = RULES_VERSION
     
     # Estimate capacity based on category
-    dc['capacity_mw_est'] = dc.apply(
-        lambda row: row['capacity_mw'] if pd.notna(row['capacity_mw']) 
-        else DC_PARAMS[row['dc_category']]['default_capacity'],
-        axis=1
+    default_capacity = {category: params['default_capacity'] for category, params in DC_PARAMS.items()}
+    dc['capacity_mw_est'] = dc['capacity_mw'].fillna(
+        pd.Series(lookup(dc['dc_category'], default_capacity, default='small'), index=dc.index)
     )
     
-    # Estimate energy
-    dc['estimated_energy_mwh'] = dc.apply(
-        lambda row: row['capacity_mw_est'] * DC_PARAMS[row['dc_category']]['energy_per_mw'],
-        axis=1
+    # Estimate energy (per-category MWh/MW, energy_physics)
+    energy_per_mw = {category: params['energy_per_mw'] for category, params in DC_PARAMS.items()}
+    dc['estimated_energy_mwh'] = estimate_energy_mwh(
+        dc['capacity_mw_est'], dc['dc_category'], mwh_per_mw=energy_per_mw, default='small'
     )
     
     return dc
@@ -260,7 +192,7 @@ def analyze_ai_by_state(dc):
     state_summary.columns = ['AI DC Count', 'AI Capacity (MW)', 'AI Energy (MWh)']
     
     # Load real EIA data for comparison
-    eia = pd.read_csv('data/eia_state_electricity_real.csv')
+    eia = load_processed('eia_state_electricity_real')
     latest_eia = eia[eia['year'] == eia['year'].max()][['state', 'total_consumption_mwh']]
     
     state_summary = state_summary.reset_index()
@@ -288,7 +220,7 @@ def compare_with_industry(dc):
     print("="*70)
     
     # Load EIA
-    eia = pd.read_csv('data/eia_state_electricity_real.csv')
+    eia = load_processed('eia_state_electricity_real')
     us_total = eia[eia['year'] == 2024]['total_consumption_mwh'].sum()
     
     total_dc_energy = dc['estimated_energy_mwh'].sum()
@@ -335,7 +267,7 @@ def train_ai_prediction_model(dc):
     print("="*70)
     
     # Load EIA data
-    eia = pd.read_csv('data/eia_state_electricity_real.csv')
+    eia = load_processed('eia_state_electricity_real')
     
     # Filter to AI DCs with known operational year
     ai_dcs = dc[(dc['dc_category'] == 'big_ai') & (dc['year_operational'].notna())].copy()
@@ -396,7 +328,7 @@ def train_ai_prediction_model(dc):
     
     # Save model
     os.makedirs('models', exist_ok=True)
-    joblib.dump({'model': model, 'scaler': scaler, 'features': features}, 
+    joblib.dump({'model': model, 'scaler': scaler, 'features': features, 'rules_version': RULES_VERSION},
                 'models/ai_dc_prediction_model.joblib')
     
     return model, scaler, merged
@@ -467,6 +399,7 @@ def save_results(dc):
         'total_energy_twh': float(dc['estimated_energy_mwh'].sum() / 1e6),
         'crypto_energy_twh': float(crypto_dcs['estimated_energy_mwh'].sum() / 1e6),
         'ai_energy_twh': float(ai_dcs['estimated_energy_mwh'].sum() / 1e6),
+        'rules_version': RULES_VERSION,
     }
     
     import json
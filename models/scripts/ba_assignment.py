@@ -0,0 +1,324 @@
+"""
+Data center -> balancing authority assignment from utility territories
+
+The BA models used to give every facility its state's single STATE_TO_BA
+entry, so states served by several BAs (TX: ERCO/SWPP/MISO, VA: PJM/DUK,
+OH: PJM/...) were lumped into one. This module assigns a BA per facility
+from the EIA-861 territory data instead:
+
+- Sales_Ult_Cust gives each utility's sales per (state, BA).
+  Service_Territory gives the counties each utility serves. A county's BA
+  is the one with the most sales among the utilities serving it (a
+  utility's sales are split evenly over its counties in the state).
+- Municipal utilities ('City of Santa Clara - (CA)') also match
+  facilities by city, which pins down the utility itself.
+- Codes not listed for any state in Balancing_Authority are dropped.
+- The index (state, place) -> BA is built once per set of workbook
+  versions and kept as Parquet in data/eia/cache. Later runs read it
+  without touching the workbooks.
+
+assign_bas() maps a whole facility table at once with hash joins on
+(state, place). Facilities with coordinates are first placed in the BA
+and county boundary files, if present (spatial_index). Then it tries the
+county (given, from the boundaries or from HUB_COUNTIES), then
+the city (municipal utility, or an independent city such as 'Richmond
+City'), then the state's largest BA, and finally geography.STATE_TO_BA.
+ba_source records which level matched. The county goes first because a
+big city's municipal utility often serves only part of it (City of Mesa
+vs SRP).
+
+Usage:
+    python ba_assignment.py build [--year 2024] [--force]
+    python ba_assignment.py assign [--year 2024]
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+
+from eia_layout import load_eia_sheet
+from eia_store import CACHE_DIR, eia_workbook, workbook_sha256
+from geography import state_abbrev, state_ba
+from spatial_index import BOUNDARY_FILES, attach_coordinates, locate_bas, locate_counties
+
+BASE_DIR = Path(__file__).parent.parent.parent
+
+# Bump when the index construction changes, to invalidate cached indexes
+INDEX_VERSION = 1
+INDEX_YEAR = 2024
+
+INDEX_WORKBOOKS = ['Sales_Ult_Cust', 'Service_Territory', 'Balancing_Authority']
+
+# Lookup levels, in the order assign_bas tries them
+LEVELS = ['boundary', 'county', 'utility', 'state']
+
+MUNICIPAL_NAME = r'^(?:City|Town|Village|Borough) of (.+?)(?:\s*-\s*\(\w\w\))?$'
+
+# Major DC hubs and their counties
+HUB_COUNTIES = {
+    # Virginia - Data Center Alley
+    ('ashburn', 'VA'): 'Loudoun',
+    ('sterling', 'VA'): 'Loudoun',
+    ('leesburg', 'VA'): 'Loudoun',
+    ('manassas', 'VA'): 'Prince William',
+    ('reston', 'VA'): 'Fairfax',
+    ('herndon', 'VA'): 'Fairfax',
+    ('chantilly', 'VA'): 'Fairfax',
+    ('richmond', 'VA'): 'Richmond City',
+
+    # Texas - Major hubs
+    ('dallas', 'TX'): 'Dallas',
+    ('fort worth', 'TX'): 'Tarrant',
+    ('austin', 'TX'): 'Travis',
+    ('houston', 'TX'): 'Harris',
+    ('san antonio', 'TX'): 'Bexar',
+    ('rockdale', 'TX'): 'Milam',
+    ('corsicana', 'TX'): 'Navarro',
+    ('midlothian', 'TX'): 'Ellis',
+
+    # Arizona
+    ('phoenix', 'AZ'): 'Maricopa',
+    ('mesa', 'AZ'): 'Maricopa',
+    ('chandler', 'AZ'): 'Maricopa',
+    ('goodyear', 'AZ'): 'Maricopa',
+
+    # California
+    ('san jose', 'CA'): 'Santa Clara',
+    ('santa clara', 'CA'): 'Santa Clara',
+    ('fremont', 'CA'): 'Alameda',
+    ('los angeles', 'CA'): 'Los Angeles',
+    ('irvine', 'CA'): 'Orange',
+    ('el segundo', 'CA'): 'Los Angeles',
+
+    # Georgia
+    ('atlanta', 'GA'): 'Fulton',
+    ('douglasville', 'GA'): 'Douglas',
+
+    # Ohio
+    ('columbus', 'OH'): 'Franklin',
+    ('new albany', 'OH'): 'Franklin',
+
+    # Illinois
+    ('chicago', 'IL'): 'Cook',
+    ('dekalb', 'IL'): 'DeKalb',
+
+    # Nevada
+    ('las vegas', 'NV'): 'Clark',
+    ('henderson', 'NV'): 'Clark',
+    ('reno', 'NV'): 'Washoe',
+
+    # Oregon
+    ('portland', 'OR'): 'Multnomah',
+    ('hillsboro', 'OR'): 'Washington',
+    ('prineville', 'OR'): 'Crook',
+    ('the dalles', 'OR'): 'Wasco',
+
+    # Washington
+    ('seattle', 'WA'): 'King',
+    ('quincy', 'WA'): 'Grant',
+    ('moses lake', 'WA'): 'Grant',
+
+    # New Jersey
+    ('newark', 'NJ'): 'Essex',
+    ('secaucus', 'NJ'): 'Hudson',
+    ('piscataway', 'NJ'): 'Middlesex',
+
+    # New York
+    ('new york', 'NY'): 'New York',
+    ('buffalo', 'NY'): 'Erie',
+
+    # North Carolina
+    ('charlotte', 'NC'): 'Mecklenburg',
+    ('durham', 'NC'): 'Durham',
+    ('raleigh', 'NC'): 'Wake',
+
+    # Others
+    ('denver', 'CO'): 'Denver',
+    ('salt lake city', 'UT'): 'Salt Lake',
+    ('omaha', 'NE'): 'Douglas',
+    ('des moines', 'IA'): 'Polk',
+}
+
+
+def place_key(values):
+    """Normalized city / county names for joining ('St. Louis ' -> 'st louis')"""
+    return (pd.Series(values, dtype='str').str.lower()
+            .str.replace(r'[.,\']', '', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+
+def _top_ba(weights, keys):
+    # BA with the largest weight per key
+    weights = weights.sort_values('weight', ascending=False, kind='stable')
+    return weights.drop_duplicates(keys)
+
+
+def build_ba_index(year=INDEX_YEAR):
+    """
+    (level, state, place) -> ba_code table from the year's EIA-861
+    workbooks. place is a normalized city for 'utility', a normalized
+    county for 'county' and '' for 'state'.
+    """
+    sales = load_eia_sheet(eia_workbook(year, 'Sales_Ult_Cust'), 'Sales_Ult_Cust',
+                           ['utility_id', 'state', 'ba_code', 'total_sales_mwh'])
+    territory = load_eia_sheet(eia_workbook(year, 'Service_Territory'), 'Service_Territory',
+                               ['utility_id', 'utility_name', 'state', 'county'])
+    bas = load_eia_sheet(eia_workbook(year, 'Balancing_Authority'), 'Balancing_Authority',
+                         ['ba_code', 'ba_name'])
+
+    ba_names = bas.dropna(subset=['ba_code']).drop_duplicates('ba_code').set_index('ba_code')['ba_name']
+    sales = sales[sales['ba_code'].isin(ba_names.index)]
+
+    # Utility sales per (state, BA)
+    utility_ba = (sales.groupby(['utility_id', 'state', 'ba_code'], as_index=False)['total_sales_mwh'].sum()
+                  .rename(columns={'total_sales_mwh': 'weight'}))
+
+    territory = territory.dropna(subset=['utility_id', 'state', 'county']).copy()
+    territory['place'] = place_key(territory['county']).values
+    territory['n_counties'] = territory.groupby(['utility_id', 'state'])['place'].transform('nunique')
+
+    # County: sales of the utilities serving it, spread evenly over their counties
+    county = territory.drop_duplicates(['utility_id', 'state', 'place']).merge(
+        utility_ba, on=['utility_id', 'state'])
+    county['weight'] = county['weight'] / county['n_counties']
+    county = county.groupby(['state', 'place', 'county', 'ba_code'], as_index=False)['weight'].sum()
+    county = _top_ba(county, ['state', 'place'])
+    county['level'] = 'county'
+
+    # Municipal utility: its city, its own BA, and its county when it serves one
+    municipal = territory.assign(city=territory['utility_name'].str.extract(MUNICIPAL_NAME)[0])
+    municipal = municipal.dropna(subset=['city'])
+    municipal = municipal.drop_duplicates(['utility_id', 'state']).drop(columns='place')
+    municipal['county'] = municipal['county'].where(municipal['n_counties'] == 1)
+    municipal['place'] = place_key(municipal['city']).values
+    municipal = _top_ba(municipal.merge(utility_ba, on=['utility_id', 'state']), ['state', 'place'])
+    municipal['level'] = 'utility'
+
+    # State: largest BA by sales
+    state = _top_ba(utility_ba.groupby(['state', 'ba_code'], as_index=False)['weight'].sum(), ['state'])
+    state = state.assign(place='', county=None, level='state')
+
+    columns = ['level', 'state', 'place', 'county', 'ba_code', 'weight']
+    index = pd.concat([df[columns] for df in (municipal, county, state)], ignore_index=True)
+    index['ba_name'] = index['ba_code'].map(ba_names)
+    return index
+
+
+def _index_file(year):
+    digests = [workbook_sha256(eia_workbook(year, prefix)) for prefix in INDEX_WORKBOOKS]
+    key = hashlib.sha256(json.dumps([INDEX_VERSION, year, digests]).encode('utf-8')).hexdigest()[:16]
+    return CACHE_DIR / f"ba_index_{year}_{key}.parquet"
+
+
+@lru_cache(maxsize=None)
+def load_ba_index(year=INDEX_YEAR, force=False):
+    """build_ba_index through the Parquet cache (one build per workbook versions)"""
+    index_file = _index_file(year)
+    if index_file.exists() and not force:
+        return pd.read_parquet(index_file)
+
+    index = build_ba_index(year)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    for stale in CACHE_DIR.glob(f"ba_index_{year}_*.parquet"):
+        stale.unlink()
+    tmp_file = index_file.with_suffix('.tmp')
+    index.to_parquet(tmp_file, index=False)
+    tmp_file.replace(index_file)
+    return index
+
+
+def _lookup(index, level, states, places):
+    # Hash join of (state, place) keys against one level of the index
+    table = index.loc[index['level'] == level, ['state', 'place', 'county', 'ba_code']]
+    keys = pd.DataFrame({'state': states.values, 'place': places.values})
+    return keys.merge(table, on=['state', 'place'], how='left').set_index(states.index)
+
+
+def assign_bas(dc_df, state_col='state', city_col='city', county_col=None, year=INDEX_YEAR,
+               lat_col='latitude', lon_col='longitude'):
+    """
+    BA for every facility in dc_df. Returns a frame on dc_df's index with
+    state_abbrev, county, ba_code and ba_source ('boundary', 'county',
+    'utility', 'state' or 'default' for the STATE_TO_BA table). Facilities
+    with coordinates are placed in the spatial_index boundaries first, when
+    those files exist.
+    """
+    index = load_ba_index(year)
+    abbrevs = state_abbrev(dc_df[state_col])
+    cities = place_key(dc_df[city_col]) if city_col in dc_df.columns else pd.Series(pd.NA, index=dc_df.index)
+    cities.index = dc_df.index
+
+    # County: given, from the county boundaries, or a known hub
+    if county_col is not None and county_col in dc_df.columns:
+        county = dc_df[county_col].astype('str').where(dc_df[county_col].notna())
+    else:
+        county = pd.Series(None, index=dc_df.index, dtype='str')
+    boundary_ba = pd.DataFrame({'county': None, 'ba_code': None}, index=dc_df.index, dtype='str')
+    if lat_col not in dc_df.columns and any(path.exists() for path in BOUNDARY_FILES.values()):
+        dc_df = attach_coordinates(dc_df)
+    if lat_col in dc_df.columns and lon_col in dc_df.columns:
+        counties = locate_counties(dc_df[lat_col], dc_df[lon_col])
+        if counties is not None:
+            # Only trust a boundary county in the facility's own state
+            same_state = counties['state_abbrev'].values == abbrevs.values
+            county = county.fillna(counties['county'].where(same_state).set_axis(dc_df.index))
+        bas = locate_bas(dc_df[lat_col], dc_df[lon_col], year)
+        if bas is not None:
+            boundary_ba['ba_code'] = bas.values
+    hubs = pd.Series([HUB_COUNTIES.get(key) for key in zip(cities, abbrevs)], index=dc_df.index, dtype='str')
+    county = county.fillna(hubs)
+
+    # In priority order; an independent city ('Richmond City') counts as a county
+    matches = [
+        ('boundary', boundary_ba),
+        ('county', _lookup(index, 'county', abbrevs, place_key(county).set_axis(dc_df.index))),
+        ('utility', _lookup(index, 'utility', abbrevs, cities)),
+        ('county', _lookup(index, 'county', abbrevs, cities + ' city')),
+        ('state', _lookup(index, 'state', abbrevs, pd.Series('', index=dc_df.index))),
+    ]
+
+    result = pd.DataFrame({'state_abbrev': abbrevs, 'county': county,
+                           'ba_code': pd.Series(None, index=dc_df.index, dtype='str'),
+                           'ba_source': 'default'}, index=dc_df.index)
+    for level, matched in matches:
+        found = result['ba_code'].isna() & matched['ba_code'].notna()
+        result.loc[found, 'ba_code'] = matched.loc[found, 'ba_code']
+        result.loc[found, 'ba_source'] = level
+        result['county'] = result['county'].fillna(matched['county'].where(found))
+    result['ba_code'] = result['ba_code'].fillna(state_ba(abbrevs))
+    return result
+
+
+def summarize(assignments):
+    """Print how many facilities each lookup level placed"""
+    sources = assignments['ba_source'].value_counts()
+    print("   BA source: " + ", ".join(f"{level} {sources.get(level, 0)}" for level in LEVELS + ['default']))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='DC -> balancing authority assignment')
+    parser.add_argument('command', choices=['build', 'assign'])
+    parser.add_argument('--year', type=int, default=INDEX_YEAR)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    start = time.time()
+    if args.command == 'build':
+        index = load_ba_index(args.year, force=args.force)
+        print(f"   {len(index)} index rows ({index['level'].value_counts().to_dict()}) "
+              f"in {time.time() - start:.2f}s -> {_index_file(args.year).name}")
+    else:
+        with open(BASE_DIR / "website" / "datacenters.json") as f:
+            dc_df = pd.DataFrame(json.load(f))
+        assignments = assign_bas(dc_df, year=args.year)
+        print(f"   Assigned {len(assignments)} facilities in {time.time() - start:.2f}s")
+        summarize(assignments)
+        changed = assignments['ba_code'] != state_ba(assignments['state_abbrev'])
+        print(f"   {changed.sum()} differ from the state's STATE_TO_BA entry")
+        print(assignments.groupby('ba_code').size().sort_values(ascending=False).head(15).to_string())
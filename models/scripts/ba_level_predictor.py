@@ -13,10 +13,13 @@ from pathlib import Path
 import json
 from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from sklearn.model_selection import train_test_split
 from sklearn.neural_network import MLPRegressor
 import warnings
+from eia_layout import load_eia_sheet
+from ba_assignment import assign_bas, summarize
+from dc_hubs import HUB_FEATURES, assign_hubs, hub_features_by, hub_table
+from model_suite import train_suite
 warnings.filterwarnings('ignore')
 
 # Paths
@@ -26,95 +29,16 @@ EIA_DIR = DATA_DIR / "eia" / "2024"
 OUTPUT_DIR = DATA_DIR / "outputs"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-# Comprehensive state -> BA mapping
-# Each state is assigned to its primary BA (some states span multiple)
-STATE_TO_BA = {
-    # PJM territory (Mid-Atlantic)
-    'VA': 'PJM', 'MD': 'PJM', 'DE': 'PJM', 'NJ': 'PJM', 'PA': 'PJM',
-    'DC': 'PJM', 'WV': 'PJM', 'OH': 'PJM',
-    
-    # ERCOT (Texas)
-    'TX': 'ERCO',
-    
-    # CAISO (California)
-    'CA': 'CISO',
-    
-    # MISO (Midwest)
-    'IL': 'MISO', 'IN': 'MISO', 'IA': 'MISO', 'MI': 'MISO', 'MN': 'MISO',
-    'MO': 'MISO', 'WI': 'MISO', 'ND': 'MISO', 'SD': 'MISO', 'MT': 'MISO',
-    'LA': 'MISO', 'MS': 'MISO', 'AR': 'MISO',
-    
-    # NYISO (New York)
-    'NY': 'NYIS',
-    
-    # ISO-NE (New England)
-    'CT': 'ISNE', 'MA': 'ISNE', 'ME': 'ISNE', 'NH': 'ISNE', 'RI': 'ISNE', 'VT': 'ISNE',
-    
-    # Southern Company (Southeast)
-    'GA': 'SOCO', 'AL': 'SOCO',
-    
-    # Florida
-    'FL': 'FPL',
-    
-    # Duke (Carolinas)
-    'NC': 'DUK', 'SC': 'DUK',
-    
-    # SPP (Plains)
-    'KS': 'SWPP', 'NE': 'SWPP', 'OK': 'SWPP', 'NM': 'SWPP',
-    
-    # TVA (Tennessee Valley)
-    'TN': 'TVA', 'KY': 'TVA',
-    
-    # Western
-    'WA': 'BPAT', 'OR': 'BPAT', 'ID': 'BPAT',
-    'NV': 'NEVP',
-    'AZ': 'APS',
-    'UT': 'PACE', 'WY': 'PACE',
-    'CO': 'PSCO',
-    
-    # Others
-    'HI': 'HECO', 'AK': 'OTHER'
-}
-
-# State name to abbreviation
-STATE_ABBREV = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
-    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
-    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO',
-    'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
-    'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH',
-    'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
-    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY',
-    'District of Columbia': 'DC'
-}
-
 
 def load_eia_data():
     """Load and process EIA-861 utility-level sales data."""
     print("\n📊 Loading EIA-861 Data...")
     
     sales_file = EIA_DIR / "Sales_Ult_Cust_2024.xlsx"
-    df = pd.read_excel(sales_file, sheet_name='States', header=1)
-    
-    # Assign proper column names
-    df.columns = [
-        'year', 'utility_id', 'utility_name', 'part', 'service_type', 
-        'data_type', 'state', 'ownership', 'ba_code',
-        'residential_revenue', 'residential_sales_mwh', 'residential_customers',
-        'commercial_revenue', 'commercial_sales_mwh', 'commercial_customers',
-        'industrial_revenue', 'industrial_sales_mwh', 'industrial_customers',
-        'transport_revenue', 'transport_sales_mwh', 'transport_customers',
-        'total_revenue', 'total_sales_mwh', 'total_customers'
-    ][:len(df.columns)]
-    
-    # Filter valid data
-    df = df[pd.to_numeric(df['year'], errors='coerce').notna()]
-    df['total_sales_mwh'] = pd.to_numeric(df['total_sales_mwh'], errors='coerce')
-    df['industrial_sales_mwh'] = pd.to_numeric(df['industrial_sales_mwh'], errors='coerce')
-    df['commercial_sales_mwh'] = pd.to_numeric(df['commercial_sales_mwh'], errors='coerce')
+    df = load_eia_sheet(sales_file, 'Sales_Ult_Cust', [
+        'year', 'utility_id', 'ba_code', 'total_sales_mwh',
+        'industrial_sales_mwh', 'commercial_sales_mwh', 'total_customers'
+    ])
     
     # Aggregate by BA
     ba_data = df.groupby('ba_code').agg({
@@ -160,19 +84,10 @@ def map_dcs_to_bas(dc_df):
     
     dc_df = dc_df.copy()
     
-    # Convert state names to abbreviations
-    def get_abbrev(state):
-        if pd.isna(state):
-            return None
-        state = str(state).strip()
-        if len(state) == 2:
-            return state.upper()
-        return STATE_ABBREV.get(state, None)
-    
-    dc_df['state_abbrev'] = dc_df['state'].apply(get_abbrev)
-    
-    # Map to BA
-    dc_df['ba_code'] = dc_df['state_abbrev'].map(STATE_TO_BA).fillna('OTHER')
+    # County / municipal utility -> BA from the EIA-861 territories, else by state
+    assignments = assign_bas(dc_df)
+    dc_df[assignments.columns] = assignments
+    summarize(assignments)
     
     # Clean capacity
     dc_df['capacity_mw'] = pd.to_numeric(dc_df['capacity_mw'], errors='coerce')
@@ -187,6 +102,19 @@ def map_dcs_to_bas(dc_df):
     return dc_df
 
 
+def detect_dc_hubs(dc_df):
+    """Cluster DCs into hubs by coordinates."""
+    print("\n📍 Detecting DC Hubs...")
+    
+    dc_df = assign_hubs(dc_df)
+    hubs = hub_table(dc_df)
+    print(f"   {len(hubs)} hubs holding {(dc_df['hub_id'] >= 0).sum()} of {len(dc_df)} DCs")
+    for _, row in hubs.head(5).iterrows():
+        print(f"   - {row['hub_name']}: {int(row['dc_count'])} DCs, {row['capacity_mw']:.0f} MW")
+    
+    return dc_df
+
+
 def create_ba_dc_features(dc_df):
     """Create BA-level DC features."""
     print("\n📈 Creating BA-Level DC Features...")
@@ -217,6 +145,10 @@ def create_ba_dc_features(dc_df):
     big_ai_counts = dc_df[dc_df['category'] == 'big_ai'].groupby('ba_code').size()
     ba_features['big_ai_count'] = ba_features['ba_code'].map(big_ai_counts).fillna(0)
     
+    # Hub concentration (dc_hubs)
+    if 'hub_id' in dc_df.columns:
+        ba_features = ba_features.merge(hub_features_by(dc_df, 'ba_code'), on='ba_code', how='left')
+    
     print(f"\n   Created features for {len(ba_features)} BAs")
     print("\n   Top 10 BAs by DC count:")
     top_bas = ba_features.nlargest(10, 'dc_count')
@@ -271,7 +203,7 @@ def train_ba_model(data):
         'dc_count', 'total_capacity_mw', 'avg_capacity_mw', 'max_capacity_mw',
         'crypto_count', 'big_ai_count', 'crypto_ratio',
         'utility_count', 'ci_ratio'
-    ]
+    ] + HUB_FEATURES
     
     # Filter to features that exist
     feature_cols = [c for c in feature_cols if c in data.columns]
@@ -306,31 +238,24 @@ def train_ba_model(data):
         )
     }
     
+    # Fit + 5-fold CV of every model at once (model_suite)
+    suite = train_suite(models, X_train, y_train, X_test, y_test, X_scaled, y, cv=5)
+    
     results = {}
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        
-        r2 = r2_score(y_test, y_pred)
-        mae = mean_absolute_error(y_test, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-        
-        # Cross-validation
-        cv_scores = cross_val_score(model, X_scaled, y, cv=5, scoring='r2')
-        
+    for name, row in suite.iterrows():
         results[name] = {
-            'r2': r2,
-            'mae': mae,
-            'rmse': rmse,
-            'cv_r2_mean': cv_scores.mean(),
-            'cv_r2_std': cv_scores.std(),
-            'model': model
+            'r2': row['test_r2'],
+            'mae': row['test_mae'],
+            'rmse': row['test_rmse'],
+            'cv_r2_mean': row['cv_r2_mean'],
+            'cv_r2_std': row['cv_r2_std'],
+            'model': row['model']
         }
         
         print(f"\n   {name}:")
-        print(f"   Test R² = {r2:.4f}")
-        print(f"   CV R² = {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
-        print(f"   MAE = {mae/1e6:.1f} TWh, RMSE = {rmse/1e6:.1f} TWh")
+        print(f"   Test R² = {row['test_r2']:.4f}")
+        print(f"   CV R² = {row['cv_r2_mean']:.4f} ± {row['cv_r2_std']:.4f}")
+        print(f"   MAE = {row['test_mae']/1e6:.1f} TWh, RMSE = {row['test_rmse']/1e6:.1f} TWh")
     
     # Feature importance
     best_model = results['Gradient Boosting']['model']
@@ -421,8 +346,9 @@ def main():
     ba_elec = load_eia_data()
     dc_df = load_dc_data()
     
-    # 2. Map DCs to BAs
+    # 2. Map DCs to BAs, detect hubs
     dc_df = map_dcs_to_bas(dc_df)
+    dc_df = detect_dc_hubs(dc_df)
     
     # 3. Create BA-level DC features
     ba_dc_features = create_ba_dc_features(dc_df)
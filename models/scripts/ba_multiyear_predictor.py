@@ -14,13 +14,17 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import json
+import os
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, cross_val_score, TimeSeriesSplit
-from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
+from sklearn.model_selection import train_test_split, TimeSeriesSplit
 from sklearn.neural_network import MLPRegressor
 import xgboost as xgb
 import warnings
+from eia_layout import load_eia_sheet
+from ba_assignment import assign_bas
+from model_suite import train_suite
 warnings.filterwarnings('ignore')
 
 # Paths
@@ -33,39 +37,15 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 # Years to process
 YEARS = [2019, 2020, 2021, 2022, 2023, 2024]
 
-# State -> BA mapping
-STATE_TO_BA = {
-    'VA': 'PJM', 'MD': 'PJM', 'DE': 'PJM', 'NJ': 'PJM', 'PA': 'PJM',
-    'DC': 'PJM', 'WV': 'PJM', 'OH': 'PJM',
-    'TX': 'ERCO', 'CA': 'CISO',
-    'IL': 'MISO', 'IN': 'MISO', 'IA': 'MISO', 'MI': 'MISO', 'MN': 'MISO',
-    'MO': 'MISO', 'WI': 'MISO', 'ND': 'MISO', 'SD': 'MISO', 'MT': 'MISO',
-    'LA': 'MISO', 'MS': 'MISO', 'AR': 'MISO',
-    'NY': 'NYIS',
-    'CT': 'ISNE', 'MA': 'ISNE', 'ME': 'ISNE', 'NH': 'ISNE', 'RI': 'ISNE', 'VT': 'ISNE',
-    'GA': 'SOCO', 'AL': 'SOCO',
-    'FL': 'FPL',
-    'NC': 'DUK', 'SC': 'DUK',
-    'KS': 'SWPP', 'NE': 'SWPP', 'OK': 'SWPP', 'NM': 'SWPP',
-    'TN': 'TVA', 'KY': 'TVA',
-    'WA': 'BPAT', 'OR': 'BPAT', 'ID': 'BPAT',
-    'NV': 'NEVP', 'AZ': 'APS', 'UT': 'PACE', 'WY': 'PACE', 'CO': 'PSCO',
-    'HI': 'HECO', 'AK': 'OTHER'
-}
 
-STATE_ABBREV = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
-    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
-    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO',
-    'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
-    'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH',
-    'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
-    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY',
-    'District of Columbia': 'DC'
-}
+# Sales columns used here
+SALES_COLUMNS = [
+    'year', 'utility_id', 'utility_name', 'state', 'ba_code',
+    'residential_revenue', 'residential_sales_mwh', 'residential_customers',
+    'commercial_revenue', 'commercial_sales_mwh', 'commercial_customers',
+    'industrial_revenue', 'industrial_sales_mwh', 'industrial_customers',
+    'total_revenue', 'total_sales_mwh', 'total_customers'
+]
 
 
 def load_year_data(year):
@@ -76,64 +56,28 @@ def load_year_data(year):
         print(f"   ⚠️ Missing data for {year}")
         return None
     
-    df = pd.read_excel(sales_file, sheet_name='States', header=1)
-    n_cols = len(df.columns)
-    
-    # Column mapping varies by year - use positional mapping
-    # Key columns we need: year (0), state (6), ba_code (8), sales data (near end)
-    col_mapping = {}
-    
-    # First columns are consistent
-    col_mapping[0] = 'year'
-    col_mapping[1] = 'utility_id'
-    col_mapping[2] = 'utility_name'
-    col_mapping[6] = 'state'
-    col_mapping[8] = 'ba_code'
-    
-    # Last columns contain totals (work backwards)
-    col_mapping[n_cols - 1] = 'total_customers'
-    col_mapping[n_cols - 2] = 'total_sales_mwh'
-    col_mapping[n_cols - 3] = 'total_revenue'
-    
-    # Mid columns for sector data
-    col_mapping[9] = 'residential_revenue'
-    col_mapping[10] = 'residential_sales_mwh'
-    col_mapping[11] = 'residential_customers'
-    col_mapping[12] = 'commercial_revenue'
-    col_mapping[13] = 'commercial_sales_mwh'
-    col_mapping[14] = 'commercial_customers'
-    col_mapping[15] = 'industrial_revenue'
-    col_mapping[16] = 'industrial_sales_mwh'
-    col_mapping[17] = 'industrial_customers'
-    
-    # Rename only mapped columns
-    new_names = {}
-    for idx, name in col_mapping.items():
-        if idx < n_cols:
-            new_names[df.columns[idx]] = name
-    
-    df = df.rename(columns=new_names)
-    
-    # Filter valid data
-    df = df[pd.to_numeric(df.get('year', pd.Series()), errors='coerce').notna()]
+    # Columns are found from the header rows (eia_layout), not by position:
+    # 2019 has an extra Short Form column that shifts the sector blocks
+    df = load_eia_sheet(sales_file, 'Sales_Ult_Cust', SALES_COLUMNS)
     df['year'] = year  # Ensure year is set correctly
     
-    # Convert numeric columns
-    for col in ['total_sales_mwh', 'industrial_sales_mwh', 'commercial_sales_mwh', 
-                'residential_sales_mwh', 'total_customers']:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
     return df
 
 
-def load_all_years():
-    """Load and combine EIA data from all years."""
+def load_all_years(workers=None):
+    """Load and combine EIA data from all years (one process per year)."""
     print("\n📊 Loading Multi-Year EIA-861 Data...")
     
+    # Each year is an independent read_excel + remap; results come back in YEARS order
+    workers = workers or min(len(YEARS), os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(load_year_data, YEARS))
+    else:
+        results = [load_year_data(year) for year in YEARS]
+    
     all_data = []
-    for year in YEARS:
-        df = load_year_data(year)
+    for year, df in zip(YEARS, results):
         if df is not None:
             all_data.append(df)
             print(f"   {year}: {len(df):,} utility-state records")
@@ -185,17 +129,9 @@ def load_dc_data():
     
     df = pd.DataFrame(dcs)
     
-    # Map to BA
-    def get_abbrev(state):
-        if pd.isna(state):
-            return None
-        state = str(state).strip()
-        if len(state) == 2:
-            return state.upper()
-        return STATE_ABBREV.get(state, None)
-    
-    df['state_abbrev'] = df['state'].apply(get_abbrev)
-    df['ba_code'] = df['state_abbrev'].map(STATE_TO_BA).fillna('OTHER')
+    # Map to BA (utility territories, state as fallback)
+    assignments = assign_bas(df)
+    df[assignments.columns] = assignments
     
     # Clean numeric fields
     df['capacity_mw'] = pd.to_numeric(df['capacity_mw'], errors='coerce')
@@ -210,46 +146,71 @@ def load_dc_data():
 
 
 def create_dc_features_by_ba_year(dc_df, years):
-    """Create DC features by BA and year (cumulative up to each year)."""
+    """
+    Create DC features by BA and year (cumulative up to each year).
+    
+    DCs are binned by the first year >= year_built and cumulative sums /
+    maxima are taken along the years for each BA. DCs without a year are
+    assumed to exist in all years, so they go in the first bin. Works for
+    any sorted periods (e.g. fractional years for monthly features).
+    """
     print("\n📈 Creating DC Features by BA-Year...")
     
-    records = []
+    years = np.asarray(list(years))
+    periods = np.unique(years)
+    bas = pd.Index(dc_df['ba_code'].unique())
+    ba_idx = bas.get_indexer(dc_df['ba_code'])
+    
+    # Bin per DC: periods[slot] is the first year it exists in; slot ==
+    # len(periods) means built after the last year (never counted)
+    built = dc_df['year_built'].to_numpy(dtype=float)
+    slot = np.where(np.isnan(built), 0, np.searchsorted(periods, built, side='left'))
+    n_slots = len(periods) + 1
+    flat = ba_idx * n_slots + slot
+    
+    capacity = dc_df['capacity_mw'].to_numpy(dtype=float)
+    has_capacity = ~np.isnan(capacity)
+    category = dc_df['category']
+    columns = {
+        'dc_count': np.ones(len(dc_df)),
+        'total_capacity_mw': np.where(has_capacity, capacity, 0),
+        'capacity_count': has_capacity,
+        'crypto_count': (category == 'crypto').to_numpy(),
+        'big_ai_count': (category == 'big_ai').to_numpy(),
+        'hyperscale_count': ((category == 'big_ai') | (dc_df['capacity_mw'] >= 50)).to_numpy(),
+        'total_energy_mwh': np.nan_to_num(dc_df['energy_mwh'].to_numpy(dtype=float)),
+    }
     
-    for ba in dc_df['ba_code'].unique():
-        ba_dcs = dc_df[dc_df['ba_code'] == ba]
-        
-        for year in years:
-            # For DCs with year data, count cumulative DCs up to this year
-            # For DCs without year, assume they exist in all years
-            dcs_with_year = ba_dcs[ba_dcs['year_built'].notna()]
-            dcs_without_year = ba_dcs[ba_dcs['year_built'].isna()]
-            
-            # Cumulative DCs built by this year
-            cumulative = dcs_with_year[dcs_with_year['year_built'] <= year]
-            
-            # Total = cumulative + unknown (assume existing)
-            total_dcs = pd.concat([cumulative, dcs_without_year])
-            
-            if len(total_dcs) == 0:
-                continue
-            
-            record = {
-                'ba_code': ba,
-                'year': year,
-                'dc_count': len(total_dcs),
-                'total_capacity_mw': total_dcs['capacity_mw'].sum(),
-                'avg_capacity_mw': total_dcs['capacity_mw'].mean(),
-                'max_capacity_mw': total_dcs['capacity_mw'].max(),
-                'crypto_count': (total_dcs['category'] == 'crypto').sum(),
-                'big_ai_count': (total_dcs['category'] == 'big_ai').sum(),
-                'hyperscale_count': ((total_dcs['category'] == 'big_ai') | 
-                                     (total_dcs['capacity_mw'] >= 50)).sum(),
-                'total_energy_mwh': total_dcs['energy_mwh'].sum()
-            }
-            records.append(record)
-    
-    features = pd.DataFrame(records)
-    features = features.fillna(0)
+    # Per-bin sums, accumulated along the years; [:, :-1] drops the after-last-year bin
+    stats = {}
+    for name, values in columns.items():
+        binned = np.bincount(flat, weights=values.astype(float), minlength=len(bas) * n_slots)
+        stats[name] = binned.reshape(len(bas), n_slots).cumsum(axis=1)[:, :-1]
+    
+    binned_max = np.full(len(bas) * n_slots, -np.inf)
+    np.maximum.at(binned_max, flat, np.where(has_capacity, capacity, -np.inf))
+    max_capacity = np.maximum.accumulate(binned_max.reshape(len(bas), n_slots), axis=1)[:, :-1]
+    
+    # BA-major rows in the order of years, as requested
+    col = np.searchsorted(periods, years)
+    dc_count = stats['dc_count'][:, col].ravel()
+    capacity_count = stats['capacity_count'][:, col].ravel()
+    total_capacity = stats['total_capacity_mw'][:, col].ravel()
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        features = pd.DataFrame({
+            'ba_code': bas.repeat(len(years)),
+            'year': np.tile(years, len(bas)),
+            'dc_count': dc_count.astype(np.int64),
+            'total_capacity_mw': total_capacity,
+            'avg_capacity_mw': np.where(capacity_count > 0, total_capacity / capacity_count, 0.0),
+            'max_capacity_mw': np.where(capacity_count > 0, max_capacity[:, col].ravel(), 0.0),
+            'crypto_count': stats['crypto_count'][:, col].ravel().astype(np.int64),
+            'big_ai_count': stats['big_ai_count'][:, col].ravel().astype(np.int64),
+            'hyperscale_count': stats['hyperscale_count'][:, col].ravel().astype(np.int64),
+            'total_energy_mwh': stats['total_energy_mwh'][:, col].ravel(),
+        })
+    features = features[dc_count > 0].reset_index(drop=True)
     
     # Calculate ratios
     features['crypto_ratio'] = features['crypto_count'] / features['dc_count'].clip(lower=1)
@@ -338,32 +299,25 @@ def train_multiyear_model(data):
         )
     }
     
+    # Fit + time series CV of every model at once (model_suite)
+    tscv = TimeSeriesSplit(n_splits=3)
+    suite = train_suite(models, X_train, y_train, X_test, y_test, X_scaled, y, cv=tscv)
+    
     results = {}
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_test)
-        
-        r2 = r2_score(y_test, y_pred)
-        mae = mean_absolute_error(y_test, y_pred)
-        rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-        
-        # Time series CV
-        tscv = TimeSeriesSplit(n_splits=3)
-        cv_scores = cross_val_score(model, X_scaled, y, cv=tscv, scoring='r2')
-        
+    for name, row in suite.iterrows():
         results[name] = {
-            'r2': r2,
-            'mae': mae,
-            'rmse': rmse,
-            'cv_r2_mean': cv_scores.mean(),
-            'cv_r2_std': cv_scores.std(),
-            'model': model
+            'r2': row['test_r2'],
+            'mae': row['test_mae'],
+            'rmse': row['test_rmse'],
+            'cv_r2_mean': row['cv_r2_mean'],
+            'cv_r2_std': row['cv_r2_std'],
+            'model': row['model']
         }
         
         print(f"\n   {name}:")
-        print(f"   Test R² = {r2:.4f}")
-        print(f"   TS-CV R² = {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
-        print(f"   MAE = {mae/1e6:.1f} TWh, RMSE = {rmse/1e6:.1f} TWh")
+        print(f"   Test R² = {row['test_r2']:.4f}")
+        print(f"   TS-CV R² = {row['cv_r2_mean']:.4f} ± {row['cv_r2_std']:.4f}")
+        print(f"   MAE = {row['test_mae']/1e6:.1f} TWh, RMSE = {row['test_rmse']/1e6:.1f} TWh")
     
     # Feature importance (XGBoost)
     best_model = results['XGBoost']['model']
@@ -26,11 +26,31 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression, Ridge
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import warnings
+from pathlib import Path
+from processed_data import load_processed
+from dc_hubs import FacilityIndex
 warnings.filterwarnings('ignore')
 
 # EIA API key - you'll need to get one from https://www.eia.gov/opendata/register.php
 EIA_API_KEY = os.environ.get('EIA_API_KEY', 'YOUR_API_KEY_HERE')
 
+# Dated neighbours used by the 'nearest' operational date estimator
+NEAREST_K = 5
+
+
+def has_coordinates(dc):
+    """True for rows with a finite latitude and longitude"""
+    coords = dc[['latitude', 'longitude']].to_numpy(dtype=float, na_value=np.nan)
+    return np.isfinite(coords).all(axis=1)
+
+
+def impute_capacity(dc):
+    """capacity_mw filled with the state median, then the overall median, then 10 MW"""
+    state_median_capacity = dc.groupby('state')['capacity_mw'].transform('median')
+    overall_median_capacity = dc['capacity_mw'].median()
+    return dc['capacity_mw'].fillna(state_median_capacity).fillna(overall_median_capacity).fillna(10)
+
+
 class DataCenterEnergyModel:
     def __init__(self, data_dir='data'):
         self.data_dir = data_dir
@@ -40,18 +60,13 @@ class DataCenterEnergyModel:
         self.model = None
         self.scaler = StandardScaler()
         
-    def load_datacenter_specs(self, filepath='data/datacenter_specs.csv'):
-        """Load the scraped data center specifications"""
+    def load_datacenter_specs(self, filepath=None):
+        """Load the scraped data center specifications (default: data/processed/datacenter_specs)"""
         print("Loading data center specs...")
-        self.dc_data = pd.read_csv(filepath)
-        
-        # Clean up data
-        self.dc_data['year_operational'] = pd.to_numeric(
-            self.dc_data['year_operational'], errors='coerce'
-        )
-        self.dc_data['capacity_mw'] = pd.to_numeric(
-            self.dc_data['capacity_mw'], errors='coerce'
-        )
+        if filepath is None:
+            self.dc_data = load_processed('datacenter_specs')
+        else:
+            self.dc_data = load_processed(Path(filepath).stem, data_dir=Path(filepath).parent)
         
         # Filter to valid years (1990-2025)
         valid_years = (self.dc_data['year_operational'] >= 1990) & \
@@ -166,13 +181,8 @@ class DataCenterEnergyModel:
             (self.dc_data['year_operational'] <= 2025)
         ].copy()
         
-        # Impute missing capacity using state median
-        state_median_capacity = dc_with_years.groupby('state')['capacity_mw'].transform('median')
-        overall_median_capacity = dc_with_years['capacity_mw'].median()
-        
-        dc_with_years['capacity_mw_imputed'] = dc_with_years['capacity_mw'].fillna(
-            state_median_capacity
-        ).fillna(overall_median_capacity).fillna(10)  # Default 10 MW if all else fails
+        # Impute missing capacity using state median (default 10 MW if all else fails)
+        dc_with_years['capacity_mw_imputed'] = impute_capacity(dc_with_years)
         
         # Aggregate by state and year
         dc_agg = dc_with_years.groupby(['state', 'year_operational']).agg({
@@ -342,51 +352,89 @@ class DataCenterEnergyModel:
         
         return prediction
     
-    def estimate_missing_operational_dates(self):
+    def peak_growth_years(self):
+        """Per state, the year (2000-2024) with the highest YoY electricity change"""
+        if 'yoy_change_pct' not in self.electricity_data.columns:
+            self.calculate_electricity_changes()
+        changes = self.electricity_data[
+            (self.electricity_data['year'] >= 2000) &
+            (self.electricity_data['year'] <= 2024)
+        ].dropna(subset=['yoy_change_pct'])
+        peaks = changes.loc[changes.groupby('state', sort=False)['yoy_change_pct'].idxmax()]
+        return peaks.set_index('state')['year'].astype(int)
+    
+    def capacity_weighted_years(self, dated):
+        """Per state, the capacity-weighted mean operational year of the dated DCs"""
+        weights = impute_capacity(dated)
+        weighted = (dated['year_operational'] * weights).groupby(dated['state']).sum() / \
+            weights.groupby(dated['state']).sum()
+        # States whose weights sum to 0 have no answer (and fall back to peak_growth)
+        weighted = weighted[np.isfinite(weighted)]
+        return weighted.round().astype(int)
+    
+    def nearest_years(self, dated, missing_dates, k=NEAREST_K):
+        """Median operational year of the k nearest dated DCs (NaN without coordinates)"""
+        years = np.full(len(missing_dates), np.nan)
+        dated = dated[has_coordinates(dated)]
+        located = has_coordinates(missing_dates)
+        if dated.empty or not located.any():
+            return years
+        index = FacilityIndex(dated['latitude'], dated['longitude'])
+        _, rows = index.nearest(missing_dates['latitude'][located], missing_dates['longitude'][located], k)
+        years[located] = np.round(np.median(dated['year_operational'].to_numpy()[rows], axis=1))
+        return years
+    
+    def estimate_missing_operational_dates(self, method='peak_growth'):
         """
-        Use the trained model to estimate operational dates for DCs without dates
-        Based on correlation between capacity, location, and electricity changes
+        Estimate operational dates for DCs without dates, for all of them at once
+        
+        method:
+            'peak_growth': the state's year with the highest electricity change
+                (heuristic, confidence 'low')
+            'capacity_weighted': capacity-weighted mean year of the state's
+                dated DCs (confidence 'medium')
+            'nearest': median year of the NEAREST_K nearest dated DCs by
+                coordinates (confidence 'medium')
+        
+        Each state's answer is computed once and joined back to the DCs. DCs the
+        chosen method cannot place fall back to 'peak_growth'; DCs in states
+        without electricity data get no estimate. The method column records
+        which estimator produced each year.
         """
         print("\nEstimating missing operational dates...")
         
         # Get DCs without operational dates
-        missing_dates = self.dc_data[
-            self.dc_data['year_operational'].isna() | 
-            (self.dc_data['year_operational'] < 1990) |
+        invalid = self.dc_data['year_operational'].isna() | \
+            (self.dc_data['year_operational'] < 1990) | \
             (self.dc_data['year_operational'] > 2025)
-        ].copy()
+        missing_dates = self.dc_data[invalid].copy()
+        dated = self.dc_data[~invalid]
         
         print(f"Data centers missing operational dates: {len(missing_dates)}")
         
-        # For each DC, find the year with highest electricity change in that state
-        # This is a heuristic approach
+        if method == 'capacity_weighted':
+            years = missing_dates['state'].map(self.capacity_weighted_years(dated))
+        elif method == 'nearest':
+            years = pd.Series(self.nearest_years(dated, missing_dates), index=missing_dates.index)
+        elif method == 'peak_growth':
+            years = pd.Series(np.nan, index=missing_dates.index)
+        else:
+            raise ValueError(f"Unknown method: {method}")
+        placed = years.notna()
         
-        estimates = []
-        for idx, row in missing_dates.iterrows():
-            state = row['state']
-            
-            # Get electricity changes for this state
-            state_changes = self.electricity_data[
-                (self.electricity_data['state'] == state) &
-                (self.electricity_data['year'] >= 2000) &
-                (self.electricity_data['year'] <= 2024)
-            ].copy()
-            
-            if len(state_changes) > 0:
-                # Find year with highest positive change
-                max_change_year = state_changes.loc[
-                    state_changes['yoy_change_pct'].idxmax(), 'year'
-                ]
-                estimates.append({
-                    'data_center_id': row['data_center_id'],
-                    'data_center_name': row['data_center_name'],
-                    'state': state,
-                    'estimated_year': int(max_change_year),
-                    'confidence': 'low'  # Heuristic estimate
-                })
+        # Fallback (and default): the state's peak electricity growth year
+        years = years.fillna(missing_dates['state'].map(self.peak_growth_years()))
         
-        estimates_df = pd.DataFrame(estimates)
-        return estimates_df
+        estimates = missing_dates[['data_center_id', 'data_center_name', 'state']].assign(
+            estimated_year=years,
+            confidence=np.where(placed, 'medium', 'low'),
+            method=np.where(placed, method, 'peak_growth'),
+        )
+        estimates = estimates.dropna(subset=['estimated_year']).reset_index(drop=True)
+        estimates['estimated_year'] = estimates['estimated_year'].astype(int)
+        print(f"Estimated {len(estimates)} dates: " +
+              ", ".join(f"{m} {c}" for m, c in estimates['method'].value_counts().items()))
+        return estimates
     
     def run_full_pipeline(self):
         """Run the complete pipeline"""
@@ -0,0 +1,198 @@
+"""
+Keyword classification of data centers (type / category) from names
+
+ai_datacenter_model, energy_model_v4, energy_model_v5_real and
+enrich_and_train_ml each kept their own keyword lists and ran
+any(kw in name for kw in ...) one row at a time. The lists now live in one
+versioned table, KEYWORD_RULES (ruleset -> keyword set -> keywords), and:
+
+- Each keyword set compiles once into a single regex alternation. A regex
+  search for "a|b|c" matches exactly when some keyword is a substring, so
+  labels are the same as the old loops.
+- Names are lower-cased and matched once per distinct value, then mapped
+  back to the rows, so repeated operator names cost nothing.
+- The classify_* functions combine the keyword matches with capacity the
+  same way each model did, over whole columns with np.select.
+
+Bump RULES_VERSION when a keyword list changes. The models save it next to
+the labels (a rules_version column in datacenter_enriched,
+datacenter_categorized and the energy estimates, and a 'rules_version'
+key in their joblib payloads), so saved outputs can be traced to the rules
+that produced them.
+
+Usage:
+    python dc_classifier.py rules
+    python dc_classifier.py classify [--bench 1000000]
+"""
+
+import argparse
+import re
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+RULES_VERSION = 1
+
+# Ruleset -> keyword set -> keywords (substring match on lower-cased text)
+KEYWORD_RULES = {
+    # ai_datacenter_model (v8 categories)
+    'ai_category': {
+        'crypto': [
+            'riot', 'marathon', 'core scientific', 'bitdeer', 'cipher', 'cleanspark',
+            'hut 8', 'hut8', 'iren', 'terawulf', 'iris energy', 'bit digital',
+            'greenidge', 'stronghold', 'argo blockchain', 'hive blockchain',
+            'bitcoin', 'btc', 'mining', 'miner', 'crypto', 'blockchain',
+            'antminer', 'asic', 'hash', 'bitfarms', 'canaan', 'bitmain',
+            'crusoe', 'applied digital', 'compute north', 'lancium',
+        ],
+        'ai_hyperscaler': [
+            'google', 'amazon', 'aws', 'meta', 'facebook', 'microsoft', 'azure',
+            'apple', 'nvidia', 'openai', 'anthropic', 'oracle cloud', 'ibm cloud',
+            'alibaba', 'tencent', 'bytedance', 'coreweave', 'lambda labs',
+        ],
+        'colocation': [
+            'equinix', 'digital realty', 'cyrusone', 'coresite',
+            'qts', 'switch', 'colocation', 'colo', 'vantage',
+            'flexential', 'databank',
+        ],
+        'planned': [
+            'project ', 'proposed', 'planned', 'future', 'phase 2', 'phase 3',
+            'upcoming', 'announced', 'under construction', 'expansion',
+            'campus',  # Campuses are often umbrella entries, not individual DCs
+        ],
+    },
+    # energy_model_v4 / energy_model_v5_real (PUE types)
+    'dc_type': {
+        'hyperscale': ['google', 'amazon', 'aws', 'meta', 'facebook',
+                       'microsoft', 'azure', 'apple'],
+        'colocation': ['equinix', 'digital realty', 'cyrusone', 'coresite',
+                       'qts', 'switch', 'colocation', 'colo'],
+    },
+    # enrich_and_train_ml (matched on "name city")
+    'enrich_type': {
+        'crypto': ['bitcoin', 'btc', 'mining', 'cleanspark', 'riot', 'marathon',
+                   'hut 8', 'core scientific', 'bitdeer', 'cipher', 'stronghold',
+                   'greenidge', 'argo', 'compute north', 'compass', 'blockfusion',
+                   'terawulf', 'bitfarms', 'hive', 'iris energy'],
+        'ai': ['google', 'meta', 'facebook', 'microsoft', 'azure', 'amazon', 'aws',
+               'nvidia', 'openai', 'anthropic', 'ai', 'machine learning', 'gpu',
+               'oracle', 'ibm', 'equinix', 'digital realty', 'cyrusone', 'qts'],
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def compiled_rules(ruleset):
+    """Keyword set -> compiled alternation of its keywords"""
+    return {name: re.compile('|'.join(map(re.escape, keywords)))
+            for name, keywords in KEYWORD_RULES[ruleset].items()}
+
+
+def lower_text(values):
+    """str(value).lower() of each value (missing values become 'nan', as in the row code)"""
+    if np.ndim(values) == 0:
+        return np.array([str(values).lower()], dtype=object)
+    codes, uniques = pd.factorize(np.asarray(values, dtype=object), use_na_sentinel=False)
+    return np.array([str(value).lower() for value in uniques], dtype=object)[codes]
+
+
+def keyword_matches(texts, ruleset, sets=None):
+    """DataFrame of booleans, one column per keyword set (default all), for lower-cased texts"""
+    codes, uniques = pd.factorize(np.asarray(texts, dtype=object))
+    patterns = compiled_rules(ruleset)
+    return pd.DataFrame({
+        name: np.array([patterns[name].search(text) is not None for text in uniques], dtype=bool)[codes]
+        for name in sets or patterns
+    })
+
+
+def _capacity(capacity_mw, n):
+    # Capacity per row as floats, NaN where missing (NaN compares False, like the row code)
+    capacity = pd.to_numeric(pd.Series(np.broadcast_to(np.asarray(capacity_mw, dtype=object), n)), errors='coerce')
+    return capacity.to_numpy(dtype=float, na_value=np.nan)
+
+
+def _result(labels, scalar):
+    return labels[0] if scalar else labels
+
+
+def classify_ai_category(names, capacity_mw=np.nan):
+    """'crypto', 'big_ai', 'decent' or 'small' (ai_datacenter_model categories)"""
+    scalar = np.ndim(names) == 0
+    match = keyword_matches(lower_text(names), 'ai_category', ['crypto', 'ai_hyperscaler', 'colocation'])
+    capacity = _capacity(capacity_mw, len(match))
+    known = ~np.isnan(capacity)
+    crypto, ai = match['crypto'].to_numpy(), match['ai_hyperscaler'].to_numpy()
+
+    # Crypto first (some crypto companies use cloud keywords); with capacity
+    # known, size decides; otherwise hyperscaler > colocation > small
+    labels = np.select(
+        [crypto, ai | (known & (capacity >= 50)), known & (capacity >= 10), known,
+         match['colocation'].to_numpy()],
+        ['crypto', 'big_ai', 'decent', 'small', 'decent'], default='small').astype(object)
+    return _result(labels, scalar)
+
+
+def is_planned(names):
+    """True for planned / announced facilities (by name)"""
+    planned = keyword_matches(lower_text(names), 'ai_category', ['planned'])['planned'].to_numpy()
+    return bool(planned[0]) if np.ndim(names) == 0 else planned
+
+
+def classify_dc_type(names, capacity_mw=0):
+    """'hyperscale', 'colocation', 'enterprise' or 'default' (energy_model_v4 / v5 PUE types)"""
+    scalar = np.ndim(names) == 0
+    match = keyword_matches(lower_text(names), 'dc_type')
+    capacity = _capacity(capacity_mw, len(match))
+    labels = np.select(
+        [match['hyperscale'].to_numpy() | (capacity >= 50), match['colocation'].to_numpy(), capacity >= 10],
+        ['hyperscale', 'colocation', 'enterprise'], default='default').astype(object)
+    return _result(labels, scalar)
+
+
+def classify_enrich_type(names, cities):
+    """'crypto', 'ai' or 'general', matched on "name city" (enrich_and_train_ml types)"""
+    scalar = np.ndim(names) == 0
+    match = keyword_matches(lower_text(names) + ' ' + lower_text(cities), 'enrich_type')
+    labels = np.select([match['crypto'].to_numpy(), match['ai'].to_numpy()],
+                       ['crypto', 'ai'], default='general').astype(object)
+    return _result(labels, scalar)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Keyword classification of data centers')
+    parser.add_argument('command', choices=['rules', 'classify'])
+    parser.add_argument('--bench', type=int, default=0, help='also time this many synthetic names')
+    args = parser.parse_args()
+
+    if args.command == 'rules':
+        print(f"Keyword rules v{RULES_VERSION}")
+        for ruleset, sets in KEYWORD_RULES.items():
+            print(f"   {ruleset}:")
+            for name, keywords in sets.items():
+                print(f"      {name}: {len(keywords)} keywords")
+    else:
+        from processed_data import load_processed
+
+        dc = load_processed('datacenter_specs', columns=['data_center_name', 'city', 'capacity_mw'])
+        start = time.time()
+        labels = {
+            'ai_category': classify_ai_category(dc['data_center_name'], dc['capacity_mw']),
+            'dc_type': classify_dc_type(dc['data_center_name'], dc['capacity_mw']),
+            'enrich_type': classify_enrich_type(dc['data_center_name'], dc['city']),
+        }
+        print(f"   {len(dc)} facilities, 3 rulesets in {(time.time() - start) * 1e3:.1f} ms")
+        for ruleset, values in labels.items():
+            counts = pd.Series(values).value_counts()
+            print(f"   {ruleset}: " + ", ".join(f"{label} {count}" for label, count in counts.items()))
+
+        if args.bench:
+            rng = np.random.default_rng(0)
+            names = rng.choice(dc['data_center_name'].dropna().to_numpy(), args.bench)
+            capacity = rng.choice(dc['capacity_mw'].to_numpy(), args.bench)
+            start = time.time()
+            classify_dc_type(names, capacity)
+            elapsed = time.time() - start
+            print(f"   dc_type: {args.bench:,} names in {elapsed:.2f}s ({args.bench / elapsed:,.0f} names/s)")
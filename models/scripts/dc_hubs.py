@@ -0,0 +1,184 @@
+"""
+Data center hubs from facility coordinates
+
+Hub concentration (Loudoun, Maricopa, Dallas) comes up throughout the
+analysis, but the models only had per-BA / per-state counts. This module
+works on the facility coordinates (datacenter_specs, attached by
+spatial_index.attach_coordinates):
+
+- FacilityIndex wraps a haversine BallTree over the coordinates, for
+  radius queries ("all DCs within 25 km") and k-nearest queries. A query
+  costs O(log n + matches), so it stays fast as the facility count grows.
+- detect_hubs() is a DBSCAN pass on the same metric: facilities with at
+  least HUB_MIN_DCS others within HUB_RADIUS_KM seed a hub, and hubs grow
+  through those neighbourhoods. Everything else is hub_id -1.
+- assign_hubs() adds hub_id, hub_name, hub_dc_count, hub_capacity_mw and
+  dcs_within_radius to a facility table. hub_features_by() aggregates
+  them per BA or state (n_hubs, hub_dc_share, hub_capacity_mw,
+  largest_hub_mw, largest_hub_dcs) for the BA and state models.
+
+Usage:
+    python dc_hubs.py hubs [--radius-km 25] [--min-dcs 5]
+    python dc_hubs.py bench [--queries 10000]
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import DBSCAN
+from sklearn.neighbors import BallTree
+
+from geography import state_abbrev
+from spatial_index import attach_coordinates
+
+BASE_DIR = Path(__file__).parent.parent.parent
+
+EARTH_RADIUS_KM = 6371.0088
+
+HUB_RADIUS_KM = 25
+HUB_MIN_DCS = 5
+
+HUB_FEATURES = ['n_hubs', 'hub_dc_share', 'hub_capacity_mw', 'largest_hub_mw', 'largest_hub_dcs']
+
+
+def _radians(lats, lons):
+    return np.radians(np.column_stack([np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)]))
+
+
+class FacilityIndex:
+    """Haversine BallTree over facility coordinates (rows without coordinates are left out)"""
+
+    def __init__(self, lats, lons):
+        points = _radians(lats, lons)
+        valid = np.isfinite(points).all(axis=1)
+        # Positions in the caller's arrays of the indexed points
+        self.rows = np.flatnonzero(valid)
+        self.points = points[valid]
+        self.tree = BallTree(self.points, metric='haversine')
+
+    def within(self, lat, lon, radius_km=HUB_RADIUS_KM):
+        """Rows within radius_km of a point, nearest first"""
+        rows, dist = self.within_many([lat], [lon], radius_km)
+        return rows[0], dist[0]
+
+    def within_many(self, lats, lons, radius_km=HUB_RADIUS_KM):
+        """Rows and distances (km) within radius_km of each point, nearest first"""
+        idx, dist = self.tree.query_radius(_radians(lats, lons), r=radius_km / EARTH_RADIUS_KM,
+                                           return_distance=True, sort_results=True)
+        return [self.rows[i] for i in idx], [d * EARTH_RADIUS_KM for d in dist]
+
+    def count_within(self, lats, lons, radius_km=HUB_RADIUS_KM):
+        """Number of facilities within radius_km of each point"""
+        return self.tree.query_radius(_radians(lats, lons), r=radius_km / EARTH_RADIUS_KM, count_only=True)
+
+    def nearest(self, lats, lons, k=5):
+        """Distances (km) and rows of the k nearest facilities to each point"""
+        dist, idx = self.tree.query(_radians(lats, lons), k=min(k, len(self.rows)))
+        return dist * EARTH_RADIUS_KM, self.rows[idx]
+
+
+def detect_hubs(lats, lons, radius_km=HUB_RADIUS_KM, min_dcs=HUB_MIN_DCS):
+    """Hub number of each facility (-1 outside hubs or without coordinates)"""
+    points = _radians(lats, lons)
+    valid = np.isfinite(points).all(axis=1)
+    labels = np.full(len(points), -1)
+    if valid.sum() >= min_dcs:
+        labels[valid] = DBSCAN(eps=radius_km / EARTH_RADIUS_KM, min_samples=min_dcs,
+                               metric='haversine', algorithm='ball_tree').fit_predict(points[valid])
+    return labels
+
+
+def assign_hubs(dc_df, radius_km=HUB_RADIUS_KM, min_dcs=HUB_MIN_DCS):
+    """dc_df with hub_id, hub_name, hub_dc_count, hub_capacity_mw and dcs_within_radius"""
+    dc_df = attach_coordinates(dc_df)
+    lats, lons = dc_df['latitude'].to_numpy(dtype=float), dc_df['longitude'].to_numpy(dtype=float)
+    capacity = pd.to_numeric(dc_df['capacity_mw'], errors='coerce').fillna(0).to_numpy()
+
+    dc_df = dc_df.copy()
+    dc_df['hub_id'] = detect_hubs(lats, lons, radius_km, min_dcs)
+    in_hub = dc_df['hub_id'] >= 0
+
+    hubs = dc_df[in_hub].assign(capacity=capacity[in_hub.to_numpy()]).groupby('hub_id').agg(
+        hub_dc_count=('hub_id', 'size'), hub_capacity_mw=('capacity', 'sum'))
+    # Hub named after its most common city
+    places = dc_df.loc[in_hub, 'city'].astype('str') + ', ' + state_abbrev(dc_df.loc[in_hub, 'state']).astype('str')
+    hubs['hub_name'] = places.groupby(dc_df.loc[in_hub, 'hub_id']).agg(lambda x: x.value_counts().index[0])
+
+    dc_df = dc_df.join(hubs, on='hub_id')
+    dc_df[['hub_dc_count', 'hub_capacity_mw']] = dc_df[['hub_dc_count', 'hub_capacity_mw']].fillna(0)
+
+    index = FacilityIndex(lats, lons)
+    within = np.zeros(len(dc_df), dtype=np.int64)
+    within[index.rows] = index.count_within(lats[index.rows], lons[index.rows], radius_km)
+    dc_df['dcs_within_radius'] = within
+    return dc_df
+
+
+def hub_table(dc_df):
+    """One row per hub: name, DC count, MW and centroid, largest first"""
+    in_hub = dc_df[dc_df['hub_id'] >= 0]
+    return (in_hub.groupby('hub_id')
+            .agg(hub_name=('hub_name', 'first'), dc_count=('hub_dc_count', 'first'),
+                 capacity_mw=('hub_capacity_mw', 'first'),
+                 latitude=('latitude', 'mean'), longitude=('longitude', 'mean'))
+            .sort_values('dc_count', ascending=False))
+
+
+def hub_features_by(dc_df, key):
+    """Hub features per value of key ('ba_code', 'state_abbrev', ...)"""
+    in_hub = dc_df['hub_id'] >= 0
+    grouped = dc_df.groupby(key)
+    features = pd.DataFrame({
+        'n_hubs': dc_df[in_hub].groupby(key)['hub_id'].nunique(),
+        'hub_dc_share': grouped['hub_id'].agg(lambda x: (x >= 0).mean()),
+        'hub_capacity_mw': dc_df[in_hub].assign(capacity=pd.to_numeric(dc_df['capacity_mw'], errors='coerce'))
+                                        .groupby(key)['capacity'].sum(),
+        'largest_hub_mw': grouped['hub_capacity_mw'].max(),
+        'largest_hub_dcs': grouped['hub_dc_count'].max(),
+    })
+    return features.fillna(0).reset_index()
+
+
+def _load_facilities():
+    with open(BASE_DIR / "website" / "datacenters.json") as f:
+        return pd.DataFrame(json.load(f))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Data center hubs from facility coordinates')
+    parser.add_argument('command', choices=['hubs', 'bench'])
+    parser.add_argument('--radius-km', type=float, default=HUB_RADIUS_KM)
+    parser.add_argument('--min-dcs', type=int, default=HUB_MIN_DCS)
+    parser.add_argument('--queries', type=int, default=10000)
+    args = parser.parse_args()
+
+    dc_df = attach_coordinates(_load_facilities())
+
+    if args.command == 'hubs':
+        start = time.time()
+        dc_df = assign_hubs(dc_df, args.radius_km, args.min_dcs)
+        hubs = hub_table(dc_df)
+        print(f"   {len(hubs)} hubs, {(dc_df['hub_id'] >= 0).sum()}/{len(dc_df)} facilities "
+              f"in {time.time() - start:.2f}s")
+        for _, row in hubs.head(15).iterrows():
+            print(f"   - {row['hub_name']}: {int(row['dc_count'])} DCs, {row['capacity_mw']:.0f} MW")
+    else:
+        index = FacilityIndex(dc_df['latitude'], dc_df['longitude'])
+        rng = np.random.default_rng(0)
+        sample = rng.choice(index.rows, args.queries)
+        lats, lons = dc_df['latitude'].to_numpy()[sample], dc_df['longitude'].to_numpy()[sample]
+
+        start = time.time()
+        for lat, lon in zip(lats[:1000], lons[:1000]):
+            index.within(lat, lon)
+        print(f"   radius {args.radius_km:.0f} km: {(time.time() - start) / 1000 * 1e3:.3f} ms/query (one at a time)")
+        start = time.time()
+        index.within_many(lats, lons, args.radius_km)
+        print(f"   radius {args.radius_km:.0f} km: {(time.time() - start) / len(lats) * 1e3:.4f} ms/query (batch)")
+        start = time.time()
+        index.nearest(lats, lons, k=5)
+        print(f"   5 nearest: {(time.time() - start) / len(lats) * 1e3:.4f} ms/query (batch)")
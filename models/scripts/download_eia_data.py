@@ -7,9 +7,8 @@ To get an API key: https://www.eia.gov/opendata/register.php
 """
 
 import os
-import requests
 import pandas as pd
-import time
+from eia_api import fetch_retail_sales_many
 
 # You need to get your own API key from EIA
 EIA_API_KEY = os.environ.get('EIA_API_KEY', '')
@@ -46,43 +45,24 @@ def download_state_electricity_sales():
     
     print(f"Downloading electricity data for {len(states)} states...")
     
+    # EIA API v2 retail sales, fetched concurrently through the eia_api
+    # response cache (reruns within the TTL don't hit the API)
+    results = fetch_retail_sales_many(states, 1990, 2024, api_key=EIA_API_KEY)
+    
     for i, (state_code, state_name) in enumerate(states.items()):
-        # EIA API v2 endpoint for electricity sales
-        url = "https://api.eia.gov/v2/electricity/retail-sales/data/"
-        
-        params = {
-            'api_key': EIA_API_KEY,
-            'frequency': 'annual',
-            'data[0]': 'sales',
-            'facets[stateid][]': state_code,
-            'facets[sectorid][]': 'ALL',  # All sectors combined
-            'start': '1990',
-            'end': '2024',
-            'sort[0][column]': 'period',
-            'sort[0][direction]': 'asc'
-        }
-        
-        try:
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            data = response.json()
-            
-            if 'response' in data and 'data' in data['response']:
-                for record in data['response']['data']:
-                    all_data.append({
-                        'state': state_name,
-                        'state_code': state_code,
-                        'year': int(record['period']),
-                        'total_consumption_mwh': float(record['sales']) * 1000  # Convert GWh to MWh
-                    })
-            
-            print(f"  [{i+1}/{len(states)}] {state_name}: {len(data.get('response', {}).get('data', []))} years")
-            
-        except Exception as e:
-            print(f"  Error fetching {state_name}: {e}")
+        if state_code not in results:
+            continue
+        for record in results[state_code]:
+            if record.get('sales') is None:
+                continue
+            all_data.append({
+                'state': state_name,
+                'state_code': state_code,
+                'year': int(record['period']),
+                'total_consumption_mwh': float(record['sales']) * 1000  # Convert GWh to MWh
+            })
         
-        # Rate limiting - be nice to the API
-        time.sleep(0.5)
+        print(f"  [{i+1}/{len(states)}] {state_name}: {len(results[state_code])} years")
     
     if all_data:
         df = pd.DataFrame(all_data)
@@ -0,0 +1,168 @@
+"""
+EIA API v2 client with an on-disk response cache
+
+enrich_and_train_ml.get_eia_electricity_data and
+download_eia_data.download_state_electricity_sales both pull annual retail
+sales per state, one blocking request after another. This module puts them
+behind one client:
+
+- Responses are stored as JSON under data/eia/api_cache (or EIA_CACHE_DIR),
+  keyed by route and query parameters (the API key isn't part of the key). A cached response
+  younger than the TTL (EIA_CACHE_TTL seconds, default 7 days) is served
+  without a request.
+- Offline mode (offline=True or EIA_OFFLINE=1) only reads the cache, at any
+  age, and never touches the network. A failed request falls back to a
+  stale cached response if there is one.
+- fetch_retail_sales_many() fetches several states concurrently on a small
+  thread pool (MAX_WORKERS requests in flight).
+- EIA_API_URL overrides the API base URL, so the client can run against
+  the local stub (eia_stub_server.py, which walks through the cold, warm,
+  expired, offline and stale-fallback cases).
+
+Usage:
+    python eia_api.py fetch [--states VA TX] [--offline]
+    python eia_api.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+BASE_DIR = Path(__file__).parent.parent.parent
+API_CACHE_DIR = Path(os.environ.get('EIA_CACHE_DIR', BASE_DIR / "data" / "eia" / "api_cache"))
+
+API_URL = os.environ.get('EIA_API_URL', 'https://api.eia.gov/v2').rstrip('/')
+RETAIL_SALES_ROUTE = 'electricity/retail-sales/data/'
+
+CACHE_TTL = int(os.environ.get('EIA_CACHE_TTL', 7 * 24 * 3600))
+OFFLINE = os.environ.get('EIA_OFFLINE', '') not in ('', '0')
+
+# Requests in flight at once in fetch_retail_sales_many
+MAX_WORKERS = 4
+
+STATE_CODES = [
+    'AL', 'AK', 'AZ', 'AR', 'CA', 'CO', 'CT', 'DE', 'DC', 'FL', 'GA', 'HI',
+    'ID', 'IL', 'IN', 'IA', 'KS', 'KY', 'LA', 'ME', 'MD', 'MA', 'MI', 'MN',
+    'MS', 'MO', 'MT', 'NE', 'NV', 'NH', 'NJ', 'NM', 'NY', 'NC', 'ND', 'OH',
+    'OK', 'OR', 'PA', 'RI', 'SC', 'SD', 'TN', 'TX', 'UT', 'VT', 'VA', 'WA',
+    'WV', 'WI', 'WY'
+]
+
+
+def _cache_file(route, params):
+    key = json.dumps([route, sorted(params.items())])
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+    return API_CACHE_DIR / f"{route.strip('/').replace('/', '_')}_{digest}.json"
+
+
+def _read_cache(cache_file):
+    if not cache_file.exists():
+        return None
+    with open(cache_file) as f:
+        return json.load(f)
+
+
+def _write_cache(cache_file, params, data):
+    API_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f'.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump({'fetched_at': time.time(), 'params': params, 'response': data}, f)
+    os.replace(tmp_file, cache_file)
+
+
+def get_json(route, params, api_key='', ttl=None, offline=None, timeout=30):
+    """
+    GET {API_URL}/{route} through the response cache. Raises LookupError when
+    offline with nothing cached, or the request's exception when it fails
+    with nothing cached.
+    """
+    ttl = CACHE_TTL if ttl is None else ttl
+    offline = OFFLINE if offline is None else offline
+    cache_file = _cache_file(route, params)
+    cached = _read_cache(cache_file)
+
+    if cached is not None and (offline or time.time() - cached['fetched_at'] < ttl):
+        return cached['response']
+    if offline:
+        raise LookupError(f"not cached (offline): {route} {params}")
+
+    try:
+        response = requests.get(f"{API_URL}/{route}", params={**params, 'api_key': api_key}, timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+    except Exception as e:
+        if cached is None:
+            raise
+        print(f"   ⚠️ {e}; using cached response from {time.ctime(cached['fetched_at'])}")
+        return cached['response']
+
+    _write_cache(cache_file, params, data)
+    return data
+
+
+def retail_sales_params(state_code, start, end, sector='ALL'):
+    return {
+        'frequency': 'annual',
+        'data[0]': 'sales',
+        'facets[stateid][]': state_code,
+        'facets[sectorid][]': sector,
+        'start': str(start),
+        'end': str(end),
+        'sort[0][column]': 'period',
+        'sort[0][direction]': 'asc',
+    }
+
+
+def fetch_retail_sales(state_code, start, end, api_key='', ttl=None, offline=None):
+    """Annual retail sales records (all sectors) for one state: [{'period', 'sales', ...}]"""
+    data = get_json(RETAIL_SALES_ROUTE, retail_sales_params(state_code, start, end),
+                    api_key=api_key, ttl=ttl, offline=offline)
+    return data.get('response', {}).get('data', [])
+
+
+def fetch_retail_sales_many(state_codes, start, end, api_key='', ttl=None, offline=None, workers=MAX_WORKERS):
+    """
+    fetch_retail_sales for several states, concurrently. Returns
+    {state_code: records} in the order given; states that failed are
+    reported and left out.
+    """
+    def fetch(state_code):
+        try:
+            return fetch_retail_sales(state_code, start, end, api_key, ttl, offline)
+        except Exception as e:
+            print(f"  Error fetching {state_code}: {e}")
+            return None
+
+    state_codes = list(state_codes)
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(state_codes)))) as pool:
+        results = list(pool.map(fetch, state_codes))
+    return {code: records for code, records in zip(state_codes, results) if records is not None}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='EIA API client with response cache')
+    parser.add_argument('command', choices=['fetch', 'stats'])
+    parser.add_argument('--states', nargs='*', default=STATE_CODES)
+    parser.add_argument('--start', default='2001')
+    parser.add_argument('--end', default='2024')
+    parser.add_argument('--offline', action='store_true', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'fetch':
+        start = time.time()
+        results = fetch_retail_sales_many(args.states, args.start, args.end,
+                                          api_key=os.environ.get('EIA_API_KEY', ''), offline=args.offline)
+        print(f"   {len(results)}/{len(args.states)} states, "
+              f"{sum(len(r) for r in results.values())} records in {time.time() - start:.1f}s")
+    else:
+        files = list(API_CACHE_DIR.glob('*.json'))
+        now = time.time()
+        fresh = sum(1 for f in files if now - _read_cache(f)['fetched_at'] < CACHE_TTL)
+        print(f"   {len(files)} cached responses ({fresh} fresh, TTL {CACHE_TTL / 3600:.0f}h) in {API_CACHE_DIR}")
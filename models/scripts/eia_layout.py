@@ -0,0 +1,251 @@
+"""
+EIA-861 column layouts
+
+The EIA-861 workbooks don't keep their columns in fixed places (2019's
+Sales_Ult_Cust has an extra 'Short Form' column after BA Code, shifting
+every sector column by one). Instead of positional renames and column-name
+scans in each predictor, this module resolves column roles ('ba_code',
+'industrial_sales_mwh', ...) from a workbook's header rows:
+
+- Sales_Ult_Cust has three header rows: sector (RESIDENTIAL ... TOTAL, one
+  label per block), measure (Revenues/Sales/Customers) and field names /
+  units. A sector column's role is '{sector}_{measure}', and its unit is
+  checked against the measure.
+- Service_Territory and Balancing_Authority have one row of field names.
+- A layout is resolved once per workbook version (sha256) and kept in
+  data/eia/cache/layouts.json. Only the header rows are read, with
+  openpyxl in read-only mode.
+- load_eia_sheet(path, prefix, roles) reads just those columns through the
+  eia_store Parquet cache (usecols), names them by role, and drops the
+  units row and footnotes.
+
+A workbook missing a required role, or with two columns claiming one,
+raises ValueError instead of loading shifted data.
+
+Usage:
+    python eia_layout.py show [--years 2019 2024]
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+
+from eia_store import CACHE_DIR, EIA_DIR, EIA_SHEETS, eia_workbook, read_eia_excel, workbook_sha256
+
+LAYOUTS_FILE = CACHE_DIR / "layouts.json"
+
+# Header rows (0-based sheet rows) of each workbook
+HEADER_ROWS = {
+    'Sales_Ult_Cust': {'sector': 0, 'measure': 1, 'field': 2},
+    'Service_Territory': {'field': 0},
+    'Balancing_Authority': {'field': 0},
+}
+
+# Field name (first line of the cell) -> role
+FIELD_ROLES = {
+    'Sales_Ult_Cust': {
+        'Data Year': 'year',
+        'Utility Number': 'utility_id',
+        'Utility Name': 'utility_name',
+        'Part': 'part',
+        'Service Type': 'service_type',
+        'Data Type': 'data_type',
+        'State': 'state',
+        'Ownership': 'ownership',
+        'BA Code': 'ba_code',
+        'Short Form': 'short_form',
+    },
+    'Service_Territory': {
+        'Data Year': 'year',
+        'Utility Number': 'utility_id',
+        'Utility Name': 'utility_name',
+        'Short Form': 'short_form',
+        'State': 'state',
+        'County': 'county',
+    },
+    'Balancing_Authority': {
+        'Data Year': 'year',
+        'BA ID': 'ba_id',
+        'BA Code': 'ba_code',
+        'State': 'state',
+        'Balancing Authority Name': 'ba_name',
+    },
+}
+
+SALES_SECTORS = {
+    'RESIDENTIAL': 'residential',
+    'COMMERCIAL': 'commercial',
+    'INDUSTRIAL': 'industrial',
+    'TRANSPORTATION': 'transport',
+    'TOTAL': 'total',
+}
+
+# Measure -> (role suffix, unit in the field row)
+SALES_MEASURES = {
+    'Revenues': ('revenue', 'Thousand Dollars'),
+    'Sales': ('sales_mwh', 'Megawatthours'),
+    'Customers': ('customers', 'Count'),
+}
+
+SALES_ROLES = [f'{sector}_{suffix}' for sector in SALES_SECTORS.values()
+               for suffix, _ in SALES_MEASURES.values()]
+
+REQUIRED_ROLES = {
+    'Sales_Ult_Cust': ['year', 'utility_id', 'utility_name', 'state', 'ba_code'] + SALES_ROLES,
+    'Service_Territory': ['year', 'utility_id', 'state', 'county'],
+    'Balancing_Authority': ['year', 'ba_code', 'state'],
+}
+
+NUMERIC_ROLES = {'year', 'utility_id', 'ba_id', *SALES_ROLES}
+
+
+def _load_layouts():
+    if LAYOUTS_FILE.exists():
+        with open(LAYOUTS_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_layout(digest, layout):
+    # Re-read before writing, as eia_store does for its manifest
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    layouts = _load_layouts()
+    layouts[digest] = layout
+    tmp_file = LAYOUTS_FILE.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(layouts, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, LAYOUTS_FILE)
+
+
+def _header_rows(path, sheet_name, n_rows):
+    wb = openpyxl.load_workbook(path, read_only=True)
+    try:
+        ws = wb[sheet_name] if isinstance(sheet_name, str) else wb.worksheets[sheet_name]
+        rows = [[cell.value for cell in row] for row in ws.iter_rows(max_row=n_rows)]
+    finally:
+        wb.close()
+    width = max(len(row) for row in rows)
+    return [row + [None] * (width - len(row)) for row in rows]
+
+
+def _label(value):
+    return str(value).split('\n')[0].strip() if value is not None else ''
+
+
+def resolve_layout(path, prefix):
+    """Column role -> position for a workbook, from its header rows"""
+    sheet_name, _ = EIA_SHEETS[prefix]
+    header_rows = HEADER_ROWS[prefix]
+    rows = _header_rows(path, sheet_name, max(header_rows.values()) + 1)
+    fields = rows[header_rows['field']]
+    field_roles = FIELD_ROLES[prefix]
+
+    roles = {}
+    problems = []
+    sector = None
+    for position, value in enumerate(fields):
+        field = _label(value)
+        role = None
+
+        if 'measure' in header_rows:
+            # Sector labels sit on the first column of each block
+            sector_label = _label(rows[header_rows['sector']][position])
+            if sector_label:
+                sector = SALES_SECTORS.get(sector_label.upper())
+            measure = _label(rows[header_rows['measure']][position])
+            if measure:
+                if sector is None or measure not in SALES_MEASURES:
+                    problems.append(f"column {position}: unknown sector/measure {sector_label or sector!r} / {measure!r}")
+                    continue
+                suffix, unit = SALES_MEASURES[measure]
+                if field != unit:
+                    problems.append(f"column {position}: {measure} in {field!r}, expected {unit!r}")
+                role = f'{sector}_{suffix}'
+
+        if role is None:
+            role = field_roles.get(field)
+        if role is None:
+            continue
+        if role in roles:
+            problems.append(f"{role!r} in columns {roles[role]} and {position}")
+        roles[role] = position
+
+    missing = [role for role in REQUIRED_ROLES[prefix] if role not in roles]
+    if missing:
+        problems.append(f"no column for {', '.join(missing)}")
+    if problems:
+        raise ValueError(f"{Path(path).name} layout not recognized: " + "; ".join(problems))
+
+    return {
+        'workbook': prefix,
+        'sheet': sheet_name,
+        'header': EIA_SHEETS[prefix][1],
+        # Rows between the pandas header and the data (the units row in Sales)
+        'skip_rows': header_rows['field'] - EIA_SHEETS[prefix][1],
+        'roles': roles,
+    }
+
+
+def eia_layout(path, prefix):
+    """Resolved layout for a workbook, cached per workbook version"""
+    digest = workbook_sha256(path)
+    layout = _load_layouts().get(digest)
+    if layout is None:
+        layout = resolve_layout(path, prefix)
+        _save_layout(digest, layout)
+    return layout
+
+
+def load_eia_sheet(path, prefix, roles=None):
+    """
+    Data rows of an EIA-861 sheet with only the given role columns (all
+    resolved roles if None), named by role. Numeric roles are converted
+    with pd.to_numeric; rows without a numeric year (units row, footnotes)
+    are dropped.
+    """
+    layout = eia_layout(path, prefix)
+    if roles is None:
+        roles = sorted(layout['roles'], key=layout['roles'].get)
+    missing = [role for role in roles if role not in layout['roles']]
+    if missing:
+        raise ValueError(f"{Path(path).name} has no column for {', '.join(missing)}")
+
+    df = read_eia_excel(path, sheet_name=layout['sheet'], header=layout['header'],
+                        usecols=[layout['roles'][role] for role in roles])
+    df.columns = roles
+    df = df.iloc[layout['skip_rows']:]
+
+    if 'year' in df.columns:
+        df = df[pd.to_numeric(df['year'], errors='coerce').notna()]
+    for role in roles:
+        if role in NUMERIC_ROLES:
+            df[role] = pd.to_numeric(df[role], errors='coerce')
+    return df
+
+
+def show(years=None):
+    """Print the resolved layouts, one line per workbook"""
+    years = years or sorted(int(p.name) for p in EIA_DIR.iterdir() if p.is_dir() and p.name.isdigit())
+    for prefix in EIA_SHEETS:
+        print(f"\n{prefix}")
+        for year in years:
+            path = eia_workbook(year, prefix)
+            if not path.exists():
+                print(f"   {year}: missing")
+                continue
+            roles = eia_layout(path, prefix)['roles']
+            print(f"   {year}: {len(roles)} roles, " + ", ".join(
+                f"{role}={position}" for role, position in sorted(roles.items(), key=lambda item: item[1])))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='EIA-861 column layouts')
+    parser.add_argument('command', choices=['show'])
+    parser.add_argument('--years', type=int, nargs='*', default=None)
+    args = parser.parse_args()
+
+    show(args.years)
@@ -0,0 +1,245 @@
+"""
+EIA-861 workbook cache
+
+Parsing the EIA-861 xlsx files with openpyxl dominated model startup: every
+run re-read Sales_Ult_Cust_{year}.xlsx (and Service_Territory /
+Balancing_Authority in granular_predictor). This module reads each sheet
+once and keeps it as Parquet under data/eia/cache:
+
+- read_eia_excel(path, sheet_name, header) is a drop-in for pd.read_excel.
+  The cached frame is keyed by the workbook's sha256 plus sheet and header
+  row. A re-downloaded workbook gets a new key, and the old entry is
+  dropped on the next ingest.
+- manifest.json remembers each workbook's size, mtime, hash and sheet
+  names, so a warm load doesn't hash or open the xlsx at all
+- EIA sheets mix numbers and text in one column ('.' for missing values,
+  unit rows, footnotes). Such columns are stored as a float column plus a
+  text column and put back together on load. Whole numbers come back as
+  int.
+
+Usage:
+    python eia_store.py ingest          # cache the sheets the models read, all years
+    python eia_store.py stats
+    python eia_store.py clear
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+BASE_DIR = Path(__file__).parent.parent.parent
+EIA_DIR = BASE_DIR / "data" / "eia"
+CACHE_DIR = EIA_DIR / "cache"
+MANIFEST_FILE = CACHE_DIR / "manifest.json"
+
+# Workbooks the models read: file prefix -> (sheet_name, header row)
+EIA_SHEETS = {
+    'Sales_Ult_Cust': ('States', 1),
+    'Service_Territory': (0, 0),
+    'Balancing_Authority': (0, 0),
+}
+
+# Column name suffixes for the two halves of a mixed number/text column
+NUM_SUFFIX = '::num'
+TEXT_SUFFIX = '::text'
+
+
+def _load_manifest():
+    if MANIFEST_FILE.exists():
+        with open(MANIFEST_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def _save_manifest(key, entry):
+    # Re-read before writing so processes loading different years in parallel
+    # (ba_multiyear_predictor.load_all_years) don't drop each other's entries
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    manifest = _load_manifest()
+    manifest[key] = entry
+    tmp_file = MANIFEST_FILE.with_suffix(f'.{os.getpid()}.tmp')
+    with open(tmp_file, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_file, MANIFEST_FILE)
+
+
+def _workbook_entry(path, manifest):
+    """Manifest entry for a workbook, re-hashed only when its size or mtime changed"""
+    path = Path(path).resolve()
+    key = str(path.relative_to(EIA_DIR.resolve())) if path.is_relative_to(EIA_DIR.resolve()) else str(path)
+    st = os.stat(path)
+    entry = manifest.get(key)
+    if entry and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime:
+        return key, entry, False
+
+    with open(path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    entry = {'size': st.st_size, 'mtime': st.st_mtime, 'sha256': digest, 'sheets': None}
+    manifest[key] = entry
+    return key, entry, True
+
+
+def _cache_file(digest, sheet_name, header):
+    return CACHE_DIR / f"{digest[:16]}_{sheet_name}_h{header}.parquet"
+
+
+def _encode(df):
+    """Split object columns holding both numbers and text so Parquet can store them"""
+    out = {}
+    for col in df.columns:
+        values = df[col]
+        if values.dtype == object:
+            present = values.notna()
+            is_number = values.map(lambda v: isinstance(v, (int, float, np.number)) and not isinstance(v, bool))
+            if (is_number & present).any() and (~is_number & present).any():
+                out[f'{col}{NUM_SUFFIX}'] = pd.to_numeric(values.where(is_number), errors='coerce').astype('float64')
+                out[f'{col}{TEXT_SUFFIX}'] = values.where(~is_number & present).astype(object).map(
+                    lambda v: v if v is None or v != v else str(v))
+                continue
+        out[str(col)] = values
+    return pd.DataFrame(out)
+
+
+def _decode(df):
+    """Reassemble mixed columns split by _encode()"""
+    out = {}
+    for col in df.columns:
+        if col.endswith(TEXT_SUFFIX):
+            continue
+        if col.endswith(NUM_SUFFIX):
+            name = col[:-len(NUM_SUFFIX)]
+            numbers = df[col].to_numpy()
+            texts = df[f'{name}{TEXT_SUFFIX}'].to_numpy(dtype=object)
+
+            merged = numbers.astype(object)
+            whole = ~np.isnan(numbers) & (np.mod(numbers, 1) == 0)
+            merged[whole] = numbers[whole].astype(np.int64)
+            has_text = pd.notna(texts)
+            merged[has_text] = texts[has_text]
+            out[name] = pd.Series(merged, index=df.index, dtype=object)
+        else:
+            out[col] = df[col]
+    return pd.DataFrame(out)
+
+
+def read_eia_excel(path, sheet_name=0, header=0, columns=None, usecols=None):
+    """
+    pd.read_excel(path, sheet_name=sheet_name, header=header) through the
+    Parquet cache. columns limits the load to those (original) column names,
+    usecols to those column positions.
+    """
+    key, entry, changed = _workbook_entry(path, _load_manifest())
+    cache_file = _cache_file(entry['sha256'], sheet_name, header)
+
+    if cache_file.exists():
+        if changed:
+            _save_manifest(key, entry)
+        if usecols is not None:
+            names = _original_columns(pq.read_schema(cache_file).names)
+            columns = [names[i] for i in usecols]
+        stored = _stored_columns(cache_file, columns) if columns is not None else None
+        return _decode(pd.read_parquet(cache_file, columns=stored))
+
+    df = pd.read_excel(path, sheet_name=sheet_name, header=header)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_suffix(f'.{os.getpid()}.tmp')
+    _encode(df).to_parquet(tmp_file, index=False)
+    os.replace(tmp_file, cache_file)
+    _save_manifest(key, entry)
+    if usecols is not None:
+        return df.iloc[:, list(usecols)]
+    return df[columns] if columns is not None else df
+
+
+def _original_columns(names):
+    # Parquet column names -> the sheet's column names, in order
+    return [name[:-len(NUM_SUFFIX)] if name.endswith(NUM_SUFFIX) else name
+            for name in names if not name.endswith(TEXT_SUFFIX)]
+
+
+def _stored_columns(cache_file, columns):
+    # Original column names -> the Parquet columns holding them
+    names = pq.read_schema(cache_file).names
+    stored = []
+    for col in columns:
+        if col in names:
+            stored.append(col)
+        else:
+            stored.extend([f'{col}{NUM_SUFFIX}', f'{col}{TEXT_SUFFIX}'])
+    return stored
+
+
+def workbook_sha256(path):
+    """sha256 of a workbook (from the manifest while its size and mtime are unchanged)"""
+    key, entry, changed = _workbook_entry(path, _load_manifest())
+    if changed:
+        _save_manifest(key, entry)
+    return entry['sha256']
+
+
+def eia_sheet_names(path):
+    """Sheet names of a workbook (from the manifest once it has been opened)"""
+    key, entry, _ = _workbook_entry(path, _load_manifest())
+    if entry.get('sheets') is None:
+        entry['sheets'] = pd.ExcelFile(path).sheet_names
+        _save_manifest(key, entry)
+    return entry['sheets']
+
+
+def eia_workbook(year, prefix):
+    """Path of an EIA-861 workbook, e.g. eia_workbook(2024, 'Sales_Ult_Cust')"""
+    return EIA_DIR / str(year) / f"{prefix}_{year}.xlsx"
+
+
+def ingest(years=None):
+    """Cache every EIA_SHEETS workbook under data/eia/{year}, dropping entries for replaced workbooks"""
+    years = years or sorted(int(p.name) for p in EIA_DIR.iterdir() if p.is_dir() and p.name.isdigit())
+    start = time.time()
+
+    for year in years:
+        for prefix, (sheet_name, header) in EIA_SHEETS.items():
+            path = eia_workbook(year, prefix)
+            if not path.exists():
+                print(f"   {year} {prefix}: missing")
+                continue
+            t = time.time()
+            df = read_eia_excel(path, sheet_name, header)
+            print(f"   {year} {prefix}: {len(df):,} rows ({time.time() - t:.2f}s)")
+
+    # Remove cache files no workbook hash points at any more
+    live = {entry['sha256'][:16] for entry in _load_manifest().values()}
+    removed = 0
+    for cache_file in CACHE_DIR.glob('*.parquet'):
+        if cache_file.name.split('_', 1)[0] not in live:
+            cache_file.unlink()
+            removed += 1
+
+    print(f"\n   Ingested {len(years)} years in {time.time() - start:.1f}s"
+          f"{f', removed {removed} stale cache files' if removed else ''}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='EIA-861 workbook cache')
+    parser.add_argument('command', choices=['ingest', 'stats', 'clear'])
+    parser.add_argument('--years', type=int, nargs='*', default=None)
+    args = parser.parse_args()
+
+    if args.command == 'ingest':
+        ingest(args.years)
+    elif args.command == 'stats':
+        files = list(CACHE_DIR.glob('*.parquet'))
+        print(f"   {len(_load_manifest())} workbooks, {len(files)} cached sheets, "
+              f"{sum(f.stat().st_size for f in files) / 1e6:.1f} MB in {CACHE_DIR}")
+    else:
+        for cache_file in CACHE_DIR.glob('*.parquet'):
+            cache_file.unlink()
+        if MANIFEST_FILE.exists():
+            MANIFEST_FILE.unlink()
+        print("   Cleared")
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Local EIA API Stub
+Serves electricity/retail-sales/data/ in the EIA API v2 response format,
+built from data/processed/eia_state_electricity_real.csv, so eia_api.py
+(and the scripts that use it) can be exercised without an API key or
+network. Each request is logged with a running count, which shows which
+runs were served from the cache and which reached the server.
+
+    /electricity/retail-sales/data/?facets[stateid][]=VA&start=2001&end=2024
+        -> {"response": {"total": N, "data": [{"period": "2001", "stateid": "VA", "sales": ...}]}}
+
+Usage:
+    python eia_stub_server.py --port 8001
+    python eia_stub_server.py --port 8001 --delay 0.5      # slow responses, to see the thread pool
+    python eia_stub_server.py --port 8001 --fail-every 1   # every request gets a 503
+
+With the stub running, point the client at it and at a scratch cache:
+    export EIA_API_URL=http://127.0.0.1:8001 EIA_CACHE_DIR=/tmp/eia_cache
+    python eia_api.py fetch --states VA TX                    # cold: 2 requests
+    python eia_api.py fetch --states VA TX                    # warm: no requests
+    EIA_CACHE_TTL=0 python eia_api.py fetch --states VA TX    # expired: 2 requests
+    python eia_api.py fetch --states VA TX CA --offline       # offline: no requests, CA missing
+    (restart the stub with --fail-every 1)
+    EIA_CACHE_TTL=0 python eia_api.py fetch --states VA TX    # stale fallback: 503s, cached data used
+"""
+
+import argparse
+import csv
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
+
+BASE_DIR = Path(__file__).parent.parent.parent
+SALES_CSV = BASE_DIR / "data" / "processed" / "eia_state_electricity_real.csv"
+
+RETAIL_SALES_PATH = '/electricity/retail-sales/data/'
+
+
+def load_sales(csv_file=SALES_CSV):
+    """{state_code: [(year, state name, sales in million kWh)]} from the saved state sales"""
+    sales = {}
+    with open(csv_file, newline='') as f:
+        for row in csv.DictReader(f):
+            # The CSV is in MWh; the API reports million kWh
+            sales.setdefault(row['state_code'], []).append(
+                (int(row['year']), row['state'], float(row['total_consumption_mwh']) / 1000))
+    return sales
+
+
+def retail_sales_response(sales, query):
+    """API v2 response body for one retail-sales query"""
+    state_code = query.get('facets[stateid][]', [''])[0]
+    start = int(query.get('start', ['0'])[0])
+    end = int(query.get('end', ['9999'])[0])
+    records = [
+        {'period': str(year), 'stateid': state_code, 'stateDescription': name,
+         'sectorid': 'ALL', 'sectorName': 'all sectors',
+         'sales': round(value, 5), 'sales-units': 'million kilowatt hours'}
+        for year, name, value in sorted(sales.get(state_code, []))
+        if start <= year <= end
+    ]
+    return {'response': {'total': len(records), 'dateFormat': 'YYYY', 'frequency': 'annual', 'data': records},
+            'request': {'command': RETAIL_SALES_PATH}}
+
+
+def make_handler(sales, delay, fail_every):
+    """Build a request handler class bound to the loaded sales"""
+    counter = {'requests': 0}
+    lock = threading.Lock()
+
+    class EIAStubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                counter['requests'] += 1
+                n = counter['requests']
+
+            url = urlsplit(self.path)
+            query = parse_qs(url.query)
+            state_code = query.get('facets[stateid][]', ['?'])[0]
+            if delay:
+                time.sleep(delay)
+
+            if url.path.rstrip('/') != RETAIL_SALES_PATH.rstrip('/'):
+                status, body = 404, {'error': f'unknown route {url.path}'}
+            elif fail_every and n % fail_every == 0:
+                status, body = 503, {'error': 'Service Unavailable'}
+            else:
+                status, body = 200, retail_sales_response(sales, query)
+
+            print(f"   [{n}] {state_code} -> {status}", flush=True)
+            self._send(status, json.dumps(body).encode('utf-8'))
+
+        def _send(self, status, body):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return EIAStubHandler
+
+
+def serve(csv_file=SALES_CSV, port=8001, delay=0.0, fail_every=0):
+    """Run the stub server until interrupted"""
+    sales = load_sales(csv_file)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(sales, delay, fail_every))
+    print(f"Serving {len(sales)} states from {csv_file} at http://127.0.0.1:{port}{RETAIL_SALES_PATH}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve saved state sales as a local EIA API stub')
+    parser.add_argument('--csv', default=SALES_CSV)
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds to wait before each response')
+    parser.add_argument('--fail-every', type=int, default=0,
+                        help='return a 503 every N requests (1 = always)')
+    args = parser.parse_args()
+
+    serve(args.csv, args.port, args.delay, args.fail_every)
@@ -25,6 +25,7 @@ import warnings
 import os
 import json
 from datetime import datetime
+from processed_data import load_processed
 
 warnings.filterwarnings('ignore')
 
@@ -34,7 +35,7 @@ MODEL_DIR = '/Users/diggy/Documents/env-forecasting/env_forecasting/data/models'
 
 def load_data():
     """Load the ML feature dataset."""
-    df = pd.read_csv(f'{DATA_DIR}/ml_features.csv')
+    df = load_processed('ml_features')
     print(f"Loaded {len(df)} state-year observations")
     print(f"Years: {df['year'].min()} - {df['year'].max()}")
     print(f"States: {df['state'].nunique()}")
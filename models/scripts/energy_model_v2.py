@@ -14,12 +14,13 @@ import pandas as pd
 import numpy as np
 import os
 import joblib
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
+from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import Ridge, Lasso, ElasticNet
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import warnings
+from processed_data import load_processed
+from model_suite import train_suite
 warnings.filterwarnings('ignore')
 
 
@@ -38,16 +39,10 @@ class ImprovedEnergyModel:
         print("Loading data...")
         
         # Load data center specs
-        self.dc_data = pd.read_csv(f'{self.data_dir}/datacenter_specs.csv')
-        self.dc_data['year_operational'] = pd.to_numeric(
-            self.dc_data['year_operational'], errors='coerce'
-        )
-        self.dc_data['capacity_mw'] = pd.to_numeric(
-            self.dc_data['capacity_mw'], errors='coerce'
-        )
+        self.dc_data = load_processed('datacenter_specs')
         
         # Load electricity data
-        self.electricity_data = pd.read_csv(f'{self.data_dir}/eia_state_electricity.csv')
+        self.electricity_data = load_processed('eia_state_electricity')
         
         print(f"Data centers: {len(self.dc_data)}")
         print(f"  With year: {self.dc_data['year_operational'].notna().sum()}")
@@ -188,29 +183,24 @@ class ImprovedEnergyModel:
             ),
         }
         
+        # 5-fold CV on the training set and the full training fit, all
+        # models at once (model_suite)
+        suite = train_suite(models, X_train_scaled, y_train, X_test_scaled, y_test, cv=5)
+        
         results = {}
         
-        for name, model in models.items():
-            # Cross-validation
-            cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=5, scoring='r2')
-            
-            # Train on full training set
-            model.fit(X_train_scaled, y_train)
-            
-            # Test predictions
-            y_pred = model.predict(X_test_scaled)
-            
+        for name, row in suite.iterrows():
             results[name] = {
-                'cv_r2_mean': cv_scores.mean(),
-                'cv_r2_std': cv_scores.std(),
-                'test_r2': r2_score(y_test, y_pred),
-                'test_mae': mean_absolute_error(y_test, y_pred),
-                'test_rmse': np.sqrt(mean_squared_error(y_test, y_pred)),
-                'model': model
+                'cv_r2_mean': row['cv_r2_mean'],
+                'cv_r2_std': row['cv_r2_std'],
+                'test_r2': row['test_r2'],
+                'test_mae': row['test_mae'],
+                'test_rmse': row['test_rmse'],
+                'model': row['model']
             }
             
             print(f"\n{name}:")
-            print(f"  CV R² = {cv_scores.mean():.3f} (±{cv_scores.std():.3f})")
+            print(f"  CV R² = {row['cv_r2_mean']:.3f} (±{row['cv_r2_std']:.3f})")
             print(f"  Test R² = {results[name]['test_r2']:.3f}")
             print(f"  Test MAE = {results[name]['test_mae']:,.0f}")
         
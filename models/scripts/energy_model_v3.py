@@ -20,6 +20,8 @@ from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import Ridge, ElasticNet
 from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 import warnings
+from processed_data import load_processed
+from energy_physics import estimate_energy_mwh
 warnings.filterwarnings('ignore')
 
 
@@ -50,13 +52,7 @@ class RealisticEnergyModel:
         """Load data center specs"""
         print("Loading data center data...")
         
-        self.dc_data = pd.read_csv(f'{self.data_dir}/datacenter_specs.csv')
-        self.dc_data['year_operational'] = pd.to_numeric(
-            self.dc_data['year_operational'], errors='coerce'
-        )
-        self.dc_data['capacity_mw'] = pd.to_numeric(
-            self.dc_data['capacity_mw'], errors='coerce'
-        )
+        self.dc_data = load_processed('datacenter_specs')
         
         return self.dc_data
     
@@ -240,11 +236,10 @@ class RealisticEnergyModel:
         df['capacity_mw_est'] = df['capacity_mw'].fillna(state_median).fillna(overall_median).fillna(15)
         
         # Calculate expected annual energy consumption
-        df['expected_energy_mwh'] = (
-            df['capacity_mw_est'] * 
-            HOURS_PER_YEAR * 
-            UTILIZATION_RATE * 
-            TYPICAL_PUE
+        df['expected_energy_mwh'] = estimate_energy_mwh(
+            df['capacity_mw_est'],
+            pue={'default': TYPICAL_PUE},
+            utilization={'default': UTILIZATION_RATE}
         )
         
         print(f"\nPhysics-based energy estimation:")
@@ -8,7 +8,6 @@ Hybrid approach:
 3. Proper uncertainty quantification
 """
 
-import pandas as pd
 import numpy as np
 import os
 import joblib
@@ -16,33 +15,12 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler
 import warnings
+from processed_data import load_processed
+from energy_physics import PUE_VALUES, UTILIZATION, estimate_energy_mwh
+from dc_classifier import RULES_VERSION, classify_dc_type
 warnings.filterwarnings('ignore')
 
 
-# ============================================================
-# ENERGY CONSTANTS (Based on industry data)
-# ============================================================
-
-HOURS_PER_YEAR = 8760
-
-# PUE (Power Usage Effectiveness) by data center type
-PUE_VALUES = {
-    'hyperscale': 1.10,      # Google, AWS, Meta - very efficient
-    'enterprise': 1.40,      # Typical enterprise DCs
-    'colocation': 1.50,      # Colocation facilities
-    'legacy': 1.80,          # Older data centers
-    'default': 1.40,         # Industry average
-}
-
-# IT load utilization rates
-UTILIZATION = {
-    'hyperscale': 0.70,      # Better optimization
-    'enterprise': 0.60,
-    'colocation': 0.55,
-    'default': 0.65,
-}
-
-
 class FinalEnergyModel:
     def __init__(self, data_dir='data'):
         self.data_dir = data_dir
@@ -52,38 +30,9 @@ class FinalEnergyModel:
         
     def load_data(self):
         """Load data center specifications"""
-        self.dc_data = pd.read_csv(f'{self.data_dir}/datacenter_specs.csv')
-        self.dc_data['year_operational'] = pd.to_numeric(
-            self.dc_data['year_operational'], errors='coerce'
-        )
-        self.dc_data['capacity_mw'] = pd.to_numeric(
-            self.dc_data['capacity_mw'], errors='coerce'
-        )
+        self.dc_data = load_processed('datacenter_specs')
         return self.dc_data
     
-    def classify_dc_type(self, row):
-        """Classify data center type based on name/capacity"""
-        name = str(row.get('data_center_name', '')).lower()
-        capacity = row.get('capacity_mw', 0) or 0
-        
-        # Hyperscale indicators
-        hyperscale_keywords = ['google', 'amazon', 'aws', 'meta', 'facebook', 
-                               'microsoft', 'azure', 'apple']
-        if any(kw in name for kw in hyperscale_keywords) or capacity >= 50:
-            return 'hyperscale'
-        
-        # Colocation indicators
-        colo_keywords = ['equinix', 'digital realty', 'cyrusone', 'coresite', 
-                        'qts', 'switch', 'colocation', 'colo']
-        if any(kw in name for kw in colo_keywords):
-            return 'colocation'
-        
-        # Enterprise
-        if capacity >= 10:
-            return 'enterprise'
-        
-        return 'default'
-    
     def estimate_energy_physics(self, capacity_mw, dc_type='default', year=2024):
         """
         Physics-based energy estimation
@@ -98,17 +47,8 @@ class FinalEnergyModel:
         Returns:
             Annual energy consumption in MWh
         """
-        pue = PUE_VALUES.get(dc_type, PUE_VALUES['default'])
-        utilization = UTILIZATION.get(dc_type, UTILIZATION['default'])
-        
-        # Efficiency improvements over time (1% per year improvement in PUE)
-        if year and year > 2010:
-            years_improvement = min(year - 2010, 14)  # Cap at 14 years
-            pue *= (0.99 ** years_improvement)
-        
-        energy_mwh = capacity_mw * HOURS_PER_YEAR * utilization * pue
-        
-        return energy_mwh
+        # Shared vectorized formula (energy_physics); scalars or arrays
+        return estimate_energy_mwh(capacity_mw, dc_type, year)
     
     def estimate_all_datacenters(self):
         """Estimate energy for all data centers"""
@@ -122,16 +62,12 @@ class FinalEnergyModel:
         df['capacity_mw_est'] = df['capacity_mw'].fillna(state_median).fillna(overall_median).fillna(10)
         
         # Classify DC type
-        df['dc_type'] = df.apply(self.classify_dc_type, axis=1)
-        
-        # Estimate energy
-        df['estimated_energy_mwh'] = df.apply(
-            lambda row: self.estimate_energy_physics(
-                row['capacity_mw_est'],
-                row['dc_type'],
-                row['year_operational'] if pd.notna(row['year_operational']) else 2020
-            ),
-            axis=1
+        df['dc_type'] = classify_dc_type(df['data_center_name'], df['capacity_mw'])
+        df['rules_version'] = RULES_VERSION
+        
+        # Estimate energy (whole columns at once; unknown years count as 2020)
+        df['estimated_energy_mwh'] = estimate_energy_mwh(
+            df['capacity_mw_est'], df['dc_type'], df['year_operational'], default_year=2020
         )
         
         # Calculate energy per MW
@@ -296,6 +232,7 @@ class FinalEnergyModel:
         joblib.dump({
             'pue_values': PUE_VALUES,
             'utilization': UTILIZATION,
+            'rules_version': RULES_VERSION,
         }, model_file)
         print(f"Model parameters saved to {model_file}")
     
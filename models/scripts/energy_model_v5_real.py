@@ -15,72 +15,28 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import r2_score, mean_absolute_error
 import joblib
 import warnings
+from processed_data import load_processed
+from energy_physics import estimate_energy_mwh
+from dc_classifier import RULES_VERSION, classify_dc_type
 warnings.filterwarnings('ignore')
 
 
-# Physics constants
-HOURS_PER_YEAR = 8760
-PUE_VALUES = {
-    'hyperscale': 1.10,
-    'enterprise': 1.40,
-    'colocation': 1.50,
-    'default': 1.40,
-}
-UTILIZATION = {
-    'hyperscale': 0.70,
-    'enterprise': 0.60,
-    'colocation': 0.55,
-    'default': 0.65,
-}
-
-
 def load_data():
     """Load real EIA data and data center specs"""
     # Load real EIA data
-    eia = pd.read_csv('data/eia_state_electricity_real.csv')
+    eia = load_processed('eia_state_electricity_real')
     print(f"Loaded EIA data: {len(eia)} records, years {eia['year'].min()}-{eia['year'].max()}")
     
     # Load data center specs
-    dc = pd.read_csv('data/datacenter_specs.csv')
-    dc['year_operational'] = pd.to_numeric(dc['year_operational'], errors='coerce')
-    dc['capacity_mw'] = pd.to_numeric(dc['capacity_mw'], errors='coerce')
+    dc = load_processed('datacenter_specs')
     print(f"Loaded DC data: {len(dc)} data centers")
     
     return eia, dc
 
 
-def classify_dc_type(row):
-    """Classify data center type based on name/capacity"""
-    name = str(row.get('data_center_name', '')).lower()
-    capacity = row.get('capacity_mw', 0) or 0
-    
-    hyperscale_keywords = ['google', 'amazon', 'aws', 'meta', 'facebook', 
-                           'microsoft', 'azure', 'apple']
-    if any(kw in name for kw in hyperscale_keywords) or capacity >= 50:
-        return 'hyperscale'
-    
-    colo_keywords = ['equinix', 'digital realty', 'cyrusone', 'coresite', 
-                    'qts', 'switch', 'colocation', 'colo']
-    if any(kw in name for kw in colo_keywords):
-        return 'colocation'
-    
-    if capacity >= 10:
-        return 'enterprise'
-    
-    return 'default'
-
-
 def estimate_dc_energy(capacity_mw, dc_type='default', year=None):
-    """Physics-based energy estimation"""
-    pue = PUE_VALUES.get(dc_type, PUE_VALUES['default'])
-    utilization = UTILIZATION.get(dc_type, UTILIZATION['default'])
-    
-    # Efficiency improvements over time
-    if year and year > 2010:
-        years_improvement = min(year - 2010, 14)
-        pue *= (0.99 ** years_improvement)
-    
-    return capacity_mw * HOURS_PER_YEAR * utilization * pue
+    """Physics-based energy estimation (energy_physics; scalars or arrays)"""
+    return estimate_energy_mwh(capacity_mw, dc_type, year)
 
 
 def prepare_training_data(eia, dc):
@@ -93,16 +49,12 @@ def prepare_training_data(eia, dc):
     dc['capacity_mw_est'] = dc['capacity_mw'].fillna(state_median).fillna(overall_median).fillna(10)
     
     # Classify DC type
-    dc['dc_type'] = dc.apply(classify_dc_type, axis=1)
-    
-    # Estimate energy for each DC
-    dc['estimated_energy_mwh'] = dc.apply(
-        lambda row: estimate_dc_energy(
-            row['capacity_mw_est'],
-            row['dc_type'],
-            row['year_operational'] if pd.notna(row['year_operational']) else 2015
-        ),
-        axis=1
+    dc['dc_type'] = classify_dc_type(dc['data_center_name'], dc['capacity_mw'])
+    dc['rules_version'] = RULES_VERSION
+    
+    # Estimate energy for each DC (unknown years count as 2015)
+    dc['estimated_energy_mwh'] = estimate_energy_mwh(
+        dc['capacity_mw_est'], dc['dc_type'], dc['year_operational'], default_year=2015
     )
     
     # Aggregate DC stats by state and year
@@ -306,7 +258,7 @@ def save_results(data, dc, model, scaler):
     print(f"Saved DC estimates to data/datacenter_energy_estimates_v5.csv")
     
     # Save model
-    joblib.dump({'model': model, 'scaler': scaler}, 'models/energy_model_v5_real.joblib')
+    joblib.dump({'model': model, 'scaler': scaler, 'rules_version': RULES_VERSION}, 'models/energy_model_v5_real.joblib')
     print(f"Saved model to models/energy_model_v5_real.joblib")
 
 
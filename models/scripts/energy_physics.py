@@ -0,0 +1,126 @@
+"""
+Physics-based data center energy estimate, vectorized
+
+The energy models each computed
+
+    Energy (MWh/yr) = Capacity (MW) x 8760 h x Utilization x PUE
+
+one facility at a time with DataFrame.apply, looking utilization and PUE
+up by facility type. Here the formula runs over whole arrays:
+
+- lookup() maps an array of types to table values with one dict lookup per
+  distinct type (unknown / missing types get the 'default' entry).
+  Categorical types skip the factorize step, which dominates on millions
+  of string types.
+- efficiency_factor() is the PUE improvement for newer facilities (1% per
+  year after 2010, at most 14 years), 1 where the year is unknown
+- estimate_energy_mwh() takes arrays (or scalars) of capacity, type and
+  year and returns MWh in one pass. Models with their own PUE /
+  utilization tables pass them in; ai_datacenter_model passes a flat
+  MWh-per-MW table instead.
+
+Results match the per-row versions exactly (same operations, same order).
+
+Usage:
+    python energy_physics.py bench [--n 5000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+HOURS_PER_YEAR = 8760
+
+# PUE (Power Usage Effectiveness) by data center type
+PUE_VALUES = {
+    'hyperscale': 1.10,      # Google, AWS, Meta - very efficient
+    'enterprise': 1.40,      # Typical enterprise DCs
+    'colocation': 1.50,      # Colocation facilities
+    'legacy': 1.80,          # Older data centers
+    'default': 1.40,         # Industry average
+}
+
+# IT load utilization rates
+UTILIZATION = {
+    'hyperscale': 0.70,      # Better optimization
+    'enterprise': 0.60,
+    'colocation': 0.55,
+    'default': 0.65,
+}
+
+# Efficiency improvements over time (1% per year improvement in PUE)
+EFFICIENCY_BASE_YEAR = 2010
+EFFICIENCY_GAIN = 0.99
+MAX_EFFICIENCY_YEARS = 14
+
+
+def _factorize(keys):
+    # Integer codes (-1 for missing) and distinct keys; categoricals reuse their codes
+    if isinstance(keys, pd.Series) and isinstance(keys.dtype, pd.CategoricalDtype):
+        keys = keys.array
+    if isinstance(keys, pd.Categorical):
+        return keys.codes, keys.categories
+    return pd.factorize(np.asarray(keys, dtype=object))
+
+
+def lookup(keys, table, default='default', factorized=None):
+    """table[key] for each key (table[default] for unknown or missing keys)"""
+    if np.ndim(keys) == 0:
+        return float(table.get(keys, table[default]))
+    codes, uniques = factorized if factorized is not None else _factorize(keys)
+    values = np.array([table.get(key, table[default]) for key in uniques] + [table[default]], dtype=float)
+    return values[codes]
+
+
+def efficiency_factor(years, default_year=None):
+    """PUE multiplier for facilities built in the given years"""
+    years = np.asarray(years, dtype=float)
+    if default_year is not None:
+        years = np.where(np.isnan(years), default_year, years)
+    improvement = np.where(years > EFFICIENCY_BASE_YEAR,
+                           np.minimum(years - EFFICIENCY_BASE_YEAR, MAX_EFFICIENCY_YEARS), 0)
+    # Python's pow per distinct value, so factors match the per-row code to the bit
+    distinct, inverse = np.unique(improvement, return_inverse=True)
+    return np.array([EFFICIENCY_GAIN ** value for value in distinct.tolist()])[inverse]
+
+
+def estimate_energy_mwh(capacity_mw, dc_type='default', year=None, default_year=None,
+                        pue=PUE_VALUES, utilization=UTILIZATION, mwh_per_mw=None, default='default'):
+    """
+    Annual energy (MWh) for arrays of capacity, type and year.
+
+    year=None skips the efficiency factor; missing years use default_year
+    (or no factor if that is None too). mwh_per_mw, a type -> MWh/MW table,
+    replaces the PUE x utilization formula. Unknown types use the tables'
+    default entry.
+    """
+    capacity = np.asarray(capacity_mw, dtype=float)
+    factorized = _factorize(dc_type) if np.ndim(dc_type) else None
+    if mwh_per_mw is not None:
+        energy = capacity * lookup(dc_type, mwh_per_mw, default, factorized)
+    else:
+        pue_used = lookup(dc_type, pue, default, factorized)
+        if year is not None:
+            pue_used = pue_used * efficiency_factor(year, default_year)
+        energy = capacity * HOURS_PER_YEAR * lookup(dc_type, utilization, default, factorized) * pue_used
+    return float(energy) if np.ndim(energy) == 0 else energy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Vectorized physics energy estimate')
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--n', type=int, default=5_000_000, help='synthetic facilities')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    capacity = rng.lognormal(2.5, 1.2, args.n)
+    types = pd.Categorical.from_codes(rng.integers(0, len(PUE_VALUES), args.n), list(PUE_VALUES))
+    years = np.where(rng.random(args.n) < 0.3, np.nan, rng.integers(1995, 2026, args.n))
+
+    start = time.time()
+    energy = estimate_energy_mwh(capacity, types, years, default_year=2020)
+    elapsed = time.time() - start
+    print(f"   {args.n:,} facilities in {elapsed:.2f}s ({args.n / elapsed / 1e6:.1f}M/s), "
+          f"{energy.sum() / 1e6:,.0f} TWh total")
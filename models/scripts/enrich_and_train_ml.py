@@ -13,9 +13,14 @@ from sklearn.linear_model import Ridge, Lasso
 from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
-import requests
 import warnings
 import os
+from processed_data import load_processed
+from energy_physics import estimate_energy_mwh, lookup
+from dc_classifier import RULES_VERSION, classify_enrich_type, lower_text
+from eia_api import fetch_retail_sales, fetch_retail_sales_many
+from geography import STATE_ABBREV
+from model_suite import train_suite
 
 warnings.filterwarnings('ignore')
 
@@ -163,135 +168,118 @@ STATE_DC_BOOM_YEARS = {
     'new york': 2015,
 }
 
+# Operator -> name keywords and researched sites, in the order they are checked
+OPERATOR_DC_DATES = {
+    'google': (['google'], GOOGLE_DC_DATES),
+    'meta': (['meta', 'facebook'], META_DC_DATES),
+    'microsoft': (['microsoft', 'azure'], MICROSOFT_DC_DATES),
+    'aws': (['amazon', 'aws'], AWS_DC_DATES),
+    'crypto': (None, CRYPTO_MINING_DATES),   # classify_datacenter() == 'crypto'
+}
+
 
 def classify_datacenter(name, city):
-    """Classify datacenter by type based on name and city."""
-    name_lower = (name or '').lower()
-    city_lower = (city or '').lower()
-    combined = f"{name_lower} {city_lower}"
-    
-    crypto_keywords = ['bitcoin', 'btc', 'mining', 'cleanspark', 'riot', 'marathon', 
-                       'hut 8', 'core scientific', 'bitdeer', 'cipher', 'stronghold', 
-                       'greenidge', 'argo', 'compute north', 'compass', 'blockfusion',
-                       'terawulf', 'bitfarms', 'hive', 'iris energy']
-    
-    ai_keywords = ['google', 'meta', 'facebook', 'microsoft', 'azure', 'amazon', 'aws',
-                   'nvidia', 'openai', 'anthropic', 'ai', 'machine learning', 'gpu',
-                   'oracle', 'ibm', 'equinix', 'digital realty', 'cyrusone', 'qts']
-    
-    if any(kw in combined for kw in crypto_keywords):
-        return 'crypto'
-    elif any(kw in combined for kw in ai_keywords):
-        return 'ai'
-    else:
-        return 'general'
+    """Classify datacenter by type based on name and city (rules in dc_classifier)."""
+    return classify_enrich_type(name or '', city or '')
+
+
+def build_year_index():
+    """
+    Researched sites as one table (operator, state_key, place, year), with
+    rank = the order estimate_operational_year checked them in.
+    """
+    rows = [(operator, state_key, place, year)
+            for operator, (_, sites) in OPERATOR_DC_DATES.items()
+            for state_key, places in sites.items()
+            for place, year in places.items()]
+    index = pd.DataFrame(rows, columns=['operator', 'state_key', 'place', 'year'])
+    index['rank'] = np.arange(len(index))
+    return index
+
+
+def _state_keys(states, keys):
+    # (state, state_key) pairs where the key occurs in the state, in key order
+    return pd.DataFrame([(state, key) for state in pd.unique(states) for key in keys if key in state],
+                        columns=['state', 'state_key'])
+
+
+def resolve_operational_years(df):
+    """
+    Estimated operational year of each row of df, with its provenance:
+
+    - year_source: 'google' / 'meta' / 'microsoft' / 'aws' / 'crypto'
+      (researched site), 'crypto_default', 'state_boom' or 'default'
+    - year_match: the matched site or state key
+
+    Same results as checking each row against the tables in turn: the rows
+    are joined to the sites of their state and operator, and the first
+    site (by rank) whose place occurs in the name or city wins.
+    """
+    names = lower_text(df['data_center_name'])
+    cities = lower_text(df['city'])
+    states = np.array([state.replace(' ', '-') for state in lower_text(df['state'])], dtype=object)
+    rows = pd.DataFrame({'row': np.arange(len(df)), 'state': states})
+
+    operators = {operator: pd.Series(names).str.contains('|'.join(keywords), regex=True).to_numpy()
+                 for operator, (keywords, _) in OPERATOR_DC_DATES.items() if keywords}
+    operators['crypto'] = classify_enrich_type(names, cities) == 'crypto'
+
+    index = build_year_index()
+    candidates = (rows.merge(_state_keys(states, index['state_key'].unique()), on='state')
+                  .merge(index, on='state_key'))
+    flags = pd.DataFrame(operators)
+    candidates = candidates[flags.to_numpy()[candidates['row'], flags.columns.get_indexer(candidates['operator'])]]
+    found = np.array([place in cities[row] or place in names[row]
+                      for place, row in zip(candidates['place'], candidates['row'])], dtype=bool)
+    hits = candidates[found].sort_values('rank').drop_duplicates('row').set_index('row')
+
+    # Fallbacks first, each overridden by the next: state boom year, crypto default, site
+    year = np.full(len(df), 2018)
+    source = np.full(len(df), 'default', dtype=object)
+    match = np.full(len(df), None, dtype=object)
+    boom = _state_keys(states, list(STATE_DC_BOOM_YEARS)).drop_duplicates('state').set_index('state')['state_key']
+    boom_keys = pd.Series(states).map(boom).to_numpy(dtype=object)
+    has_boom = pd.notna(boom_keys)
+    year[has_boom] = [STATE_DC_BOOM_YEARS[key] for key in boom_keys[has_boom]]
+    source[has_boom] = 'state_boom'
+    match[has_boom] = boom_keys[has_boom]
+
+    crypto = operators['crypto']
+    year[crypto] = 2022
+    source[crypto] = 'crypto_default'
+    match[crypto] = None
+
+    year[hits.index] = hits['year']
+    source[hits.index] = hits['operator']
+    match[hits.index] = hits['place']
+    return pd.DataFrame({'year': year, 'year_source': source, 'year_match': match}, index=df.index)
 
 
 def estimate_operational_year(row):
     """Estimate operational year based on researched data."""
-    name = str(row.get('data_center_name', '')).lower()
-    city = str(row.get('city', '')).lower() 
-    state = str(row.get('state', '')).lower().replace(' ', '-')
-    
-    # Try to match specific data center catalogs
-    
-    # Check Google
-    if 'google' in name:
-        for state_key, locations in GOOGLE_DC_DATES.items():
-            if state_key in state:
-                for loc, year in locations.items():
-                    if loc in city or loc in name:
-                        return year
-    
-    # Check Meta/Facebook
-    if 'meta' in name or 'facebook' in name:
-        for state_key, locations in META_DC_DATES.items():
-            if state_key in state:
-                for loc, year in locations.items():
-                    if loc in city or loc in name:
-                        return year
-    
-    # Check Microsoft
-    if 'microsoft' in name or 'azure' in name:
-        for state_key, locations in MICROSOFT_DC_DATES.items():
-            if state_key in state:
-                for loc, year in locations.items():
-                    if loc in city or loc in name:
-                        return year
-    
-    # Check AWS
-    if 'amazon' in name or 'aws' in name:
-        for state_key, locations in AWS_DC_DATES.items():
-            if state_key in state:
-                for loc, year in locations.items():
-                    if loc in city or loc in name:
-                        return year
-    
-    # Check crypto mining
-    dc_type = classify_datacenter(name, city)
-    if dc_type == 'crypto':
-        for state_key, locations in CRYPTO_MINING_DATES.items():
-            if state_key in state:
-                for loc, year in locations.items():
-                    if loc in city or loc in name:
-                        return year
-        # Default crypto mining estimate (most are recent)
-        return 2022
-    
-    # Fall back to state boom year
-    for state_key, year in STATE_DC_BOOM_YEARS.items():
-        if state_key in state:
-            return year
-    
-    # Default: assume within last 10 years
-    return 2018
+    return int(resolve_operational_years(pd.DataFrame([row]))['year'].iloc[0])
+
+
+def _sales_gwh(records):
+    # Sales is in million kWh, convert to GWh for easier interpretation
+    return {int(r['period']): float(r['sales']) / 1000 
+            for r in records if r.get('sales')}
 
 
 def get_eia_electricity_data(state_abbr):
-    """Fetch electricity sales data from EIA API (retail-sales endpoint)."""
-    url = "https://api.eia.gov/v2/electricity/retail-sales/data/"
-    params = {
-        'api_key': EIA_API_KEY,
-        'frequency': 'annual',
-        'data[0]': 'sales',
-        'facets[stateid][]': state_abbr,
-        'facets[sectorid][]': 'ALL',  # All sectors combined
-        'start': '2001',
-        'end': '2024',
-        'sort[0][column]': 'period',
-        'sort[0][direction]': 'asc'
-    }
-    
+    """Fetch electricity sales data from EIA API (retail-sales endpoint, cached by eia_api)."""
     try:
-        response = requests.get(url, params=params, timeout=30)
-        if response.status_code == 200:
-            data = response.json()
-            records = data.get('response', {}).get('data', [])
-            # Sales is in million kWh, convert to GWh for easier interpretation
-            return {int(r['period']): float(r['sales']) / 1000 
-                    for r in records if r.get('sales')}
+        return _sales_gwh(fetch_retail_sales(state_abbr, 2001, 2024, api_key=EIA_API_KEY))
     except Exception as e:
         print(f"Error fetching EIA data for {state_abbr}: {e}")
     
     return {}
 
 
-# State abbreviations mapping (Title Case -> Abbreviation)
-STATE_ABBRS = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR',
-    'California': 'CA', 'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE',
-    'Florida': 'FL', 'Georgia': 'GA', 'Hawaii': 'HI', 'Idaho': 'ID',
-    'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA', 'Kansas': 'KS',
-    'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS',
-    'Missouri': 'MO', 'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV',
-    'New Hampshire': 'NH', 'New Jersey': 'NJ', 'New Mexico': 'NM', 'New York': 'NY',
-    'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH', 'Oklahoma': 'OK',
-    'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
-    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT',
-    'Vermont': 'VT', 'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV',
-    'Wisconsin': 'WI', 'Wyoming': 'WY', 'District of Columbia': 'DC'
-}
+def get_eia_electricity_data_many(state_abbrs):
+    """get_eia_electricity_data for several states, fetched concurrently."""
+    results = fetch_retail_sales_many(state_abbrs, 2001, 2024, api_key=EIA_API_KEY)
+    return {abbr: _sales_gwh(results.get(abbr, [])) for abbr in state_abbrs}
 
 
 def enrich_dataset():
@@ -301,7 +289,7 @@ def enrich_dataset():
     print("=" * 60)
     
     # Load the original dataset
-    df = pd.read_csv('/Users/diggy/Documents/env-forecasting/env_forecasting/data/datacenter_specs.csv')
+    df = load_processed('datacenter_specs')
     print(f"Loaded {len(df)} data centers")
     
     # Check existing operational years
@@ -309,21 +297,21 @@ def enrich_dataset():
     print(f"Already have operational year: {has_year.sum()}")
     print(f"Missing operational year: {(~has_year).sum()}")
     
-    # Enrich missing years
-    enriched_count = 0
-    for idx, row in df.iterrows():
-        if pd.isna(row['year_operational']) or row['year_operational'] == 0:
-            estimated_year = estimate_operational_year(row)
-            df.at[idx, 'year_operational'] = estimated_year
-            enriched_count += 1
+    # Enrich missing years (one join against the researched sites)
+    missing = df['year_operational'].isna() | (df['year_operational'] == 0)
+    estimated = resolve_operational_years(df[missing])
+    df.loc[missing, 'year_operational'] = estimated['year']
+    df['year_source'] = 'reported'
+    df.loc[missing, 'year_source'] = estimated['year_source']
+    enriched_count = missing.sum()
     
     print(f"Enriched {enriched_count} data centers with estimated operational years")
+    for source, count in estimated['year_source'].value_counts().items():
+        print(f"  {source}: {count}")
     
     # Add datacenter type classification
-    df['dc_type'] = df.apply(lambda r: classify_datacenter(
-        str(r.get('data_center_name', '')), 
-        str(r.get('city', ''))
-    ), axis=1)
+    df['dc_type'] = classify_enrich_type(df['data_center_name'], df['city'])
+    df['rules_version'] = RULES_VERSION
     
     type_counts = df['dc_type'].value_counts()
     print(f"\nData center types:")
@@ -338,6 +326,136 @@ def enrich_dataset():
     return df
 
 
+# Capacity (MW) when unknown, PUE and utilization by dc_type
+TYPE_CAPACITY_MW = {
+    'crypto': 50,    # Crypto facilities are power-hungry
+    'ai': 80,        # AI/hyperscale are large
+    'default': 12,   # Average general DC
+}
+TYPE_PUE = {'crypto': 1.10, 'ai': 1.15, 'default': 1.50}
+TYPE_UTILIZATION = {'crypto': 0.95, 'ai': 0.70, 'default': 0.55}
+
+# State-year panel: years emitted and lag depths of cumulative MW
+PANEL_YEARS = range(2005, 2024)
+LAG_DEPTHS = (1, 2)
+
+
+def build_state_year_panel(state_year_capacity, years=PANEL_YEARS, lags=LAG_DEPTHS):
+    """
+    Cumulative / new DC features per state-year joined with EIA electricity.
+    state_year_capacity has one row per (state, year operational).
+    
+    Capacity is binned on a year grid reaching max(lags) years before the
+    first panel year (earlier years fold into the first column) and summed
+    cumulatively along it, so lags and new-this-year values are column
+    offsets. Rows are kept where the state has an abbreviation and EIA data
+    for the year and the year before. years may be in any order; the panel
+    has each year once, ascending.
+    """
+    years = sorted(set(years))
+    depth = max(lags, default=0)
+    grid = np.arange(years[0] - max(depth, 1), years[-1] + 1)
+    
+    sy = state_year_capacity[state_year_capacity['year'] <= grid[-1]]
+    sy = sy.assign(year=sy['year'].clip(lower=grid[0]))
+    measures = ['total_mw', 'dc_count', 'total_energy_twh', 'ai_dc_count']
+    states = pd.Index(state_year_capacity['state'].unique())
+    
+    # state x grid year, per measure: amount added that year and cumulative
+    new = {}
+    cum = {}
+    for measure in measures:
+        wide = sy.pivot_table(index='state', columns='year', values=measure, aggfunc='sum', fill_value=0)
+        wide = wide.reindex(index=states, columns=grid, fill_value=0)
+        new[measure] = wide
+        cum[measure] = wide.cumsum(axis=1)
+    
+    # Electricity per state (GWh), one batch fetch for all states
+    state_abbrs = {state: STATE_ABBREV[state] for state in states if STATE_ABBREV.get(state)}
+    elec_data = get_eia_electricity_data_many(list(state_abbrs.values()))
+    elec_rows = [(state, state_abbr, year, gwh)
+                 for state, state_abbr in state_abbrs.items()
+                 for year, gwh in elec_data[state_abbr].items()]
+    elec = pd.DataFrame(elec_rows, columns=['state', 'state_abbr', 'year', 'electricity_gwh'])
+    
+    prev = elec[['state', 'year', 'electricity_gwh']].assign(year=elec['year'] + 1)
+    panel = pd.DataFrame({'state': states.repeat(len(years)), 'year': np.tile(years, len(states))})
+    panel = panel.merge(elec, on=['state', 'year'])
+    panel = panel.merge(prev.rename(columns={'electricity_gwh': 'electricity_prev_gwh'}), on=['state', 'year'])
+    
+    # Row/column positions of each panel row in the state x grid arrays
+    row = states.get_indexer(panel['state'])
+    col = panel['year'].to_numpy() - grid[0]
+    
+    def at(frame, offset=0):
+        return frame.to_numpy()[row, col - offset]
+    
+    cum_mw = at(cum['total_mw'])
+    cum_count = at(cum['dc_count'])
+    cum_energy_twh = at(cum['total_energy_twh'])
+    cum_ai_count = at(cum['ai_dc_count'])
+    new_energy_twh = at(new['total_energy_twh'])
+    elec_current = panel['electricity_gwh'].to_numpy()
+    elec_prev = panel['electricity_prev_gwh'].to_numpy()
+    elec_change = elec_current - elec_prev
+    population = panel['state'].map(STATE_POPULATION).fillna(5.0).to_numpy()
+    gdp = panel['state'].map(STATE_GDP).fillna(300).to_numpy()
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # DC energy as % of state electricity (key signal feature!)
+        dc_share_pct = np.where(elec_current > 0, cum_energy_twh * 1000 / elec_current * 100, 0)
+        # New DC energy as % of electricity change, capped at 100%
+        # (avoid division by tiny numbers)
+        new_dc_share = np.where(np.abs(elec_change) > 0.1,
+                                np.minimum(new_energy_twh * 1000 / np.abs(elec_change) * 100, 100), 0)
+        elec_pct_change = np.where(elec_prev > 0, elec_change / elec_prev * 100, 0)
+        ai_ratio = np.where(cum_count > 0, cum_ai_count / cum_count, 0)
+    
+    features = {
+        'state': panel['state'],
+        'state_abbr': panel['state_abbr'],
+        'year': panel['year'],
+        # Core features
+        'cumulative_dc_mw': cum_mw,
+        'cumulative_dc_count': cum_count,
+        'new_dc_mw': at(new['total_mw']),
+        'new_dc_count': at(new['dc_count']),
+        # Energy features (physics-based estimates)
+        'cumulative_dc_energy_twh': cum_energy_twh,
+        'new_dc_energy_twh': new_energy_twh,
+        # Share features (THE KEY SIGNAL!)
+        'dc_share_of_state_pct': dc_share_pct,
+        'new_dc_share_of_change_pct': new_dc_share,
+        # AI-specific
+        'cumulative_ai_count': cum_ai_count,
+        'ai_ratio': ai_ratio,
+    }
+    # Lagged features
+    for lag in lags:
+        features[f'cumulative_dc_mw_lag{lag}'] = at(cum['total_mw'], lag)
+    features.update({
+        'dc_growth_mw': cum_mw - at(cum['total_mw'], 1),
+        # State electricity
+        'electricity_gwh': elec_current,
+        'electricity_change_gwh': elec_change,
+        'electricity_pct_change': elec_pct_change,
+        # Log transforms for non-linear relationships
+        'log_dc_mw': np.log1p(cum_mw),
+        'log_elec_gwh': np.log1p(elec_current),
+        # CONFOUNDING CONTROLS: Population & GDP
+        'population_millions': population,
+        'gdp_billions': gdp,
+        # Per-capita metrics (ISOLATES TRUE DC EFFECT!)
+        'dc_per_million_pop': cum_count / population,
+        'dc_mw_per_million_pop': cum_mw / population,
+        'dc_per_billion_gdp': cum_count / gdp,
+        'elec_per_capita_mwh': elec_current * 1000 / (population * 1e6),  # MWh/person
+        # RESIDUALIZED: DC intensity relative to expected for state size
+        'dc_intensity': cum_mw / (gdp / 100),  # MW per $100B GDP
+    })
+    return pd.DataFrame(features)
+
+
 def build_feature_dataset(df):
     """Build dataset for ML training: aggregate DC capacity by state-year with enhanced features."""
     print("\n" + "=" * 60)
@@ -345,34 +463,15 @@ def build_feature_dataset(df):
     print("=" * 60)
     
     # Better capacity estimates based on type and physics
-    def estimate_capacity(row):
-        if pd.notna(row.get('capacity_mw')) and row['capacity_mw'] > 0:
-            return row['capacity_mw']
-        # Estimate based on type - using realistic values
-        dc_type = row.get('dc_type', 'general')
-        if dc_type == 'crypto':
-            return 50  # Crypto facilities are power-hungry
-        elif dc_type == 'ai':
-            return 80  # AI/hyperscale are large
-        else:
-            return 12  # Average general DC
-    
-    df['estimated_capacity_mw'] = df.apply(estimate_capacity, axis=1)
-    
-    # Calculate estimated energy using physics formula
+    dc_types = df['dc_type'] if 'dc_type' in df.columns else 'general'
+    type_capacity = lookup(dc_types, TYPE_CAPACITY_MW)
+    df['estimated_capacity_mw'] = df['capacity_mw'].where(df['capacity_mw'] > 0, type_capacity)
+    
+    # Calculate estimated energy using physics formula (energy_physics)
     # Energy (TWh/yr) = Capacity (MW) × 8760 hrs × Utilization × PUE / 1,000,000
-    def estimate_annual_energy(row):
-        cap = row['estimated_capacity_mw']
-        dc_type = row.get('dc_type', 'general')
-        if dc_type == 'crypto':
-            util, pue = 0.95, 1.10
-        elif dc_type == 'ai':
-            util, pue = 0.70, 1.15
-        else:
-            util, pue = 0.55, 1.50
-        return cap * 8760 * util * pue / 1_000_000  # TWh
-    
-    df['estimated_energy_twh'] = df.apply(estimate_annual_energy, axis=1)
+    df['estimated_energy_twh'] = estimate_energy_mwh(
+        df['estimated_capacity_mw'], dc_types, pue=TYPE_PUE, utilization=TYPE_UTILIZATION
+    ) / 1_000_000
     
     # Aggregate by state and year
     state_year_capacity = df.groupby(['state', 'year_operational']).agg({
@@ -386,101 +485,7 @@ def build_feature_dataset(df):
     
     print("Building cumulative capacity features with enhanced engineering...")
     
-    records = []
-    states = state_year_capacity['state'].unique()
-    
-    for state in states:
-        state_data = state_year_capacity[state_year_capacity['state'] == state]
-        state_abbr = STATE_ABBRS.get(state, None)
-        
-        if not state_abbr:
-            continue
-        
-        # Get electricity data for state
-        elec_data = get_eia_electricity_data(state_abbr)
-        
-        if not elec_data:
-            continue
-        
-        # Calculate cumulative DC capacity by year
-        for year in range(2005, 2024):
-            # Cumulative capacity up to this year
-            mask = state_data['year'] <= year
-            cum_mw = state_data.loc[mask, 'total_mw'].sum()
-            cum_count = state_data.loc[mask, 'dc_count'].sum()
-            cum_energy_twh = state_data.loc[mask, 'total_energy_twh'].sum()
-            cum_ai_count = state_data.loc[mask, 'ai_dc_count'].sum()
-            
-            # New capacity this year
-            new_this_year = state_data[state_data['year'] == year]
-            new_mw = new_this_year['total_mw'].sum() if len(new_this_year) > 0 else 0
-            new_count = new_this_year['dc_count'].sum() if len(new_this_year) > 0 else 0
-            new_energy_twh = new_this_year['total_energy_twh'].sum() if len(new_this_year) > 0 else 0
-            
-            # Lagged features (t-1, t-2)
-            mask_lag1 = state_data['year'] <= (year - 1)
-            mask_lag2 = state_data['year'] <= (year - 2)
-            cum_mw_lag1 = state_data.loc[mask_lag1, 'total_mw'].sum()
-            cum_mw_lag2 = state_data.loc[mask_lag2, 'total_mw'].sum()
-            
-            # Electricity data
-            if year in elec_data and (year - 1) in elec_data:
-                elec_current = elec_data[year]  # GWh
-                elec_prev = elec_data[year - 1]
-                elec_change = elec_current - elec_prev
-                elec_pct_change = (elec_change / elec_prev * 100) if elec_prev > 0 else 0
-                
-                # DC energy as % of state electricity (key signal feature!)
-                dc_share_pct = (cum_energy_twh * 1000 / elec_current * 100) if elec_current > 0 else 0
-                
-                # New DC energy as % of electricity change
-                new_dc_share = 0
-                if abs(elec_change) > 0.1:  # Avoid division by tiny numbers
-                    new_dc_share = (new_energy_twh * 1000 / abs(elec_change) * 100)
-                    new_dc_share = min(new_dc_share, 100)  # Cap at 100%
-                
-                records.append({
-                    'state': state,
-                    'state_abbr': state_abbr,
-                    'year': year,
-                    # Core features
-                    'cumulative_dc_mw': cum_mw,
-                    'cumulative_dc_count': cum_count,
-                    'new_dc_mw': new_mw,
-                    'new_dc_count': new_count,
-                    # Energy features (physics-based estimates)
-                    'cumulative_dc_energy_twh': cum_energy_twh,
-                    'new_dc_energy_twh': new_energy_twh,
-                    # Share features (THE KEY SIGNAL!)
-                    'dc_share_of_state_pct': dc_share_pct,
-                    'new_dc_share_of_change_pct': new_dc_share,
-                    # AI-specific
-                    'cumulative_ai_count': cum_ai_count,
-                    'ai_ratio': cum_ai_count / cum_count if cum_count > 0 else 0,
-                    # Lagged features
-                    'cumulative_dc_mw_lag1': cum_mw_lag1,
-                    'cumulative_dc_mw_lag2': cum_mw_lag2,
-                    'dc_growth_mw': cum_mw - cum_mw_lag1,
-                    # State electricity 
-                    'electricity_gwh': elec_current,
-                    'electricity_change_gwh': elec_change,
-                    'electricity_pct_change': elec_pct_change,
-                    # Log transforms for non-linear relationships
-                    'log_dc_mw': np.log1p(cum_mw),
-                    'log_elec_gwh': np.log1p(elec_current),
-                    # CONFOUNDING CONTROLS: Population & GDP
-                    'population_millions': STATE_POPULATION.get(state, 5.0),
-                    'gdp_billions': STATE_GDP.get(state, 300),
-                    # Per-capita metrics (ISOLATES TRUE DC EFFECT!)
-                    'dc_per_million_pop': cum_count / STATE_POPULATION.get(state, 5.0),
-                    'dc_mw_per_million_pop': cum_mw / STATE_POPULATION.get(state, 5.0),
-                    'dc_per_billion_gdp': cum_count / STATE_GDP.get(state, 300),
-                    'elec_per_capita_mwh': elec_current * 1000 / (STATE_POPULATION.get(state, 5.0) * 1e6),  # MWh/person
-                    # RESIDUALIZED: DC intensity relative to expected for state size
-                    'dc_intensity': cum_mw / (STATE_GDP.get(state, 300) / 100),  # MW per $100B GDP
-                })
-    
-    feature_df = pd.DataFrame(records)
+    feature_df = build_state_year_panel(state_year_capacity)
     print(f"Built feature dataset with {len(feature_df)} state-year observations")
     print(f"States included: {feature_df['state'].nunique()}")
     print(f"Years: {feature_df['year'].min()} to {feature_df['year'].max()}")
@@ -679,35 +684,28 @@ def _train_model_suite(X, y, feature_cols, label):
         ),
     }
     
+    # All models x 5 CV folds fitted at once (model_suite)
+    suite = train_suite(models, X_train, y_train, X_test, y_test, X_scaled, y, cv=5)
+    
     results = {}
     
-    for name, model in models.items():
-        model.fit(X_train, y_train)
-        
-        train_pred = model.predict(X_train)
-        test_pred = model.predict(X_test)
-        
-        train_r2 = r2_score(y_train, train_pred)
-        test_r2 = r2_score(y_test, test_pred)
-        test_mae = mean_absolute_error(y_test, test_pred)
-        test_rmse = np.sqrt(mean_squared_error(y_test, test_pred))
-        
-        cv_scores = cross_val_score(model, X_scaled, y, cv=5, scoring='r2')
+    for name, row in suite.iterrows():
+        model = row['model']
         
         results[name] = {
             'model': model,
-            'train_r2': train_r2,
-            'test_r2': test_r2,
-            'test_mae': test_mae,
-            'test_rmse': test_rmse,
-            'cv_mean': cv_scores.mean(),
-            'cv_std': cv_scores.std(),
+            'train_r2': row['train_r2'],
+            'test_r2': row['test_r2'],
+            'test_mae': row['test_mae'],
+            'test_rmse': row['test_rmse'],
+            'cv_mean': row['cv_r2_mean'],
+            'cv_std': row['cv_r2_std'],
         }
         
         print(f"\n  {name}:")
-        print(f"    Train R²: {train_r2:.4f}")
-        print(f"    Test R²:  {test_r2:.4f}")
-        print(f"    CV R² (5-fold): {cv_scores.mean():.4f} ± {cv_scores.std():.4f}")
+        print(f"    Train R²: {row['train_r2']:.4f}")
+        print(f"    Test R²:  {row['test_r2']:.4f}")
+        print(f"    CV R² (5-fold): {row['cv_r2_mean']:.4f} ± {row['cv_r2_std']:.4f}")
         
         if hasattr(model, 'feature_importances_'):
             importances = dict(zip(feature_cols, model.feature_importances_))
@@ -0,0 +1,135 @@
+"""
+State / balancing authority lookups shared by the models
+
+ba_level_predictor, ba_multiyear_predictor, granular_predictor and
+enrich_and_train_ml each kept their own copy of these tables, and granular
+used a different state -> BA table from the other two. They are defined
+once here:
+
+- STATE_ABBREV (name -> code), STATE_TO_BA (code -> primary BA),
+  STATE_REGION (code -> Census region)
+- state_abbrev(), state_ba() and state_region() map a whole column at a
+  time. Each distinct value is looked up once (memoized) and broadcast back
+  by category code, so the cost is per state, not per row.
+- They return plain string columns by default, as .apply / .map would.
+  categorical=True returns categoricals over the fixed STATE_CODES /
+  BA_CODES / REGIONS categories (groupbys on those need observed=True to
+  skip empty groups).
+"""
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# State name to abbreviation
+STATE_ABBREV = {
+    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
+    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
+    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
+    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
+    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO',
+    'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
+    'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH',
+    'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
+    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
+    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY',
+    'District of Columbia': 'DC'
+}
+ABBREV_STATE = {v: k for k, v in STATE_ABBREV.items()}
+
+# Comprehensive state -> BA mapping
+# Each state is assigned to its primary BA (some states span multiple)
+STATE_TO_BA = {
+    # PJM territory (Mid-Atlantic)
+    'VA': 'PJM', 'MD': 'PJM', 'DE': 'PJM', 'NJ': 'PJM', 'PA': 'PJM',
+    'DC': 'PJM', 'WV': 'PJM', 'OH': 'PJM',
+
+    # ERCOT (Texas)
+    'TX': 'ERCO',
+
+    # CAISO (California)
+    'CA': 'CISO',
+
+    # MISO (Midwest)
+    'IL': 'MISO', 'IN': 'MISO', 'IA': 'MISO', 'MI': 'MISO', 'MN': 'MISO',
+    'MO': 'MISO', 'WI': 'MISO', 'ND': 'MISO', 'SD': 'MISO', 'MT': 'MISO',
+    'LA': 'MISO', 'MS': 'MISO', 'AR': 'MISO',
+
+    # NYISO (New York)
+    'NY': 'NYIS',
+
+    # ISO-NE (New England)
+    'CT': 'ISNE', 'MA': 'ISNE', 'ME': 'ISNE', 'NH': 'ISNE', 'RI': 'ISNE', 'VT': 'ISNE',
+
+    # Southern Company (Southeast)
+    'GA': 'SOCO', 'AL': 'SOCO',
+
+    # Florida
+    'FL': 'FPL',
+
+    # Duke (Carolinas)
+    'NC': 'DUK', 'SC': 'DUK',
+
+    # SPP (Plains)
+    'KS': 'SWPP', 'NE': 'SWPP', 'OK': 'SWPP', 'NM': 'SWPP',
+
+    # TVA (Tennessee Valley)
+    'TN': 'TVA', 'KY': 'TVA',
+
+    # Western
+    'WA': 'BPAT', 'OR': 'BPAT', 'ID': 'BPAT',
+    'NV': 'NEVP',
+    'AZ': 'APS',
+    'UT': 'PACE', 'WY': 'PACE',
+    'CO': 'PSCO',
+
+    # Others
+    'HI': 'HECO', 'AK': 'OTHER'
+}
+
+# Census regions
+STATE_REGION = {
+    **dict.fromkeys(['CT', 'ME', 'MA', 'NH', 'RI', 'VT', 'NJ', 'NY', 'PA'], 'Northeast'),
+    **dict.fromkeys(['IL', 'IN', 'MI', 'OH', 'WI', 'IA', 'KS', 'MN', 'MO', 'NE', 'ND', 'SD'], 'Midwest'),
+    **dict.fromkeys(['DE', 'DC', 'FL', 'GA', 'MD', 'NC', 'SC', 'VA', 'WV', 'AL', 'KY', 'MS',
+                     'TN', 'AR', 'LA', 'OK', 'TX'], 'South'),
+    **dict.fromkeys(['AZ', 'CO', 'ID', 'MT', 'NV', 'NM', 'UT', 'WY', 'AK', 'CA', 'HI', 'OR', 'WA'], 'West'),
+}
+
+STATE_CODES = pd.CategoricalDtype(sorted(ABBREV_STATE))
+BA_CODES = pd.CategoricalDtype(sorted(set(STATE_TO_BA.values())))
+REGIONS = pd.CategoricalDtype(['Northeast', 'Midwest', 'South', 'West'])
+
+
+@lru_cache(maxsize=None)
+def abbrev_of(state):
+    """Two-letter code for a state name or code (None if unknown)"""
+    state = str(state).strip()
+    if len(state) == 2:
+        return state.upper()
+    return STATE_ABBREV.get(state, None)
+
+
+def _map_distinct(values, lookup, dtype, categorical):
+    # lookup runs once per distinct value; rows get the result by category code
+    values = pd.Series(values)
+    cat = pd.Categorical(values)
+    mapped = np.array([lookup(v) for v in cat.categories] + [None], dtype=object)
+    result = pd.Series(mapped[cat.codes], index=values.index)
+    return result.astype(dtype) if categorical else result
+
+
+def state_abbrev(states, categorical=False):
+    """State names or codes -> two-letter codes (missing where unknown)"""
+    return _map_distinct(states, abbrev_of, STATE_CODES, categorical)
+
+
+def state_ba(abbrevs, default='OTHER', categorical=False):
+    """Two-letter codes -> primary BA (default where unknown)"""
+    return _map_distinct(abbrevs, lambda code: STATE_TO_BA.get(code, default), BA_CODES, categorical).fillna(default)
+
+
+def state_region(abbrevs, categorical=False):
+    """Two-letter codes -> Census region (missing where unknown)"""
+    return _map_distinct(abbrevs, STATE_REGION.get, REGIONS, categorical)
@@ -21,6 +21,11 @@ from sklearn.model_selection import train_test_split, cross_val_score
 from sklearn.metrics import r2_score, mean_absolute_error, mean_squared_error
 from sklearn.neural_network import MLPRegressor
 import warnings
+from eia_store import eia_sheet_names
+from eia_layout import load_eia_sheet
+from geography import state_abbrev
+from ba_assignment import assign_bas, summarize
+from dc_hubs import assign_hubs, hub_features_by
 warnings.filterwarnings('ignore')
 
 # Paths
@@ -30,22 +35,6 @@ EIA_DIR = DATA_DIR / "eia" / "2024"
 OUTPUT_DIR = DATA_DIR / "outputs"
 OUTPUT_DIR.mkdir(exist_ok=True)
 
-# State abbreviation mapping
-STATE_ABBREV = {
-    'Alabama': 'AL', 'Alaska': 'AK', 'Arizona': 'AZ', 'Arkansas': 'AR', 'California': 'CA',
-    'Colorado': 'CO', 'Connecticut': 'CT', 'Delaware': 'DE', 'Florida': 'FL', 'Georgia': 'GA',
-    'Hawaii': 'HI', 'Idaho': 'ID', 'Illinois': 'IL', 'Indiana': 'IN', 'Iowa': 'IA',
-    'Kansas': 'KS', 'Kentucky': 'KY', 'Louisiana': 'LA', 'Maine': 'ME', 'Maryland': 'MD',
-    'Massachusetts': 'MA', 'Michigan': 'MI', 'Minnesota': 'MN', 'Mississippi': 'MS', 'Missouri': 'MO',
-    'Montana': 'MT', 'Nebraska': 'NE', 'Nevada': 'NV', 'New Hampshire': 'NH', 'New Jersey': 'NJ',
-    'New Mexico': 'NM', 'New York': 'NY', 'North Carolina': 'NC', 'North Dakota': 'ND', 'Ohio': 'OH',
-    'Oklahoma': 'OK', 'Oregon': 'OR', 'Pennsylvania': 'PA', 'Rhode Island': 'RI', 'South Carolina': 'SC',
-    'South Dakota': 'SD', 'Tennessee': 'TN', 'Texas': 'TX', 'Utah': 'UT', 'Vermont': 'VT',
-    'Virginia': 'VA', 'Washington': 'WA', 'West Virginia': 'WV', 'Wisconsin': 'WI', 'Wyoming': 'WY',
-    'District of Columbia': 'DC'
-}
-STATE_ABBREV_REV = {v: k for k, v in STATE_ABBREV.items()}
-
 
 def load_eia_sales_data():
     """Load and parse EIA-861 Sales to Ultimate Customers data."""
@@ -56,62 +45,16 @@ def load_eia_sales_data():
         raise FileNotFoundError(f"Sales file not found: {sales_file}")
     
     # Read all sheets to find the data
-    xl = pd.ExcelFile(sales_file)
-    print(f"   Available sheets: {xl.sheet_names}")
-    
-    # Read with header on row 1 (skip the title row)
-    df = pd.read_excel(sales_file, sheet_name='States', header=1)
-    
-    # Rename columns based on the actual structure seen
-    column_mapping = {
-        'Data Year': 'year',
-        'Utility Number': 'utility_id',
-        'Utility Name': 'utility_name', 
-        'Part': 'part',
-        'Service Type': 'service_type',
-        'Data Type\nO = Observed\nI = Imputed': 'data_type',
-        'State': 'state',
-        'Ownership': 'ownership',
-        'BA Code': 'ba_code',
-        'Revenues': 'residential_revenue',
-        'Sales': 'residential_sales_mwh',
-        'Customers': 'residential_customers',
-        'Revenues.1': 'commercial_revenue',
-        'Sales.1': 'commercial_sales_mwh',
-        'Customers.1': 'commercial_customers',
-        'Revenues.2': 'industrial_revenue',
-        'Sales.2': 'industrial_sales_mwh',
-        'Customers.2': 'industrial_customers',
-        'Revenues.3': 'transport_revenue',
-        'Sales.3': 'transport_sales_mwh',
-        'Customers.3': 'transport_customers',
-        'Revenues.4': 'total_revenue',
-        'Sales.4': 'total_sales_mwh',
-        'Customers.4': 'total_customers'
-    }
+    print(f"   Available sheets: {eia_sheet_names(sales_file)}")
     
-    # Try to rename based on position if headers don't match
-    if len(df.columns) >= 24:
-        df.columns = [
-            'year', 'utility_id', 'utility_name', 'part', 'service_type', 
-            'data_type', 'state', 'ownership', 'ba_code',
-            'residential_revenue', 'residential_sales_mwh', 'residential_customers',
-            'commercial_revenue', 'commercial_sales_mwh', 'commercial_customers',
-            'industrial_revenue', 'industrial_sales_mwh', 'industrial_customers',
-            'transport_revenue', 'transport_sales_mwh', 'transport_customers',
-            'total_revenue', 'total_sales_mwh', 'total_customers'
-        ][:len(df.columns)]
-    
-    # Convert numeric columns
-    numeric_cols = ['residential_sales_mwh', 'commercial_sales_mwh', 
-                    'industrial_sales_mwh', 'transport_sales_mwh', 'total_sales_mwh']
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-    
-    # Filter out header rows that got included as data
-    if 'year' in df.columns:
-        df = df[pd.to_numeric(df['year'], errors='coerce').notna()]
+    # Columns are found from the header rows (eia_layout); unused revenue
+    # and customer columns aren't loaded
+    df = load_eia_sheet(sales_file, 'Sales_Ult_Cust', [
+        'year', 'utility_id', 'utility_name', 'part', 'service_type', 'data_type',
+        'state', 'ownership', 'ba_code',
+        'residential_sales_mwh', 'commercial_sales_mwh', 'industrial_sales_mwh',
+        'transport_sales_mwh', 'total_sales_mwh', 'total_customers'
+    ])
     
     print(f"   Loaded {len(df)} utility records")
     print(f"   Columns: {list(df.columns)}")
@@ -132,7 +75,7 @@ def load_service_territory():
     if not territory_file.exists():
         raise FileNotFoundError(f"Territory file not found: {territory_file}")
     
-    df = pd.read_excel(territory_file, sheet_name=0)
+    df = load_eia_sheet(territory_file, 'Service_Territory')
     print(f"   Loaded {len(df)} utility-county mappings")
     print(f"   Columns: {list(df.columns)}")
     
@@ -147,7 +90,7 @@ def load_balancing_authority():
     if not ba_file.exists():
         raise FileNotFoundError(f"BA file not found: {ba_file}")
     
-    df = pd.read_excel(ba_file, sheet_name=0)
+    df = load_eia_sheet(ba_file, 'Balancing_Authority')
     print(f"   Loaded {len(df)} BA records")
     print(f"   Columns: {list(df.columns)}")
     
@@ -182,114 +125,6 @@ def load_datacenter_data():
     raise FileNotFoundError("No data center file found")
 
 
-def extract_county_from_address(address, city, state):
-    """
-    Extract or infer county from data center address/city.
-    This is a simplified geocoding approach.
-    """
-    # Handle NaN values
-    if pd.isna(city) or pd.isna(state):
-        return None
-    
-    city = str(city)
-    state = str(state)
-    
-    # Major DC hubs and their counties
-    dc_hub_counties = {
-        # Virginia - Data Center Alley
-        ('ashburn', 'VA'): 'Loudoun',
-        ('sterling', 'VA'): 'Loudoun',
-        ('leesburg', 'VA'): 'Loudoun',
-        ('manassas', 'VA'): 'Prince William',
-        ('reston', 'VA'): 'Fairfax',
-        ('herndon', 'VA'): 'Fairfax',
-        ('chantilly', 'VA'): 'Fairfax',
-        ('richmond', 'VA'): 'Richmond City',
-        
-        # Texas - Major hubs
-        ('dallas', 'TX'): 'Dallas',
-        ('fort worth', 'TX'): 'Tarrant',
-        ('austin', 'TX'): 'Travis',
-        ('houston', 'TX'): 'Harris',
-        ('san antonio', 'TX'): 'Bexar',
-        ('rockdale', 'TX'): 'Milam',
-        ('corsicana', 'TX'): 'Navarro',
-        ('midlothian', 'TX'): 'Ellis',
-        
-        # Arizona
-        ('phoenix', 'AZ'): 'Maricopa',
-        ('mesa', 'AZ'): 'Maricopa',
-        ('chandler', 'AZ'): 'Maricopa',
-        ('goodyear', 'AZ'): 'Maricopa',
-        
-        # California
-        ('san jose', 'CA'): 'Santa Clara',
-        ('santa clara', 'CA'): 'Santa Clara',
-        ('fremont', 'CA'): 'Alameda',
-        ('los angeles', 'CA'): 'Los Angeles',
-        ('irvine', 'CA'): 'Orange',
-        ('el segundo', 'CA'): 'Los Angeles',
-        
-        # Georgia
-        ('atlanta', 'GA'): 'Fulton',
-        ('douglasville', 'GA'): 'Douglas',
-        
-        # Ohio
-        ('columbus', 'OH'): 'Franklin',
-        ('new albany', 'OH'): 'Franklin',
-        
-        # Illinois
-        ('chicago', 'IL'): 'Cook',
-        ('dekalb', 'IL'): 'DeKalb',
-        
-        # Nevada
-        ('las vegas', 'NV'): 'Clark',
-        ('henderson', 'NV'): 'Clark',
-        ('reno', 'NV'): 'Washoe',
-        
-        # Oregon
-        ('portland', 'OR'): 'Multnomah',
-        ('hillsboro', 'OR'): 'Washington',
-        ('prineville', 'OR'): 'Crook',
-        ('the dalles', 'OR'): 'Wasco',
-        
-        # Washington
-        ('seattle', 'WA'): 'King',
-        ('quincy', 'WA'): 'Grant',
-        ('moses lake', 'WA'): 'Grant',
-        
-        # New Jersey
-        ('newark', 'NJ'): 'Essex',
-        ('secaucus', 'NJ'): 'Hudson',
-        ('piscataway', 'NJ'): 'Middlesex',
-        
-        # New York
-        ('new york', 'NY'): 'New York',
-        ('buffalo', 'NY'): 'Erie',
-        
-        # North Carolina
-        ('charlotte', 'NC'): 'Mecklenburg',
-        ('durham', 'NC'): 'Durham',
-        ('raleigh', 'NC'): 'Wake',
-        
-        # Others
-        ('denver', 'CO'): 'Denver',
-        ('salt lake city', 'UT'): 'Salt Lake',
-        ('omaha', 'NE'): 'Douglas',
-        ('des moines', 'IA'): 'Polk',
-    }
-    
-    if city and state:
-        city_lower = city.lower().strip()
-        state_upper = state.upper().strip()
-        lookup_key = (city_lower, state_upper)
-        
-        if lookup_key in dc_hub_counties:
-            return dc_hub_counties[lookup_key]
-    
-    return None
-
-
 def aggregate_by_balancing_authority(sales_df):
     """
     Aggregate sales data by balancing authority.
@@ -332,23 +167,9 @@ def aggregate_by_county(sales_df, territory_df):
     """
     print("\n🏘️  Aggregating by County...")
     
-    # First get utility-level sales
-    utility_col = None
-    for col in sales_df.columns:
-        if 'utility' in col.lower() and ('id' in col.lower() or 'number' in col.lower() or 'name' in col.lower()):
-            utility_col = col
-            break
-    
-    if utility_col is None:
-        print("   ⚠️  No utility column found")
-        return None
-    
-    # Find state column in sales
-    state_col = None
-    for col in sales_df.columns:
-        if col.upper() == 'STATE' or 'state' in col.lower():
-            state_col = col
-            break
+    # Utility and state columns (named by eia_layout)
+    utility_col = 'utility_id'
+    state_col = 'state'
     
     # Merge with territory
     # Territory should have utility_id -> county mapping
@@ -364,38 +185,6 @@ def create_ba_dc_features(dc_df, ba_df):
     """
     print("\n🔗 Mapping Data Centers to Balancing Authorities...")
     
-    # Major BAs and their primary states/regions
-    ba_state_mapping = {
-        'ERCO': ['TX'],  # ERCOT - Texas
-        'PJM': ['VA', 'MD', 'PA', 'NJ', 'DE', 'OH', 'WV', 'NC', 'DC', 'IL', 'IN', 'KY', 'MI'],
-        'MISO': ['IL', 'IN', 'IA', 'KY', 'LA', 'MI', 'MN', 'MO', 'MS', 'MT', 'ND', 'SD', 'TX', 'WI', 'AR'],
-        'CISO': ['CA'],  # CAISO - California
-        'NYIS': ['NY'],  # NYISO - New York
-        'ISNE': ['CT', 'MA', 'ME', 'NH', 'RI', 'VT'],  # ISO New England
-        'SWPP': ['KS', 'NE', 'OK', 'NM', 'TX'],  # SPP
-        'BPAT': ['WA', 'OR', 'ID', 'MT'],  # Bonneville Power
-        'PACE': ['UT', 'WY'],  # PacifiCorp East
-        'PACW': ['OR', 'WA'],  # PacifiCorp West
-        'NEVP': ['NV'],  # Nevada Power
-        'SRP': ['AZ'],  # Salt River Project
-        'APS': ['AZ'],  # Arizona Public Service
-        'PSCO': ['CO'],  # Public Service of Colorado
-        'WACM': ['CO', 'WY', 'NE', 'SD'],  # Western Area Colorado Missouri
-        'FPL': ['FL'],  # Florida Power & Light
-        'DUK': ['NC', 'SC'],  # Duke Energy Carolinas
-        'SC': ['SC'],  # South Carolina
-        'SOCO': ['GA', 'AL', 'MS'],  # Southern Company
-        'TVA': ['TN', 'KY', 'AL', 'MS', 'GA', 'NC', 'VA'],  # Tennessee Valley Authority
-    }
-    
-    # Invert mapping for state -> BA lookup
-    state_to_ba = {}
-    for ba, states in ba_state_mapping.items():
-        for state in states:
-            if state not in state_to_ba:
-                state_to_ba[state] = []
-            state_to_ba[state].append(ba)
-    
     # Map DCs to BAs
     dc_df = dc_df.copy()
     
@@ -410,26 +199,10 @@ def create_ba_dc_features(dc_df, ba_df):
         print("   ⚠️  No state column in DC data")
         return None
     
-    # Extract state abbreviation
-    def get_state_abbrev(state_val):
-        if pd.isna(state_val):
-            return None
-        state_str = str(state_val).strip()
-        if len(state_str) == 2:
-            return state_str.upper()
-        # Try full name
-        return STATE_ABBREV.get(state_str, None)
-    
-    dc_df['state_abbrev'] = dc_df[state_col].apply(get_state_abbrev)
-    
-    # Assign primary BA
-    def assign_ba(state):
-        if pd.isna(state):
-            return 'OTHER'
-        bas = state_to_ba.get(state, ['OTHER'])
-        return bas[0]  # Primary BA
-    
-    dc_df['ba_code'] = dc_df['state_abbrev'].apply(assign_ba)
+    # Utility territory -> BA, same engine as the BA-level models
+    assignments = assign_bas(dc_df, state_col=state_col)
+    dc_df[assignments.columns] = assignments
+    summarize(assignments)
     
     # Get capacity column
     capacity_col = None
@@ -500,14 +273,8 @@ def create_county_level_model(dc_df, territory_df, sales_df):
     
     # Map DCs to counties
     dc_df = dc_df.copy()
-    dc_df['county'] = dc_df.apply(
-        lambda row: extract_county_from_address(
-            row.get('address', ''),
-            row.get(city_col, ''),
-            row.get(state_col, '')
-        ),
-        axis=1
-    )
+    # Boundaries (by coordinates) where available, else hub cities / municipal utilities
+    dc_df['county'] = assign_bas(dc_df, state_col=state_col)['county']
     
     mapped_count = dc_df['county'].notna().sum()
     print(f"   Mapped {mapped_count}/{len(dc_df)} DCs to counties")
@@ -528,28 +295,10 @@ def create_state_utility_features(sales_df, dc_df):
     """
     print("\n📈 Creating State-Level Features from Utility Data...")
     
-    # Find relevant columns
-    state_col = utility_col = sales_col = None
-    for col in sales_df.columns:
-        col_lower = col.lower()
-        if col_lower == 'state' or 'state' in col_lower:
-            state_col = col
-        if 'utility' in col_lower and ('id' in col_lower or 'number' in col_lower):
-            utility_col = col
-        if 'total' in col_lower and ('sales' in col_lower or 'mwh' in col_lower):
-            sales_col = col
-    
-    print(f"   State col: {state_col}")
-    print(f"   Utility col: {utility_col}")
-    print(f"   Sales col: {sales_col}")
-    
-    if not sales_col:
-        # Try to find any MWh column
-        for col in sales_df.columns:
-            if 'mwh' in col.lower():
-                sales_col = col
-                print(f"   Using sales col: {sales_col}")
-                break
+    # Columns named by eia_layout
+    state_col = 'state'
+    utility_col = 'utility_id'
+    sales_col = 'total_sales_mwh'
     
     if state_col and sales_col:
         # Aggregate by state
@@ -686,15 +435,7 @@ def main():
         
         if state_col:
             # Extract state abbrev
-            def get_abbrev(s):
-                if pd.isna(s):
-                    return None
-                s = str(s).strip()
-                if len(s) == 2:
-                    return s.upper()
-                return STATE_ABBREV.get(s, s)
-            
-            dc_df['state_abbrev'] = dc_df[state_col].apply(get_abbrev)
+            dc_df['state_abbrev'] = state_abbrev(dc_df[state_col])
             
             # Aggregate DC features by state
             dc_state_features = dc_df.groupby('state_abbrev').size().reset_index(name='dc_count')
@@ -713,6 +454,10 @@ def main():
                 cap_agg.columns = ['state', 'dc_capacity_mw']
                 dc_state_features = dc_state_features.merge(cap_agg, on='state', how='left')
             
+            # Hub concentration per state (dc_hubs)
+            hub_features = hub_features_by(assign_hubs(dc_df), 'state_abbrev').rename(columns={'state_abbrev': 'state'})
+            dc_state_features = dc_state_features.merge(hub_features, on='state', how='left')
+            
             print("\n   DC State Features:")
             print(dc_state_features.sort_values('dc_count', ascending=False).head(10))
             
@@ -0,0 +1,137 @@
+"""
+Shared training harness for the model suites
+
+enrich_and_train_ml._train_model_suite, ba_level_predictor.train_ba_model,
+ba_multiyear_predictor.train_multiyear_model and energy_model_v2.train_model
+each fit their candidate models one after another and then ran
+cross_val_score on each, re-splitting the data every time. train_suite()
+does that work once for all models:
+
+- The CV splits are computed once (the same KFold / TimeSeriesSplit folds
+  cross_val_score used) and shared by every model. The callers pass in
+  matrices they have already scaled.
+- Each (model, fold) fit, and each model's fit on the training split, is
+  a separate job. All of them run at once in a joblib process pool
+  (loky). Arrays over MAX_NBYTES are memory-mapped to the workers instead
+  of copied, and pre_dispatch bounds how many jobs are queued, so memory
+  stays flat as models are added. With enough cores, the suite takes
+  about as long as its slowest single fit.
+- Every model is a fresh clone with its own random_state, so the
+  scores match the serial fit + cross_val_score code.
+
+The result is one DataFrame indexed by model name, with columns model,
+train_r2, test_r2, test_mae, test_rmse, cv_r2_mean, cv_r2_std and
+fit_seconds (the model's fitting time over all its jobs). SUITE_N_JOBS
+sets the pool size (default: all cores).
+
+Usage:
+    python model_suite.py bench [--samples 1000]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import check_cv
+
+N_JOBS = int(os.environ.get('SUITE_N_JOBS', -1))
+
+# Arrays larger than this are memory-mapped to the workers rather than pickled
+MAX_NBYTES = '1M'
+
+
+def _fit(model, X, y, train, test):
+    # One job: fit a clone on the train rows, then the fitted model (test=None)
+    # or its R² on the test rows
+    start = time.time()
+    model = clone(model).fit(X[train], y[train])
+    if test is None:
+        return model, time.time() - start
+    return r2_score(y[test], model.predict(X[test])), time.time() - start
+
+
+def train_suite(models, X_train, y_train, X_test, y_test, X_cv=None, y_cv=None, cv=5, n_jobs=None):
+    """
+    Fit each model on (X_train, y_train), score it on (X_test, y_test), and
+    cross-validate it on (X_cv, y_cv) (default: the training split) with cv
+    (an int = KFold, or a splitter). Returns one row per model.
+    """
+    if X_cv is None:
+        X_cv, y_cv = X_train, y_train
+    X_train, y_train = np.asarray(X_train), np.asarray(y_train)
+    X_cv, y_cv = np.asarray(X_cv), np.asarray(y_cv)
+    folds = list(check_cv(cv, y_cv).split(X_cv, y_cv))
+    everything = np.arange(len(X_train))
+
+    jobs = [(name, None) for name in models] + [(name, i) for name in models for i in range(len(folds))]
+    n_jobs = N_JOBS if n_jobs is None else n_jobs
+    outputs = Parallel(n_jobs=n_jobs, max_nbytes=MAX_NBYTES, pre_dispatch='2*n_jobs')(
+        delayed(_fit)(models[name], X_train, y_train, everything, None) if fold is None else
+        delayed(_fit)(models[name], X_cv, y_cv, *folds[fold])
+        for name, fold in jobs
+    )
+
+    rows = {name: {'cv_scores': [], 'fit_seconds': 0.0} for name in models}
+    for (name, fold), (output, seconds) in zip(jobs, outputs):
+        rows[name]['fit_seconds'] += seconds
+        if fold is None:
+            rows[name]['model'] = output
+        else:
+            rows[name]['cv_scores'].append(output)
+
+    for name, row in rows.items():
+        model = row['model']
+        train_pred = model.predict(X_train)
+        test_pred = model.predict(X_test)
+        cv_scores = np.array(row.pop('cv_scores'))
+        row.update({
+            'train_r2': r2_score(y_train, train_pred),
+            'test_r2': r2_score(y_test, test_pred),
+            'test_mae': mean_absolute_error(y_test, test_pred),
+            'test_rmse': np.sqrt(mean_squared_error(y_test, test_pred)),
+            'cv_r2_mean': cv_scores.mean(),
+            'cv_r2_std': cv_scores.std(),
+        })
+
+    columns = ['model', 'train_r2', 'test_r2', 'test_mae', 'test_rmse', 'cv_r2_mean', 'cv_r2_std', 'fit_seconds']
+    return pd.DataFrame.from_dict(rows, orient='index')[columns]
+
+
+if __name__ == "__main__":
+    from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model import Ridge
+    from sklearn.model_selection import cross_val_score, train_test_split
+
+    parser = argparse.ArgumentParser(description='Parallel model-suite training')
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--samples', type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(args.samples, 10))
+    y = X @ rng.normal(size=10) + rng.normal(size=args.samples)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    models = {
+        'Gradient Boosting': GradientBoostingRegressor(n_estimators=200, max_depth=5, random_state=42),
+        'Random Forest': RandomForestRegressor(n_estimators=200, max_depth=8, random_state=42),
+        'Ridge Regression': Ridge(alpha=1.0),
+    }
+
+    start = time.time()
+    serial = {}
+    for name, model in models.items():
+        model.fit(X_train, y_train)
+        serial[name] = cross_val_score(model, X, y, cv=5, scoring='r2').mean()
+    print(f"   serial fit + cross_val_score: {time.time() - start:.2f}s")
+
+    start = time.time()
+    suite = train_suite(models, X_train, y_train, X_test, y_test, X, y, cv=5)
+    print(f"   train_suite ({os.cpu_count()} cores): {time.time() - start:.2f}s "
+          f"for {suite['fit_seconds'].sum():.2f}s of fitting")
+    for name, row in suite.iterrows():
+        print(f"   {name}: CV R² {row['cv_r2_mean']:.4f} (serial {serial[name]:.4f}), test R² {row['test_r2']:.4f}")
@@ -0,0 +1,198 @@
+"""
+Typed storage for data/processed
+
+The model scripts used to pd.read_csv the processed CSVs and re-coerce
+year_operational / capacity_mw with pd.to_numeric every time. This module
+gives them one loader instead:
+
+- SCHEMAS declares the column types of each processed dataset
+  ('category' for state/type columns, nullable 'Int64' for years and counts,
+  'Float64' for measurements, 'boolean' for flags). Columns not listed keep
+  what pd.read_csv infers.
+- The first load of a dataset parses its CSV once, applies the schema and
+  writes {name}.parquet next to it. Later loads read the Parquet file. It is
+  rebuilt whenever the CSV is newer, so the CSV stays the source of truth.
+- load_processed(name) returns the numpy dtypes the scripts were written
+  against (float64 with NaN, plain string columns), with the same values as
+  the read_csv + to_numeric version (whole-number columns without gaps come
+  back as int64). load_processed(name, typed=True) returns the schema types
+  (categoricals, nullable integers) for code that can use them; categorical
+  groupbys need observed=True to drop empty groups.
+
+Usage:
+    python processed_data.py convert     # (re)build Parquet for every dataset in SCHEMAS
+    python processed_data.py info        # memory per dataset, typed vs plain
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = Path(__file__).parent.parent.parent
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+
+# Scraped data center columns (parsers/parse_specs_to_csv.py)
+DC_SPECS_COLUMNS = {
+    'data_center_id': 'str',
+    'data_center_name': 'str',
+    'state': 'category',
+    'city': 'str',
+    'latitude': 'Float64',
+    'longitude': 'Float64',
+    'year_operational': 'Int64',
+    'capacity_mw': 'Float64',
+    'capacity_sqft': 'Float64',
+}
+
+EIA_STATE_COLUMNS = {
+    'state': 'category',
+    'state_code': 'category',
+    'year': 'Int64',
+    'total_consumption_mwh': 'Float64',
+    'prev_year_consumption': 'Float64',
+    'yoy_change_mwh': 'Float64',
+    'yoy_change_pct': 'Float64',
+}
+
+SCHEMAS = {
+    'datacenter_specs': DC_SPECS_COLUMNS,
+    'datacenter_enriched': {**DC_SPECS_COLUMNS, 'dc_type': 'category', 'year_source': 'category', 'rules_version': 'Int64'},
+    'datacenter_energy_estimates': {
+        **DC_SPECS_COLUMNS,
+        'capacity_mw_est': 'Float64',
+        'dc_type': 'category',
+        'rules_version': 'Int64',
+        'estimated_energy_mwh': 'Float64',
+        'energy_per_mw': 'Float64',
+    },
+    'datacenter_energy_estimates_v5': {
+        **DC_SPECS_COLUMNS,
+        'capacity_mw_est': 'Float64',
+        'dc_type': 'category',
+        'rules_version': 'Int64',
+        'estimated_energy_mwh': 'Float64',
+    },
+    'datacenter_categorized': {
+        **DC_SPECS_COLUMNS,
+        'is_planned': 'boolean',
+        'dc_category': 'category',
+        'rules_version': 'Int64',
+        'capacity_mw_est': 'Float64',
+        'estimated_energy_mwh': 'Float64',
+    },
+    'eia_state_electricity': EIA_STATE_COLUMNS,
+    'eia_state_electricity_real': EIA_STATE_COLUMNS,
+    'eia_real_electricity': {
+        'state': 'category',
+        'year': 'Int64',
+        'consumption_million_mwh': 'Float64',
+        'consumption_mwh': 'Float64',
+        'prev_consumption': 'Float64',
+        'yoy_change_mwh': 'Float64',
+        'yoy_change_pct': 'Float64',
+    },
+    'ml_features': {
+        'state': 'category',
+        'state_abbr': 'category',
+        'year': 'Int64',
+    },
+}
+
+
+def csv_path(name, data_dir=None):
+    return Path(data_dir or PROCESSED_DIR) / f"{name}.csv"
+
+
+def parquet_path(name, data_dir=None):
+    return Path(data_dir or PROCESSED_DIR) / f"{name}.parquet"
+
+
+def apply_schema(df, name):
+    """Cast df's columns to the types SCHEMAS declares for name"""
+    df = df.copy()
+    for col, dtype in SCHEMAS.get(name, {}).items():
+        if col not in df.columns:
+            continue
+        if dtype == 'str':
+            continue
+        if dtype == 'category':
+            df[col] = df[col].astype('category')
+        elif dtype == 'boolean':
+            df[col] = df[col].astype('boolean')
+        else:
+            values = pd.to_numeric(df[col], errors='coerce')
+            if dtype == 'Int64':
+                fractional = values.notna() & (values % 1 != 0)
+                if fractional.any():
+                    raise ValueError(f"{name}.{col}: expected whole numbers, got {values[fractional].iloc[0]}")
+            df[col] = values.astype(dtype)
+    return df
+
+
+def to_numpy_dtypes(df):
+    """
+    Plain dtypes as pd.read_csv + pd.to_numeric would produce them:
+    nullable numbers -> int64/bool when complete, float64/object with NaN
+    otherwise; categoricals -> their values
+    """
+    df = df.copy()
+    for col in df.columns:
+        dtype = df[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(dtype.categories.dtype)
+        elif isinstance(dtype, pd.BooleanDtype):
+            df[col] = df[col].astype(bool) if df[col].notna().all() else df[col].astype(object).where(df[col].notna(), np.nan)
+        elif pd.api.types.is_extension_array_dtype(dtype) and pd.api.types.is_numeric_dtype(dtype):
+            if pd.api.types.is_integer_dtype(dtype) and df[col].notna().all():
+                df[col] = df[col].astype('int64')
+            else:
+                df[col] = df[col].astype('float64')
+    return df
+
+
+def build_parquet(name, data_dir=None):
+    """Parse {name}.csv once, apply its schema and write {name}.parquet"""
+    df = apply_schema(pd.read_csv(csv_path(name, data_dir)), name)
+    df.to_parquet(parquet_path(name, data_dir), index=False)
+    return df
+
+
+def load_processed(name, columns=None, typed=False, data_dir=None):
+    """
+    Load data/processed/{name} through its Parquet copy (rebuilt from the CSV
+    when missing or stale). Returns numpy dtypes unless typed=True.
+    """
+    source = csv_path(name, data_dir)
+    target = parquet_path(name, data_dir)
+
+    if not target.exists() or (source.exists() and source.stat().st_mtime > target.stat().st_mtime):
+        df = build_parquet(name, data_dir)
+        if columns is not None:
+            df = df[columns]
+    else:
+        df = pd.read_parquet(target, columns=columns)
+
+    return df if typed else to_numpy_dtypes(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Typed Parquet storage for data/processed')
+    parser.add_argument('command', choices=['convert', 'info'])
+    args = parser.parse_args()
+
+    for name in SCHEMAS:
+        if not csv_path(name).exists():
+            print(f"   {name}: no CSV, skipped")
+            continue
+
+        if args.command == 'convert':
+            df = build_parquet(name)
+            print(f"   {name}: {len(df)} rows -> {parquet_path(name).name} "
+                  f"({parquet_path(name).stat().st_size / 1024:.0f} KB, CSV {csv_path(name).stat().st_size / 1024:.0f} KB)")
+        else:
+            typed = load_processed(name, typed=True)
+            plain = pd.read_csv(csv_path(name))
+            print(f"   {name}: {len(typed)} rows, {typed.memory_usage(deep=True).sum() / 1e6:.2f} MB typed "
+                  f"vs {plain.memory_usage(deep=True).sum() / 1e6:.2f} MB from CSV")
@@ -0,0 +1,295 @@
+"""
+Point-in-polygon lookup of data centers in county / BA boundaries
+
+datacenter_specs.csv has coordinates for nearly every facility, but counties
+only came from the HUB_COUNTIES city table (about 60 cities). This module
+places facilities by their coordinates instead, offline, in boundary files
+kept under data/geo:
+
+- counties.geojson: Census cartographic boundary counties (properties NAME
+  and STUSPS or STATE_NAME)
+- balancing_authorities.geojson: HIFLD Control Areas (ID = EIA BA id, mapped
+  to a BA code through Balancing_Authority_{year}.xlsx), or any layer with a
+  BA_CODE property
+
+Each file is flattened once into polygon edges bucketed by latitude band
+(BAND_DEG high) and cached as .npz under data/geo/cache, keyed by the
+file's size and mtime. A lookup sorts the points by band and ray-casts each
+band's points against only that band's edges, a block of points at a time
+with numpy. Rings of a feature are tested together with the even-odd rule,
+so holes and multipolygons come out right.
+
+ba_assignment.assign_bas uses these when the facility table has latitude /
+longitude and the files exist, and falls back to the territory lookups
+otherwise. Points in no polygon (offshore, bad coordinates) get no match.
+
+Usage:
+    python spatial_index.py build
+    python spatial_index.py locate [--bench 50000]
+"""
+
+import argparse
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from geography import abbrev_of
+
+BASE_DIR = Path(__file__).parent.parent.parent
+GEO_DIR = BASE_DIR / "data" / "geo"
+GEO_CACHE_DIR = GEO_DIR / "cache"
+
+BOUNDARY_FILES = {
+    'county': GEO_DIR / "counties.geojson",
+    'ba': GEO_DIR / "balancing_authorities.geojson",
+}
+
+# Height of the latitude bands edges are bucketed by (degrees)
+BAND_DEG = 0.05
+
+# Points ray-cast against a band's edges at once (bounds the crossing matrix)
+BLOCK = 256
+
+
+def _rings(geometry):
+    # Outer rings and holes of a Polygon / MultiPolygon, as (n, 2) lon/lat arrays
+    if geometry is None:
+        return []
+    if geometry['type'] == 'Polygon':
+        polygons = [geometry['coordinates']]
+    elif geometry['type'] == 'MultiPolygon':
+        polygons = geometry['coordinates']
+    else:
+        return []
+    return [np.asarray(ring, dtype=float)[:, :2] for polygon in polygons for ring in polygon]
+
+
+class PolygonIndex:
+    """Latitude-band edge index over the features of one boundary layer"""
+
+    def __init__(self, x0, y0, x1, y1, feature, band_start, lat0, properties):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.feature = feature
+        self.band_start = band_start
+        self.lat0 = lat0
+        self.properties = properties
+        # dx/dy of each edge (0 for horizontal edges, which never cross a ray)
+        dy = y1 - y0
+        self.slope = np.divide(x1 - x0, dy, out=np.zeros_like(dy), where=dy != 0)
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path) as f:
+            features = json.load(f)['features']
+
+        edges = []
+        for i, feature in enumerate(features):
+            for ring in _rings(feature.get('geometry')):
+                if len(ring) < 3:
+                    continue
+                closed = ring if np.array_equal(ring[0], ring[-1]) else np.vstack([ring, ring[:1]])
+                edge = np.column_stack([closed[:-1], closed[1:], np.full(len(closed) - 1, i)])
+                edges.append(edge)
+        edges = np.vstack(edges)
+        properties = pd.DataFrame([feature.get('properties') or {} for feature in features])
+        return cls.from_edges(edges, properties)
+
+    @classmethod
+    def from_edges(cls, edges, properties):
+        """edges: (n, 5) array of x0, y0, x1, y1, feature"""
+        x0, y0, x1, y1, feature = edges.T
+        lat0 = np.floor(min(y0.min(), y1.min()) / BAND_DEG) * BAND_DEG
+        first = ((np.minimum(y0, y1) - lat0) // BAND_DEG).astype(np.int64)
+        last = ((np.maximum(y0, y1) - lat0) // BAND_DEG).astype(np.int64)
+
+        # An edge goes in every band its latitude span touches
+        span = last - first + 1
+        rows = np.repeat(np.arange(len(edges)), span)
+        bands = np.repeat(first, span) + (np.arange(len(rows)) - np.repeat(np.cumsum(span) - span, span))
+        order = np.argsort(bands, kind='stable')
+        rows, bands = rows[order], bands[order]
+        band_start = np.searchsorted(bands, np.arange(bands.max() + 2))
+
+        return cls(x0[rows], y0[rows], x1[rows], y1[rows], feature[rows].astype(np.int32),
+                   band_start, lat0, properties)
+
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = path.with_suffix('.tmp.npz')
+        np.savez(tmp_file, x0=self.x0, y0=self.y0, x1=self.x1, y1=self.y1, feature=self.feature,
+                 band_start=self.band_start, lat0=self.lat0,
+                 properties=self.properties.to_json(orient='records'))
+        tmp_file.replace(path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        properties = pd.DataFrame(json.loads(str(data['properties'])))
+        return cls(data['x0'], data['y0'], data['x1'], data['y1'], data['feature'],
+                   data['band_start'], float(data['lat0']), properties)
+
+    def locate(self, lats, lons):
+        """Feature number containing each point (-1 where none)"""
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        result = np.full(len(lats), -1, dtype=np.int64)
+
+        bands = np.floor((lats - self.lat0) / BAND_DEG)
+        valid = np.isfinite(bands) & np.isfinite(lons) & (bands >= 0) & (bands < len(self.band_start) - 1)
+        points = np.flatnonzero(valid)
+        points = points[np.argsort(bands[points], kind='stable')]
+        point_bands = bands[points].astype(np.int64)
+        n_features = len(self.properties)
+
+        for band, start, stop in zip(*_runs(point_bands)):
+            lo, hi = self.band_start[band], self.band_start[band + 1]
+            if lo == hi:
+                continue
+            x0, y0, y1 = self.x0[lo:hi], self.y0[lo:hi], self.y1[lo:hi]
+            slope, feature = self.slope[lo:hi], self.feature[lo:hi]
+
+            for block in range(start, stop, BLOCK):
+                idx = points[block:min(block + BLOCK, stop)]
+                py = lats[idx, None]
+                px = lons[idx, None]
+                # Edge crosses the point's latitude to the east of the point
+                crosses = ((y0 <= py) != (y1 <= py)) & (px < x0 + (py - y0) * slope)
+                pt, edge = np.nonzero(crosses)
+                pairs, counts = np.unique(pt * n_features + feature[edge], return_counts=True)
+                inside = pairs[counts % 2 == 1]
+                # First feature wins where polygons overlap
+                inside = inside[::-1]
+                result[idx[inside // n_features]] = inside % n_features
+
+        return result
+
+
+def _runs(values):
+    # (value, start, stop) of each run in a sorted array
+    if len(values) == 0:
+        return [], [], []
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    stops = np.r_[starts[1:], len(values)]
+    return values[starts], starts, stops
+
+
+def _index_file(path):
+    stat = path.stat()
+    return GEO_CACHE_DIR / f"{path.stem}_{stat.st_size}_{int(stat.st_mtime)}.npz"
+
+
+@lru_cache(maxsize=None)
+def load_index(layer, force=False):
+    """PolygonIndex of a boundary layer ('county' or 'ba'), None if the file is missing"""
+    path = BOUNDARY_FILES[layer]
+    if not path.exists():
+        return None
+    index_file = _index_file(path)
+    if index_file.exists() and not force:
+        return PolygonIndex.load(index_file)
+
+    index = PolygonIndex.from_geojson(path)
+    for stale in GEO_CACHE_DIR.glob(f"{path.stem}_*.npz"):
+        stale.unlink()
+    index.save(index_file)
+    return index
+
+
+def _first_column(properties, names):
+    for name in names:
+        if name in properties.columns:
+            return properties[name]
+    return pd.Series(None, index=properties.index, dtype='str')
+
+
+def _labels(found, labels):
+    # Feature numbers from PolygonIndex.locate -> property values
+    values = labels.to_numpy(dtype=object)
+    return pd.Series(np.where(found >= 0, values[np.maximum(found, 0)], None), dtype='str')
+
+
+def locate_counties(lats, lons):
+    """(county name, state code) of each point, missing outside the boundaries"""
+    index = load_index('county')
+    if index is None:
+        return None
+    found = index.locate(lats, lons)
+    states = _first_column(index.properties, ['STUSPS', 'STATE_NAME']).map(abbrev_of, na_action='ignore')
+    names = _first_column(index.properties, ['NAME', 'NAMELSAD'])
+    return pd.DataFrame({'county': _labels(found, names), 'state_abbrev': _labels(found, states)})
+
+
+@lru_cache(maxsize=None)
+def _ba_codes_by_id(year):
+    from eia_layout import load_eia_sheet
+    from eia_store import eia_workbook
+
+    bas = load_eia_sheet(eia_workbook(year, 'Balancing_Authority'), 'Balancing_Authority', ['ba_id', 'ba_code'])
+    return bas.dropna().drop_duplicates('ba_id').set_index('ba_id')['ba_code']
+
+
+def locate_bas(lats, lons, year=2024):
+    """BA code of each point, missing outside the boundaries"""
+    index = load_index('ba')
+    if index is None:
+        return None
+    codes = _first_column(index.properties, ['BA_CODE', 'ba_code', 'CODE'])
+    if codes.isna().all() and 'ID' in index.properties.columns:
+        codes = pd.to_numeric(index.properties['ID'], errors='coerce').map(_ba_codes_by_id(year))
+    return _labels(index.locate(lats, lons), codes)
+
+
+def attach_coordinates(dc_df, name_col='name', state_col='state', city_col='city'):
+    """dc_df with latitude / longitude from datacenter_specs, matched on name, state and city"""
+    if 'latitude' in dc_df.columns or name_col not in dc_df.columns:
+        return dc_df
+    from processed_data import load_processed
+
+    specs = load_processed('datacenter_specs', columns=['data_center_name', 'state', 'city', 'latitude', 'longitude'])
+    specs = specs.drop_duplicates(['data_center_name', 'state', 'city']).rename(
+        columns={'data_center_name': name_col, 'state': state_col, 'city': city_col})
+    coordinates = dc_df[[name_col, state_col, city_col]].merge(specs, how='left')
+    return dc_df.assign(latitude=coordinates['latitude'].values, longitude=coordinates['longitude'].values)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='County / BA lookup by coordinates')
+    parser.add_argument('command', choices=['build', 'locate'])
+    parser.add_argument('--bench', type=int, default=0, help='also time this many random points')
+    args = parser.parse_args()
+
+    for layer, path in BOUNDARY_FILES.items():
+        if not path.exists():
+            print(f"   {layer}: no boundary file at {path}")
+            continue
+        start = time.time()
+        index = load_index(layer, force=args.command == 'build')
+        print(f"   {layer}: {len(index.properties)} features, {len(index.x0)} banded edges "
+              f"in {time.time() - start:.2f}s")
+
+    if args.command == 'locate':
+        from processed_data import load_processed
+
+        specs = load_processed('datacenter_specs', columns=['latitude', 'longitude'])
+        for layer, locate in [('county', locate_counties), ('ba', locate_bas)]:
+            start = time.time()
+            found = locate(specs['latitude'], specs['longitude'])
+            if found is None:
+                continue
+            labels = found['county'] if layer == 'county' else found
+            print(f"   {layer}: {labels.notna().sum()}/{len(specs)} facilities placed "
+                  f"in {time.time() - start:.3f}s")
+
+            if args.bench:
+                rng = np.random.default_rng(0)
+                lats = rng.uniform(25, 49, args.bench)
+                lons = rng.uniform(-124, -67, args.bench)
+                start = time.time()
+                locate(lats, lons)
+                elapsed = time.time() - start
+                print(f"   {layer}: {args.bench} random points in {elapsed:.2f}s "
+                      f"({args.bench / elapsed:,.0f} points/s)")
@@ -0,0 +1,60 @@
+"""
+Operational date estimation (datacenter_energy_model.estimate_missing_operational_dates)
+
+Usage:
+    python -m pytest models/tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+from datacenter_energy_model import DataCenterEnergyModel
+
+
+def make_model(dc):
+    model = DataCenterEnergyModel(data_dir='unused')
+    model.dc_data = dc
+    model.electricity_data = pd.DataFrame({
+        'state': ['Virginia'] * 3,
+        'year': [2010, 2011, 2012],
+        'total_consumption_mwh': [100.0, 150.0, 160.0],
+    })
+    return model
+
+
+def test_nearest_without_dated_coordinates_falls_back_to_peak_growth():
+    dc = pd.DataFrame({
+        'data_center_id': [1, 2, 3],
+        'data_center_name': ['a', 'b', 'c'],
+        'state': ['Virginia'] * 3,
+        'year_operational': [2005.0, 2015.0, np.nan],
+        'capacity_mw': [10.0, 20.0, np.nan],
+        'latitude': [np.nan, np.nan, 38.9],
+        'longitude': [np.nan, np.nan, -77.4],
+    })
+    estimates = make_model(dc).estimate_missing_operational_dates(method='nearest')
+
+    assert estimates['data_center_id'].tolist() == [3]
+    assert estimates['estimated_year'].tolist() == [2011]
+    assert estimates['method'].tolist() == ['peak_growth']
+    assert estimates['confidence'].tolist() == ['low']
+
+
+def test_nearest_uses_dated_neighbours():
+    dc = pd.DataFrame({
+        'data_center_id': [1, 2, 3],
+        'data_center_name': ['a', 'b', 'c'],
+        'state': ['Virginia'] * 3,
+        'year_operational': [2005.0, 2015.0, np.nan],
+        'capacity_mw': [10.0, 20.0, np.nan],
+        'latitude': [38.8, np.nan, 38.9],
+        'longitude': [-77.3, np.nan, -77.4],
+    })
+    estimates = make_model(dc).estimate_missing_operational_dates(method='nearest')
+
+    assert estimates['estimated_year'].tolist() == [2005]
+    assert estimates['method'].tolist() == ['nearest']
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Streaming CSV output
+Rows are written as the parsers produce them instead of being collected in
+lists first, so memory doesn't grow with the corpus and a crash keeps what
+was already written.
+
+- rows go to {csv_file}.partial, which is renamed over csv_file on close()
+- duplicates can be dropped on a key; the seen-set holds an 8-byte digest
+  per key rather than the key itself
+- every CHECKPOINT_EVERY sources (pages) the file is flushed and
+  {csv_file}.checkpoint records the byte offset and the last source done.
+  Opened with resume=True, the writer truncates the partial file to that
+  offset, rebuilds the seen-set from the rows kept and tells the caller
+  which sources to skip (sources have to come in sorted order, as the
+  page store returns them).
+"""
+
+import csv
+import hashlib
+import json
+import os
+
+# Sources (pages) between checkpoints
+CHECKPOINT_EVERY = 200
+
+
+def _digest(key):
+    # Values as the csv module writes them, so keys read back on resume match
+    text = '\x1f'.join('' if value is None else str(value) for value in key)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+
+class StreamingCSVWriter:
+    """CSV rows written as they come, with optional dedup and resumable checkpoints"""
+
+    def __init__(self, csv_file, header, key_columns=None, checkpoint_every=CHECKPOINT_EVERY, resume=False):
+        self.csv_file = csv_file
+        self.partial_file = csv_file + '.partial'
+        self.checkpoint_file = csv_file + '.checkpoint'
+        self.key_index = [header.index(column) for column in key_columns] if key_columns else None
+        self.checkpoint_every = checkpoint_every
+
+        self.seen = set()
+        self.rows = 0
+        self.duplicates = 0
+        self.sources = 0
+        self.last_source = None
+        self.resumed_rows = 0
+
+        checkpoint = self._load_checkpoint() if resume else None
+        if checkpoint:
+            # Drop anything written after the last checkpoint, then pick up from there
+            os.truncate(self.partial_file, checkpoint['offset'])
+            self.last_source = checkpoint['source']
+            with open(self.partial_file, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.reader(f)
+                next(reader)
+                for row in reader:
+                    self._is_new(row)
+                    self.rows += 1
+            self.resumed_rows = self.rows
+            self.file = open(self.partial_file, 'a', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+        else:
+            self.file = open(self.partial_file, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(header)
+
+    def _load_checkpoint(self):
+        if not (os.path.exists(self.checkpoint_file) and os.path.exists(self.partial_file)):
+            return None
+        with open(self.checkpoint_file, 'r') as f:
+            return json.load(f)
+
+    def _is_new(self, row):
+        if self.key_index is None:
+            return True
+        digest = _digest([row[i] for i in self.key_index])
+        if digest in self.seen:
+            return False
+        self.seen.add(digest)
+        return True
+
+    def done(self, source):
+        """True if source was fully written before the checkpoint being resumed from"""
+        return self.last_source is not None and source <= self.last_source
+
+    def writerow(self, row):
+        """Write row unless its key was seen already; returns True if written"""
+        if not self._is_new(row):
+            self.duplicates += 1
+            return False
+        self.writer.writerow(row)
+        self.rows += 1
+        return True
+
+    def finish_source(self, source):
+        """Mark every row from source (a page path) as written; checkpoints periodically"""
+        self.last_source = source
+        self.sources += 1
+        if self.sources % self.checkpoint_every == 0:
+            self.checkpoint()
+
+    def checkpoint(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        tmp_file = self.checkpoint_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'offset': self.file.tell(), 'source': self.last_source, 'rows': self.rows}, f)
+        os.replace(tmp_file, self.checkpoint_file)
+
+    def close(self):
+        """Finish the file: move it into place and drop the checkpoint"""
+        self.file.close()
+        os.replace(self.partial_file, self.csv_file)
+        if os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+        return self.csv_file
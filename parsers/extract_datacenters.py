@@ -4,117 +4,91 @@ Extract data center information from city txt files
 Saves to data_centers.csv
 """
 
+import argparse
 import os
-import re
-import json
-import csv
+import sys
 
-def extract_data_centers():
-    """Extract data center info from all city txt files and save to CSV"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from next_data import iter_pages
+from page_store import open_store
+
+from csv_stream import StreamingCSVWriter
+
+def extract_data_centers(resume=False):
+    """Extract data center info from all city txt files and save to CSV, writing rows as pages are read"""
     
-    state_dir = '../data/raw/html/state'
-    all_datacenters = []
+    store = open_store()
     
     # Get all state folders
-    states = [d for d in os.listdir(state_dir) if os.path.isdir(os.path.join(state_dir, d))]
+    states = {path.split('/')[-2] for path in store.paths('state/*/*.txt')}
     
     print(f"Found {len(states)} state folders")
     
-    for state in sorted(states):
-        city_dir = f'{state_dir}/{state}/city'
+    # Duplicates (name + address) are dropped as rows are written
+    csv_file = 'data_centers.csv'
+    writer = StreamingCSVWriter(csv_file, ['Name', 'Company', 'Address', 'Postal', 'City', 'State', 'Country'],
+                                key_columns=['Name', 'Address'], resume=resume)
+    if writer.resumed_rows:
+        print(f"Resuming after {writer.last_source} ({writer.resumed_rows} rows already written)")
+    
+    total_found = 0
+    
+    # .../state/{state}/city/{city}/{city}.txt
+    for page in iter_pages(store, 'state/*/city/*/*.txt'):
+        if writer.done(page.path):
+            continue
         
-        if not os.path.exists(city_dir):
+        parts = page.path.split('/')
+        state, city = parts[-4], parts[-2]
+        
+        # Skip rate-limited files
+        if page.has_marker('page_view_limit'):
+            print(f"  Skipping {state}/{city} (rate limited)")
+            writer.finish_source(page.path)
             continue
         
-        cities = [d for d in os.listdir(city_dir) if os.path.isdir(os.path.join(city_dir, d))]
+        # __NEXT_DATA__ pageProps (from the sidecar, or the page itself)
+        page_props = page.page_props
         
-        for city in cities:
-            city_file = f'{city_dir}/{city}/{city}.txt'
-            
-            if not os.path.exists(city_file):
-                continue
-            
-            with open(city_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Skip rate-limited files
-            if 'Page View Limit Reached' in content:
-                print(f"  Skipping {state}/{city} (rate limited)")
-                continue
-            
-            # Extract JSON data from __NEXT_DATA__ script tag
-            json_match = re.search(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', content)
-            
-            if not json_match:
-                print(f"  Skipping {state}/{city} (no JSON data)")
-                continue
+        if page_props is None:
+            print(f"  Skipping {state}/{city} (no JSON data)")
+            writer.finish_source(page.path)
+            continue
+        
+        # Navigate to the data centers list
+        dcs = page_props.get('mapdata', {}).get('dcs', [])
+        
+        for dc in dcs:
+            props = dc.get('properties', {})
             
-            try:
-                data = json.loads(json_match.group(1))
-                
-                # Navigate to the data centers list
-                dcs = data.get('props', {}).get('pageProps', {}).get('mapdata', {}).get('dcs', [])
-                
-                for dc in dcs:
-                    props = dc.get('properties', {})
-                    
-                    name = props.get('name', '')
-                    company = props.get('companyname', '')
-                    address = props.get('address', '')
-                    postal = props.get('postal', '')
-                    city_name = props.get('city', '')
-                    state_name = props.get('state', '')
-                    country = props.get('country', '')
-                    
-                    all_datacenters.append({
-                        'name': name,
-                        'company': company,
-                        'address': address,
-                        'postal': postal,
-                        'city': city_name,
-                        'state': state_name,
-                        'country': country
-                    })
-                
-                if dcs:
-                    print(f"  {state}/{city}: {len(dcs)} data centers")
-                    
-            except json.JSONDecodeError as e:
-                print(f"  Error parsing {state}/{city}: {e}")
-    
-    # Remove duplicates based on name + address
-    seen = set()
-    unique_dcs = []
-    for dc in all_datacenters:
-        key = (dc['name'], dc['address'])
-        if key not in seen:
-            seen.add(key)
-            unique_dcs.append(dc)
-    
-    # Save to CSV
-    csv_file = 'data_centers.csv'
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        # Write header
-        writer.writerow(['Name', 'Company', 'Address', 'Postal', 'City', 'State', 'Country'])
-        # Write data
-        for dc in unique_dcs:
             writer.writerow([
-                dc['name'],
-                dc['company'],
-                dc['address'],
-                dc['postal'],
-                dc['city'],
-                dc['state'],
-                dc['country']
+                props.get('name', ''),
+                props.get('companyname', ''),
+                props.get('address', ''),
+                props.get('postal', ''),
+                props.get('city', ''),
+                props.get('state', ''),
+                props.get('country', '')
             ])
+        total_found += len(dcs)
+        writer.finish_source(page.path)
+        
+        if dcs:
+            print(f"  {state}/{city}: {len(dcs)} data centers")
+    
+    writer.close()
     
     print("\n" + "="*50)
     print(f"EXTRACTION COMPLETE")
     print("="*50)
-    print(f"Total data centers found: {len(all_datacenters)}")
-    print(f"Unique data centers: {len(unique_dcs)}")
+    print(f"Total data centers found: {total_found}")
+    print(f"Unique data centers: {writer.rows}")
     print(f"Saved to: {csv_file}")
 
 if __name__ == "__main__":
-    extract_data_centers()
+    parser = argparse.ArgumentParser(description='Extract data centers from scraped city pages')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run from its last checkpoint')
+    args = parser.parse_args()
+    
+    extract_data_centers(args.resume)
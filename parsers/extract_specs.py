@@ -5,31 +5,49 @@ Parses capacity (power) and operational date from spec pages
 Outputs to specs_data.csv
 """
 
+import argparse
 import os
-import re
 import csv
-import json
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from next_data import Page
+from page_store import open_store
+
+from csv_stream import StreamingCSVWriter
+from parse_cache import iter_cached_parse
+from spec_patterns import extract_fallback_specs, report as report_fallbacks
+
+# Bump when parsing changes, to invalidate cached results
+PARSER_VERSION = 3
 
 def extract_specs_from_html(content):
     """Extract capacity and operational date from specs page HTML"""
+    return extract_specs_from_page(Page.from_html(content))
+
+def extract_specs_from_page(page):
+    """
+    Extract capacity and operational date from a specs page
+    Uses the __NEXT_DATA__ sidecar record when there is one; the HTML is only
+    read for the regex fallbacks.
+    """
     
     capacity = "NA"
     operational_date = "NA"
     
     # Check if it's a "No data supplied" page
-    if "No data supplied by" in content:
+    if page.has_marker('no_data_supplied'):
         return capacity, operational_date
     
     # Check for rate-limited content or security checkpoint
-    if 'Page View Limit Reached' in content or 'Vercel Security Checkpoint' in content:
+    if page.has_marker('page_view_limit') or page.has_marker('security_checkpoint'):
         return None, None  # Signal to skip this file
     
     # Try to extract from __NEXT_DATA__ JSON first (more reliable)
-    json_match = re.search(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', content)
-    if json_match:
+    page_props = page.page_props
+    if page_props is not None:
         try:
-            data = json.loads(json_match.group(1))
-            dc = data.get('props', {}).get('pageProps', {}).get('dc', {})
+            dc = page_props.get('dc', {})
             
             # Extract capacity from meta_power.totalmw
             meta_power = dc.get('meta_power', {}) or {}
@@ -45,72 +63,36 @@ def extract_specs_from_html(content):
             
             return capacity, operational_date
                 
-        except (json.JSONDecodeError, KeyError, TypeError):
+        except (KeyError, TypeError):
             pass
     
-    # Fallback: try HTML table patterns (less reliable)
-    
-    # Extract Fully Built-Out Power (capacity)
-    # Pattern: Fully Built-Out Power</td><td ...>6.8 MW</td>
-    # Or in table format: | Fully Built-Out Power | 6.8 MW |
-    power_patterns = [
-        r'Fully Built-Out Power[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>',
-        r'Fully Built-Out Power[^|]*\|[^|]*\|\s*([^\|<]+)',
-        r'"Fully Built-Out Power"[^"]*"([^"]+)"',
-        r'>Fully Built-Out Power</[^>]+>[^>]*>([^<]+)<',
-    ]
-    
-    for pattern in power_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            power_val = match.group(1).strip()
-            if power_val and power_val not in ['', '-', 'N/A']:
-                capacity = power_val
-                break
-    
-    # Also try to find power in JSON data
-    if capacity == "NA":
-        # Look for power in JSON
-        json_match = re.search(r'"power"\s*:\s*"([^"]+)"', content)
-        if json_match:
-            power_val = json_match.group(1).strip()
-            if power_val and power_val not in ['', '-', 'N/A', 'null']:
-                capacity = power_val
-    
-    # Extract Year Operational
-    # Pattern: Year Operational</td><td ...>2011</td>
-    year_patterns = [
-        r'Year Operational[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>',
-        r'Year Operational[^|]*\|[^|]*\|\s*([^\|<]+)',
-        r'"Year Operational"[^"]*"([^"]+)"',
-        r'>Year Operational</[^>]+>[^>]*>([^<]+)<',
-        r'Year Operational[:\s]+(\d{4})',
-    ]
-    
-    for pattern in year_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            year_val = match.group(1).strip()
-            if year_val and year_val not in ['', '-', 'N/A']:
-                operational_date = year_val
-                break
-    
-    # Also try to find year in JSON data
-    if operational_date == "NA":
-        json_match = re.search(r'"yearOperational"\s*:\s*"?(\d{4})"?', content)
-        if json_match:
-            operational_date = json_match.group(1)
-    
-    return capacity, operational_date
+    # Fallback: regex over the HTML (less reliable)
+    return extract_fallback_specs(page.html)
+
+SPECS_HEADER = ['DC_Link', 'State', 'City', 'Capacity', 'Operational_Date']
 
-def extract_all_specs():
-    """Extract specs from all data center spec files"""
+def save_specs_csv(all_specs, csv_file='specs_data.csv'):
+    """Write extracted specs rows to CSV"""
+    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(SPECS_HEADER)
+        for spec in all_specs:
+            writer.writerow([
+                spec['dc_link'],
+                spec['state'],
+                spec['city'],
+                spec['capacity'],
+                spec['operational_date']
+            ])
+    return csv_file
+
+def extract_all_specs(resume=False):
+    """Extract specs from all data center spec files, writing rows as they are parsed"""
     
-    state_dir = '../data/raw/html/state'
-    all_specs = []
+    store = open_store()
     
     # Get all state folders
-    states = [d for d in os.listdir(state_dir) if os.path.isdir(os.path.join(state_dir, d))]
+    states = {path.split('/')[-2] for path in store.paths('state/*/*.txt')}
     
     print(f"Found {len(states)} state folders")
     
@@ -119,65 +101,38 @@ def extract_all_specs():
     total_with_date = 0
     total_skipped = 0
     
-    for state in sorted(states):
-        city_dir = f'{state_dir}/{state}/city'
+    writer = StreamingCSVWriter('specs_data.csv', SPECS_HEADER, resume=resume)
+    if writer.resumed_rows:
+        print(f"Resuming after {writer.last_source} ({writer.resumed_rows} rows already written)")
+    
+    # .../state/{state}/city/{city}/dc/{dc}/specs.txt
+    # Pages unchanged since the last run come from the parse cache
+    specs = iter_cached_parse(store, 'state/*/city/*/dc/*/specs.txt', 'extract_specs.specs',
+                              PARSER_VERSION, extract_specs_from_page)
+    
+    for specs_file, (capacity, operational_date) in specs:
+        if writer.done(specs_file):
+            continue
+        
+        parts = specs_file.split('/')
+        state, city, dc = parts[-6], parts[-4], parts[-2]
         
-        if not os.path.exists(city_dir):
+        # Skip rate-limited files
+        if capacity is None:
+            total_skipped += 1
+            writer.finish_source(specs_file)
             continue
         
-        cities = [d for d in os.listdir(city_dir) if os.path.isdir(os.path.join(city_dir, d))]
+        total_found += 1
+        if capacity != "NA":
+            total_with_capacity += 1
+        if operational_date != "NA":
+            total_with_date += 1
         
-        for city in sorted(cities):
-            dc_dir = f'{city_dir}/{city}/dc'
-            
-            if not os.path.exists(dc_dir):
-                continue
-            
-            dcs = [d for d in os.listdir(dc_dir) if os.path.isdir(os.path.join(dc_dir, d))]
-            
-            for dc in dcs:
-                specs_file = f'{dc_dir}/{dc}/specs.txt'
-                
-                if not os.path.exists(specs_file):
-                    continue
-                
-                with open(specs_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                capacity, operational_date = extract_specs_from_html(content)
-                
-                # Skip rate-limited files
-                if capacity is None:
-                    total_skipped += 1
-                    continue
-                
-                total_found += 1
-                if capacity != "NA":
-                    total_with_capacity += 1
-                if operational_date != "NA":
-                    total_with_date += 1
-                
-                all_specs.append({
-                    'dc_link': dc,
-                    'state': state,
-                    'city': city,
-                    'capacity': capacity,
-                    'operational_date': operational_date
-                })
+        writer.writerow([dc, state, city, capacity, operational_date])
+        writer.finish_source(specs_file)
     
-    # Save to CSV
-    csv_file = 'specs_data.csv'
-    with open(csv_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f)
-        writer.writerow(['DC_Link', 'State', 'City', 'Capacity', 'Operational_Date'])
-        for spec in all_specs:
-            writer.writerow([
-                spec['dc_link'],
-                spec['state'],
-                spec['city'],
-                spec['capacity'],
-                spec['operational_date']
-            ])
+    csv_file = writer.close()
     
     print("\n" + "="*50)
     print("EXTRACTION COMPLETE")
@@ -187,6 +142,12 @@ def extract_all_specs():
     print(f"With operational date: {total_with_date}")
     print(f"Skipped (rate limited): {total_skipped}")
     print(f"Saved to: {csv_file}")
+    report_fallbacks()
 
 if __name__ == "__main__":
-    extract_all_specs()
+    parser = argparse.ArgumentParser(description='Extract specs from scraped specs pages')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run from its last checkpoint')
+    args = parser.parse_args()
+    
+    extract_all_specs(args.resume)
@@ -5,31 +5,45 @@ Combines data_centers.csv with specs data from html/state/{state}/city/{city}/dc
 Creates data_centers_complete.csv with all original data plus Capacity and Operational_Date
 """
 
+import argparse
 import os
-import re
-import json
 import csv
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from next_data import Page
+from page_store import open_store
+
+from csv_stream import StreamingCSVWriter
+from parse_cache import iter_cached_parse
+from spec_patterns import extract_fallback_specs, report as report_fallbacks
+
+# Bump when parsing changes, to invalidate cached results
+PARSER_VERSION = 3
 
 def extract_specs_from_html(content):
     """Extract capacity and operational date from specs page HTML"""
+    return extract_specs_from_page(Page.from_html(content))
+
+def extract_specs_from_page(page):
+    """Extract capacity and operational date from a specs page (sidecar record first, HTML for fallbacks)"""
     
     capacity = "NA"
     operational_date = "NA"
     
     # Check if it's a "No data supplied" page
-    if "No data supplied by" in content:
+    if page.has_marker('no_data_supplied'):
         return capacity, operational_date
     
     # Check for rate-limited content or security checkpoint
-    if 'Page View Limit Reached' in content or 'Vercel Security Checkpoint' in content:
+    if page.has_marker('page_view_limit') or page.has_marker('security_checkpoint'):
         return None, None  # Signal to skip this file
     
     # Try to extract from __NEXT_DATA__ JSON first (more reliable)
-    json_match = re.search(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', content)
-    if json_match:
+    page_props = page.page_props
+    if page_props is not None:
         try:
-            data = json.loads(json_match.group(1))
-            dc = data.get('props', {}).get('pageProps', {}).get('dc', {})
+            dc = page_props.get('dc', {})
             
             # Extract capacity from meta_power.totalmw
             meta_power = dc.get('meta_power', {}) or {}
@@ -45,189 +59,95 @@ def extract_specs_from_html(content):
             
             return capacity, operational_date
                 
-        except (json.JSONDecodeError, KeyError, TypeError):
+        except (KeyError, TypeError):
             pass
     
-    # Extract Fully Built-Out Power (capacity)
-    power_patterns = [
-        r'Fully Built-Out Power[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>',
-        r'Fully Built-Out Power[^|]*\|[^|]*\|\s*([^\|<]+)',
-        r'"Fully Built-Out Power"[^"]*"([^"]+)"',
-        r'>Fully Built-Out Power</[^>]+>[^>]*>([^<]+)<',
-    ]
-    
-    for pattern in power_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            power_val = match.group(1).strip()
-            if power_val and power_val not in ['', '-', 'N/A']:
-                capacity = power_val
-                break
-    
-    # Also try to find power in JSON data
-    if capacity == "NA":
-        json_match = re.search(r'"power"\s*:\s*"([^"]+)"', content)
-        if json_match:
-            power_val = json_match.group(1).strip()
-            if power_val and power_val not in ['', '-', 'N/A', 'null']:
-                capacity = power_val
-    
-    # Extract Year Operational
-    year_patterns = [
-        r'Year Operational[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>',
-        r'Year Operational[^|]*\|[^|]*\|\s*([^\|<]+)',
-        r'"Year Operational"[^"]*"([^"]+)"',
-        r'>Year Operational</[^>]+>[^>]*>([^<]+)<',
-        r'Year Operational[:\s]+(\d{4})',
-    ]
-    
-    for pattern in year_patterns:
-        match = re.search(pattern, content, re.IGNORECASE)
-        if match:
-            year_val = match.group(1).strip()
-            if year_val and year_val not in ['', '-', 'N/A']:
-                operational_date = year_val
-                break
-    
-    # Also try to find year in JSON data
-    if operational_date == "NA":
-        json_match = re.search(r'"yearOperational"\s*:\s*"?(\d{4})"?', content)
-        if json_match:
-            operational_date = json_match.group(1)
-    
-    return capacity, operational_date
+    # Fallback: regex over the HTML (less reliable)
+    return extract_fallback_specs(page.html)
 
 def build_specs_lookup():
     """Build a lookup dict mapping dc_link -> (capacity, operational_date)"""
     
-    state_dir = '../data/raw/html/state'
+    store = open_store()
     specs_lookup = {}
     
-    states = [d for d in os.listdir(state_dir) if os.path.isdir(os.path.join(state_dir, d))]
+    # .../state/{state}/city/{city}/dc/{dc}/specs.txt
+    specs = iter_cached_parse(store, 'state/*/city/*/dc/*/specs.txt', 'merge_datacenter_specs.specs',
+                              PARSER_VERSION, extract_specs_from_page)
     
-    for state in states:
-        city_dir = f'{state_dir}/{state}/city'
+    for specs_file, (capacity, operational_date) in specs:
+        dc = specs_file.split('/')[-2]
         
-        if not os.path.exists(city_dir):
+        # Skip rate-limited files
+        if capacity is None:
             continue
         
-        cities = [d for d in os.listdir(city_dir) if os.path.isdir(os.path.join(city_dir, d))]
-        
-        for city in cities:
-            dc_dir = f'{city_dir}/{city}/dc'
-            
-            if not os.path.exists(dc_dir):
-                continue
-            
-            dcs = [d for d in os.listdir(dc_dir) if os.path.isdir(os.path.join(dc_dir, d))]
-            
-            for dc in dcs:
-                specs_file = f'{dc_dir}/{dc}/specs.txt'
-                
-                if not os.path.exists(specs_file):
-                    continue
-                
-                with open(specs_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                capacity, operational_date = extract_specs_from_html(content)
-                
-                # Skip rate-limited files
-                if capacity is None:
-                    continue
-                
-                # Store by dc_link
-                specs_lookup[dc] = (capacity, operational_date)
+        # Store by dc_link
+        specs_lookup[dc] = (capacity, operational_date)
     
     return specs_lookup
 
-def extract_dc_with_link(city_file_path):
+def extract_dc_with_link(city_file_path, store=None, page=None):
     """Extract data center info including the link field from a city txt file"""
-    if not os.path.exists(city_file_path):
+    if page is None:
+        if store is None:
+            store = open_store()
+        if not store.exists(city_file_path):
+            return []
+        page = Page(city_file_path, store=store)
+    
+    if page.has_marker('page_view_limit'):
         return []
     
-    with open(city_file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    page_props = page.page_props
     
-    if 'Page View Limit Reached' in content:
+    if page_props is None:
         return []
     
-    json_match = re.search(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', content)
+    dcs = page_props.get('mapdata', {}).get('dcs', [])
     
-    if not json_match:
-        return []
-    
-    try:
-        data = json.loads(json_match.group(1))
-        dcs = data.get('props', {}).get('pageProps', {}).get('mapdata', {}).get('dcs', [])
-        
-        results = []
-        for dc in dcs:
-            props = dc.get('properties', {})
-            
-            results.append({
-                'name': props.get('name', ''),
-                'company': props.get('companyname', ''),
-                'address': props.get('address', ''),
-                'postal': props.get('postal', ''),
-                'city': props.get('city', ''),
-                'state': props.get('state', ''),
-                'country': props.get('country', ''),
-                'link': props.get('link', '')  # This is the URL-safe dc name
-            })
+    results = []
+    for dc in dcs:
+        props = dc.get('properties', {})
         
-        return results
-        
-    except json.JSONDecodeError:
-        return []
+        results.append({
+            'name': props.get('name', ''),
+            'company': props.get('companyname', ''),
+            'address': props.get('address', ''),
+            'postal': props.get('postal', ''),
+            'city': props.get('city', ''),
+            'state': props.get('state', ''),
+            'country': props.get('country', ''),
+            'link': props.get('link', '')  # This is the URL-safe dc name
+        })
+    
+    return results
 
-def merge_data():
-    """Extract all data centers with their specs and save to data_centers_complete.csv"""
-    
-    print("Building specs lookup from scraped data...")
-    specs_lookup = build_specs_lookup()
-    print(f"Found specs for {len(specs_lookup)} data centers")
-    
-    state_dir = '../data/raw/html/state'
-    all_datacenters = []
-    
-    states = [d for d in os.listdir(state_dir) if os.path.isdir(os.path.join(state_dir, d))]
-    
-    print(f"\nExtracting data centers from {len(states)} states...")
-    
-    for state in sorted(states):
-        city_dir = f'{state_dir}/{state}/city'
-        
-        if not os.path.exists(city_dir):
-            continue
-        
-        cities = [d for d in os.listdir(city_dir) if os.path.isdir(os.path.join(city_dir, d))]
-        
-        for city in cities:
-            city_file = f'{city_dir}/{city}/{city}.txt'
-            
-            dcs = extract_dc_with_link(city_file)
-            
-            for dc in dcs:
-                link = dc['link']
-                
-                # Look up specs
-                if link in specs_lookup:
-                    capacity, operational_date = specs_lookup[link]
-                else:
-                    capacity, operational_date = "NA", "NA"
-                
-                all_datacenters.append({
-                    'name': dc['name'],
-                    'company': dc['company'],
-                    'address': dc['address'],
-                    'postal': dc['postal'],
-                    'city': dc['city'],
-                    'state': dc['state'],
-                    'country': dc['country'],
-                    'capacity': capacity,
-                    'operational_date': operational_date
-                })
+def merge_row(dc, specs_lookup):
+    """Data center from a city page with its specs attached"""
+    link = dc['link']
+    
+    # Look up specs
+    if link in specs_lookup:
+        capacity, operational_date = specs_lookup[link]
+    else:
+        capacity, operational_date = "NA", "NA"
+    
+    return {
+        'name': dc['name'],
+        'company': dc['company'],
+        'address': dc['address'],
+        'postal': dc['postal'],
+        'city': dc['city'],
+        'state': dc['state'],
+        'country': dc['country'],
+        'capacity': capacity,
+        'operational_date': operational_date
+    }
+
+def merge_rows(city_dcs, specs_lookup):
+    """Attach specs to data centers listed on city pages and drop duplicates (name + address)"""
+    all_datacenters = [merge_row(dc, specs_lookup) for dc in city_dcs]
     
     # Remove duplicates based on name + address
     seen = set()
@@ -238,37 +158,88 @@ def merge_data():
             seen.add(key)
             unique_dcs.append(dc)
     
-    # Save to CSV
-    csv_file = 'data_centers_complete.csv'
+    return unique_dcs
+
+COMPLETE_HEADER = ['Name', 'Company', 'Address', 'Postal', 'City', 'State', 'Country', 'Capacity', 'Operational_Date']
+
+def complete_row(dc):
+    """CSV row for a merged data center"""
+    return [
+        dc['name'],
+        dc['company'],
+        dc['address'],
+        dc['postal'],
+        dc['city'],
+        dc['state'],
+        dc['country'],
+        dc['capacity'],
+        dc['operational_date']
+    ]
+
+def save_complete_csv(unique_dcs, csv_file='data_centers_complete.csv'):
+    """Write merged data centers to CSV"""
     with open(csv_file, 'w', newline='', encoding='utf-8') as f:
         writer = csv.writer(f)
         # Write header
-        writer.writerow(['Name', 'Company', 'Address', 'Postal', 'City', 'State', 'Country', 'Capacity', 'Operational_Date'])
+        writer.writerow(COMPLETE_HEADER)
         # Write data
         for dc in unique_dcs:
-            writer.writerow([
-                dc['name'],
-                dc['company'],
-                dc['address'],
-                dc['postal'],
-                dc['city'],
-                dc['state'],
-                dc['country'],
-                dc['capacity'],
-                dc['operational_date']
-            ])
+            writer.writerow(complete_row(dc))
+    return csv_file
+
+def merge_data(resume=False):
+    """Extract all data centers with their specs and save to data_centers_complete.csv"""
     
-    # Count stats
-    total_with_capacity = sum(1 for dc in unique_dcs if dc['capacity'] != "NA")
-    total_with_date = sum(1 for dc in unique_dcs if dc['operational_date'] != "NA")
+    print("Building specs lookup from scraped data...")
+    specs_lookup = build_specs_lookup()
+    print(f"Found specs for {len(specs_lookup)} data centers")
+    
+    store = open_store()
+    
+    states = {path.split('/')[-4] for path in store.paths('state/*/city/*/*.txt')}
+    
+    print(f"\nExtracting data centers from {len(states)} states...")
+    
+    # Rows are written as city pages are parsed; duplicates (name + address) are dropped on the way
+    writer = StreamingCSVWriter('data_centers_complete.csv', COMPLETE_HEADER, key_columns=['Name', 'Address'],
+                                resume=resume)
+    if writer.resumed_rows:
+        print(f"Resuming after {writer.last_source} ({writer.resumed_rows} rows already written)")
+    
+    total_with_capacity = 0
+    total_with_date = 0
+    
+    # .../state/{state}/city/{city}/{city}.txt
+    cities = iter_cached_parse(store, 'state/*/city/*/*.txt', 'merge_datacenter_specs.city', PARSER_VERSION,
+                               lambda page: extract_dc_with_link(page.path, page=page))
+    for city_file, dcs in cities:
+        if writer.done(city_file):
+            continue
+        
+        for dc in dcs:
+            row = merge_row(dc, specs_lookup)
+            if writer.writerow(complete_row(row)):
+                total_with_capacity += row['capacity'] != "NA"
+                total_with_date += row['operational_date'] != "NA"
+        writer.finish_source(city_file)
+    
+    csv_file = writer.close()
     
     print("\n" + "="*50)
     print("MERGE COMPLETE")
     print("="*50)
-    print(f"Total unique data centers: {len(unique_dcs)}")
+    print(f"Total unique data centers: {writer.rows}")
+    if writer.resumed_rows:
+        print(f"  ({writer.resumed_rows} from the interrupted run, not counted below)")
     print(f"With capacity data: {total_with_capacity}")
     print(f"With operational date: {total_with_date}")
     print(f"Saved to: {csv_file}")
+    report_fallbacks()
 
 if __name__ == "__main__":
-    merge_data()
+    parser = argparse.ArgumentParser(description='Merge data centers from city pages with their specs')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run from its last checkpoint')
+    args = parser.parse_args()
+    
+    merge_data(args.resume)
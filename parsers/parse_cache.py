@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Incremental parse cache
+Persistent per-page parse results shared by the parsers, so re-running a
+parser after a small crawl top-up only parses new or changed pages.
+
+Entries are keyed by (parser, path) and store:
+- fingerprint: the page store's change marker (mtime + size for loose
+  files, content hash for the pack)
+- version: the parser's PARSER_VERSION; bump it when parsing code changes
+  and every entry for that parser is invalidated on the next run
+- result: the pickled parse result
+
+Entries are looked up one page at a time and new results are written in
+transactions of FLUSH_EVERY rows, so memory stays flat as the corpus grows
+and a crashed run keeps everything but its last few pages.
+
+Each run reports hits, new pages, changed pages, version invalidations and
+entries removed for pages that no longer exist.
+
+Usage:
+    python parse_cache.py stats
+    python parse_cache.py clear [--parser extract_specs.specs]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from next_data import Page, load_sidecar_lines
+from page_store import HTML_DIR
+
+CACHE_NAME = 'parse_cache.sqlite'
+
+# New results written per transaction
+FLUSH_EVERY = 500
+
+
+class ParseCache:
+    """Cached parse results for one parser"""
+
+    def __init__(self, parser, version, html_dir=HTML_DIR):
+        self.parser = parser
+        self.version = str(version)
+        self.db_path = os.path.join(html_dir, CACHE_NAME)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS results (
+                parser TEXT,
+                path TEXT,
+                fingerprint TEXT,
+                version TEXT,
+                result BLOB,
+                PRIMARY KEY (parser, path)
+            )
+        """)
+        self.stats = {'hits': 0, 'new': 0, 'changed': 0, 'version': 0, 'removed': 0}
+        # Writes are batched and committed right away, so several caches can share the db file
+        self.pending = []
+
+        # Drop everything written by another parser version
+        old_versions = self.conn.execute(
+            "SELECT version, COUNT(*) FROM results WHERE parser = ? AND version != ? GROUP BY version",
+            (parser, self.version)
+        ).fetchall()
+        if old_versions:
+            self.stats['version'] = sum(count for _, count in old_versions)
+            self.old_versions = [version for version, _ in old_versions]
+            self.conn.execute("DELETE FROM results WHERE parser = ? AND version != ?", (parser, self.version))
+        else:
+            self.old_versions = []
+        self.conn.commit()
+
+    def lookup(self, path, fingerprint):
+        """Return (True, result) on a hit, (False, None) otherwise (counted as new or changed)"""
+        entry = self.conn.execute(
+            "SELECT fingerprint, result FROM results WHERE parser = ? AND path = ?", (self.parser, path)
+        ).fetchall()
+        if entry and fingerprint is not None and entry[0][0] == fingerprint:
+            self.stats['hits'] += 1
+            return True, pickle.loads(entry[0][1])
+
+        self.stats['changed' if entry else 'new'] += 1
+        return False, None
+
+    def put(self, path, fingerprint, result):
+        self.pending.append((self.parser, path, fingerprint, self.version, pickle.dumps(result)))
+        if len(self.pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Write the pending results in one transaction"""
+        if self.pending:
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", self.pending)
+            self.pending = []
+
+    def prune(self, live_paths):
+        """Remove entries for pages that are no longer in the store"""
+        self.flush()
+        live_paths = set(live_paths)
+        gone = [path for (path,) in self.conn.execute("SELECT path FROM results WHERE parser = ?", (self.parser,))
+                if path not in live_paths]
+        with self.conn:
+            self.conn.executemany("DELETE FROM results WHERE parser = ? AND path = ?",
+                                  [(self.parser, path) for path in gone])
+        self.stats['removed'] += len(gone)
+
+    def report(self):
+        s = self.stats
+        print(f"Parse cache [{self.parser} v{self.version}]: {s['hits']} hits, {s['new']} new, "
+              f"{s['changed']} changed, {s['removed']} removed")
+        if s['version']:
+            print(f"  {s['version']} entries invalidated by parser version change "
+                  f"({', '.join('v' + v for v in self.old_versions)} -> v{self.version}), rebuilt")
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+def iter_cached_parse(store, pattern, parser, version, parse_fn):
+    """
+    Yield (path, result) for every page in the store matching pattern, in
+    path order, calling parse_fn(page) only for pages missing from the cache
+    or changed since they were cached. The __NEXT_DATA__ sidecar is only
+    read if something has to be parsed.
+    """
+    cache = ParseCache(parser, version, store.html_dir)
+    paths = store.paths(pattern)
+    lines = None
+
+    try:
+        for path in paths:
+            fingerprint = store.fingerprint(path)
+            hit, result = cache.lookup(path, fingerprint)
+
+            if not hit:
+                if lines is None:
+                    lines = load_sidecar_lines(store.html_dir)
+                line = lines.get(path)
+                result = parse_fn(Page(path, json.loads(line) if line else None, store))
+                cache.put(path, fingerprint, result)
+
+            yield path, result
+
+        cache.prune(paths)
+        cache.report()
+    finally:
+        cache.close()
+
+
+def cached_parse(store, pattern, parser, version, parse_fn):
+    """List of (path, result) from iter_cached_parse()"""
+    return list(iter_cached_parse(store, pattern, parser, version, parse_fn))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parse cache tools')
+    parser.add_argument('command', choices=['stats', 'clear'])
+    parser.add_argument('--html-dir', default=HTML_DIR)
+    parser.add_argument('--parser', default=None, help='only this parser (clear)')
+    args = parser.parse_args()
+
+    db_path = os.path.join(args.html_dir, CACHE_NAME)
+    if not os.path.exists(db_path):
+        print(f"No parse cache at {db_path}")
+        sys.exit(0)
+
+    conn = sqlite3.connect(db_path)
+    if args.command == 'stats':
+        for name, version, count in conn.execute(
+                "SELECT parser, version, COUNT(*) FROM results GROUP BY parser, version ORDER BY parser"):
+            print(f"{name} v{version}: {count} pages")
+    else:
+        if args.parser:
+            conn.execute("DELETE FROM results WHERE parser = ?", (args.parser,))
+        else:
+            conn.execute("DELETE FROM results")
+        conn.commit()
+        print("Cleared")
+    conn.close()
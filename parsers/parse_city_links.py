@@ -7,30 +7,33 @@ Saves them to data/raw/html/state/{state}/city_links.txt
 
 import re
 import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from page_store import open_store
 
 def parse_city_links():
     """Extract city links from all state txt files"""
     
     state_dir = '../data/raw/html/state'
+    store = open_store()
     
     # Get all state folders
-    states = [d for d in os.listdir(state_dir) if os.path.isdir(os.path.join(state_dir, d))]
+    states = sorted({path.split('/')[-2] for path in store.paths('state/*/*.txt')})
     
     print(f"Found {len(states)} state folders")
     
     total_cities = 0
     
-    for state in sorted(states):
+    for state in states:
         state_file = f'{state_dir}/{state}/{state}.txt'
         
-        if not os.path.exists(state_file):
+        # Read the HTML content
+        content = store.read(state_file)
+        if content is None:
             print(f"Skipping {state}: no txt file found")
             continue
         
-        # Read the HTML content
-        with open(state_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
         # Find all href attributes with /usa/{state}/{city}/ pattern
         # Pattern matches href="/usa/state-name/city-name/"
         pattern = rf'href="(/usa/{state}/[^"]+)"'
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Single-pass corpus parser
+Walks the scraped state/city/dc tree once and parses every page exactly once
+in a pool of worker processes, then writes all the outputs the separate
+parsers produce:
+
+- specs_data.csv               (extract_specs.py)
+- data_centers_complete.csv    (merge_datacenter_specs.py)
+- data/datacenter_specs.csv    (parse_specs_to_csv.py)
+
+Workers get each page's raw __NEXT_DATA__ sidecar line (decoded in the
+worker) and only read the HTML from the page store when there is no record
+or a regex fallback is needed. Pages unchanged since the last run are taken
+from the parse cache and never sent to the pool.
+
+Usage:
+    python parse_corpus.py
+    python parse_corpus.py --workers 8
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from next_data import Page, load_sidecar_lines
+from page_store import HTML_DIR, open_store
+
+import extract_specs
+import merge_datacenter_specs
+import parse_specs_to_csv
+from extract_specs import extract_specs_from_page, save_specs_csv
+from merge_datacenter_specs import extract_dc_with_link, merge_rows, save_complete_csv
+from parse_cache import ParseCache
+from parse_specs_to_csv import extract_dc_info, save_dc_info_csv
+
+SPECS_PATTERN = 'state/*/city/*/dc/*/specs.txt'
+CITY_PATTERN = 'state/*/city/*/*.txt'
+
+# Cached corpus results are invalidated when any of the underlying parsers changes
+PARSER_VERSION = '.'.join(str(module.PARSER_VERSION)
+                          for module in (extract_specs, merge_datacenter_specs, parse_specs_to_csv))
+
+# Page store opened once per worker process
+_store = None
+
+
+def _init_worker(html_dir):
+    global _store
+    _store = open_store(html_dir)
+
+
+def _make_page(path, line):
+    return Page(path, json.loads(line) if line else None, _store)
+
+
+def parse_specs_page(task):
+    """Parse one specs page for all three outputs"""
+    path, line = task
+    page = _make_page(path, line)
+    return extract_specs_from_page(page), extract_dc_info(path, page)
+
+
+def parse_city_page(task):
+    """Parse one city page: data centers listed on it"""
+    path, line = task
+    return extract_dc_with_link(path, page=_make_page(path, line))
+
+
+def _lookup(cache, store, paths):
+    """Split paths into cached results {path: result} and [(path, fingerprint)] still to parse"""
+    results = {}
+    todo = []
+    for path in paths:
+        fingerprint = store.fingerprint(path)
+        hit, result = cache.lookup(path, fingerprint)
+        if hit:
+            results[path] = result
+        else:
+            todo.append((path, fingerprint))
+    return results, todo
+
+
+def parse_corpus(html_dir=HTML_DIR, workers=None, chunksize=64):
+    """Parse every specs and city page once and write all parser outputs"""
+    workers = workers or os.cpu_count() or 1
+
+    start = time.time()
+    store = open_store(html_dir)
+    specs_paths = store.paths(SPECS_PATTERN)
+    city_paths = store.paths(CITY_PATTERN)
+
+    specs_cache = ParseCache('parse_corpus.specs', PARSER_VERSION, html_dir)
+    city_cache = ParseCache('parse_corpus.city', PARSER_VERSION, html_dir)
+    specs_results, specs_todo = _lookup(specs_cache, store, specs_paths)
+    city_results, city_todo = _lookup(city_cache, store, city_paths)
+    store.close()
+
+    lines = load_sidecar_lines(html_dir) if specs_todo or city_todo else {}
+    total_files = len(specs_todo) + len(city_todo)
+
+    print(f"Found {len(specs_paths)} specs pages and {len(city_paths)} city pages "
+          f"({total_files} to parse, the rest cached)")
+    print(f"Parsing with {workers} worker processes...")
+
+    if total_files:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(html_dir,)) as executor:
+            for cache, results, todo, parse_fn in [
+                (specs_cache, specs_results, specs_todo, parse_specs_page),
+                (city_cache, city_results, city_todo, parse_city_page),
+            ]:
+                parsed = executor.map(parse_fn, [(p, lines.get(p)) for p, _ in todo], chunksize=chunksize)
+                for (path, fingerprint), result in zip(todo, parsed):
+                    results[path] = result
+                    cache.put(path, fingerprint, result)
+
+    for cache, paths in [(specs_cache, specs_paths), (city_cache, city_paths)]:
+        cache.prune(paths)
+        cache.report()
+        cache.close()
+
+    specs_results = [specs_results[p] for p in specs_paths]
+    city_results = [city_results[p] for p in city_paths]
+
+    parse_time = time.time() - start
+
+    # extract_specs.py / merge_datacenter_specs.build_specs_lookup
+    all_specs = []
+    specs_lookup = {}
+    total_skipped = 0
+    for path, ((capacity, operational_date), _) in zip(specs_paths, specs_results):
+        parts = path.split('/')
+        state, city, dc = parts[-6], parts[-4], parts[-2]
+
+        # Skip rate-limited files
+        if capacity is None:
+            total_skipped += 1
+            continue
+
+        all_specs.append({
+            'dc_link': dc,
+            'state': state,
+            'city': city,
+            'capacity': capacity,
+            'operational_date': operational_date
+        })
+        specs_lookup[dc] = (capacity, operational_date)
+
+    # parse_specs_to_csv.py
+    dc_infos = [info for _, info in specs_results if info]
+
+    # merge_datacenter_specs.merge_data
+    city_dcs = [dc for dcs in city_results for dc in dcs]
+    unique_dcs = merge_rows(city_dcs, specs_lookup)
+
+    outputs = [
+        save_specs_csv(all_specs),
+        save_complete_csv(unique_dcs),
+        save_dc_info_csv(dc_infos),
+    ]
+
+    elapsed = time.time() - start
+
+    print("\n" + "="*50)
+    print("CORPUS PARSE COMPLETE")
+    print("="*50)
+    print(f"Files parsed: {total_files} in {parse_time:.1f}s ({total_files / max(parse_time, 1e-9):.0f} files/sec, "
+          f"{len(specs_paths) + len(city_paths) - total_files} from cache)")
+    print(f"Specs pages: {len(all_specs)} parsed, {total_skipped} skipped (rate limited)")
+    print(f"Data centers with specs info: {len(dc_infos)}")
+    print(f"Unique data centers (merged): {len(unique_dcs)}")
+    for output in outputs:
+        print(f"Saved to: {output}")
+    print(f"Total time: {elapsed:.1f}s")
+
+    return {'files': total_files, 'seconds': parse_time}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Parse the scraped corpus once and write all parser outputs')
+    parser.add_argument('--html-dir', default=HTML_DIR)
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    args = parser.parse_args()
+
+    parse_corpus(args.html_dir, args.workers)
@@ -3,29 +3,38 @@
 Parse all specs.txt files and extract data center info to CSV.
 """
 
+import argparse
 import os
-import re
-import json
 import csv
-from glob import glob
+import sys
 
-def extract_dc_info(file_path):
-    """Extract data center info from a specs.txt file"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from next_data import Page
+from page_store import open_store
+
+from csv_stream import StreamingCSVWriter
+from parse_cache import iter_cached_parse
+
+# Bump when parsing changes, to invalidate cached results
+PARSER_VERSION = 1
+
+def extract_dc_info(file_path, page=None):
+    """Extract data center info from a specs.txt file (or a Page backed by the __NEXT_DATA__ sidecar)"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        if page is None:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                page = Page.from_html(f.read(), file_path)
         
         # Skip rate-limited files
-        if 'Page View Limit Reached' in content:
+        if page.has_marker('page_view_limit'):
             return None
         
-        # Extract JSON from __NEXT_DATA__
-        match = re.search(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>', content)
-        if not match:
+        # __NEXT_DATA__ pageProps
+        page_props = page.page_props
+        if page_props is None:
             return None
         
-        data = json.loads(match.group(1))
-        dc = data.get('props', {}).get('pageProps', {}).get('dc', {})
+        dc = page_props.get('dc', {})
         
         if not dc:
             return None
@@ -50,52 +59,78 @@ def extract_dc_info(file_path):
         print(f"Error processing {file_path}: {e}")
         return None
 
-def main():
+FIELDNAMES = [
+    'data_center_id',
+    'data_center_name',
+    'state',
+    'city',
+    'latitude',
+    'longitude',
+    'year_operational',
+    'capacity_mw',
+    'capacity_sqft',
+]
+
+def save_dc_info_csv(results, output_file='data/datacenter_specs.csv'):
+    """Write extracted data center info rows to CSV"""
+    os.makedirs(os.path.dirname(output_file) or '.', exist_ok=True)
+    
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(results)
+    
+    return output_file
+
+def main(resume=False):
     # Find all specs.txt files
-    specs_files = glob('../data/raw/html/state/*/city/*/dc/*/specs.txt')
+    store = open_store()
+    specs_files = store.paths('state/*/city/*/dc/*/specs.txt')
     print(f"Found {len(specs_files)} specs files")
     
-    results = []
+    output_file = 'data/datacenter_specs.csv'
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    
+    # Rows are written as pages are parsed
+    writer = StreamingCSVWriter(output_file, FIELDNAMES, resume=resume)
+    if writer.resumed_rows:
+        print(f"Resuming after {writer.last_source} ({writer.resumed_rows} rows already written)")
+    
     errors = 0
+    with_year = 0
+    with_capacity = 0
+    
+    specs = iter_cached_parse(store, 'state/*/city/*/dc/*/specs.txt', 'parse_specs_to_csv.dc_info', PARSER_VERSION,
+                              lambda page: extract_dc_info(page.path, page))
     
-    for file_path in specs_files:
-        info = extract_dc_info(file_path)
+    for specs_file, info in specs:
+        if writer.done(specs_file):
+            continue
+        
         if info:
-            results.append(info)
+            writer.writerow([info[field] for field in FIELDNAMES])
+            with_year += bool(info['year_operational'] and info['year_operational'] not in ('', '0', 0))
+            with_capacity += bool(info['capacity_mw'] and info['capacity_mw'] not in ('', '0', 0))
         else:
             errors += 1
+        writer.finish_source(specs_file)
     
-    print(f"Extracted {len(results)} data centers ({errors} errors/skipped)")
-    
-    # Write to CSV
-    output_file = 'data/datacenter_specs.csv'
-    os.makedirs('data', exist_ok=True)
-    
-    fieldnames = [
-        'data_center_id',
-        'data_center_name',
-        'state',
-        'city',
-        'latitude',
-        'longitude',
-        'year_operational',
-        'capacity_mw',
-        'capacity_sqft',
-    ]
-    
-    with open(output_file, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
+    output_file = writer.close()
     
+    print(f"Extracted {writer.rows} data centers ({errors} errors/skipped)")
     print(f"Saved to {output_file}")
     
     # Stats
-    with_year = sum(1 for r in results if r['year_operational'] and r['year_operational'] not in ('', '0', 0))
-    with_capacity = sum(1 for r in results if r['capacity_mw'] and r['capacity_mw'] not in ('', '0', 0))
     print(f"\nStats:")
+    if writer.resumed_rows:
+        print(f"  (counted over the {writer.rows - writer.resumed_rows} rows written after resuming)")
     print(f"  With operational year: {with_year}")
     print(f"  With capacity (MW): {with_capacity}")
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='Parse specs pages into data/datacenter_specs.csv')
+    parser.add_argument('--resume', action='store_true',
+                        help='continue an interrupted run from its last checkpoint')
+    args = parser.parse_args()
+    
+    main(args.resume)
@@ -3,14 +3,22 @@
 Parse state links from usa.txt and save as full URLs to state_links.txt
 """
 
+import os
 import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from page_store import open_store
 
 def parse_state_links():
     """Extract /usa/ links from usa.txt and save as full URLs"""
     
     # Read the HTML content
-    with open('../data/raw/html/usa.txt', 'r', encoding='utf-8') as f:
-        content = f.read()
+    store = open_store()
+    content = store.read('../data/raw/html/usa.txt')
+    store.close()
+    if content is None:
+        sys.exit(f"Error: usa.txt is not in the page store ({store.html_dir}); run usa_scraper.py first")
     
     # Find all href attributes with /usa/ pattern
     # Pattern matches href="/usa/state-name/"
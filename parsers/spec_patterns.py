@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Specs page regex fallbacks
+The patterns extract_specs.py and merge_datacenter_specs.py fall back to
+when a specs page has no __NEXT_DATA__ pageProps, kept in one place:
+
+- patterns are compiled once, at import
+- every pattern contains a literal anchor ('Fully Built-Out Power',
+  'Year Operational', '"power"', ...). Each anchor is looked up once per
+  page, and its patterns are searched from there on. If the anchor isn't
+  on the page, none of its patterns run.
+- tries, hits, rejected values and time are counted per pattern
+- every REORDER_EVERY lookups a field's table patterns are re-sorted by hits
+  so the most productive one runs first
+
+The table patterns for a field are alternative layouts of the same row
+(HTML table, text table, quoted label). Each one stays inside its own row:
+the text table and quoted label patterns stop at '|', '<' and newlines, so
+they can't run on into a row of another layout further down the page. A
+page shows a field in one layout, so the order the patterns run in doesn't
+change what's found (parsers/tests/test_spec_patterns.py checks this on
+pages that mix layouts). The JSON key pattern ('"power"', '"yearOperational"')
+always runs last, and only if no table pattern matched.
+
+The counters are per process (parse_corpus.py workers each keep their own).
+
+Usage:
+    python spec_patterns.py bench     # run the fallbacks over every saved specs page
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scrapers'))
+from next_data import Page
+from page_store import HTML_DIR, open_store
+
+# Lookups between re-sorting a field's patterns by hits
+REORDER_EVERY = 64
+
+# Characters re.IGNORECASE matches to an ASCII letter that str.lower() leaves alone
+# (dotless i, long s)
+IGNORECASE_FOLDS = {'\u0131': 'i', '\u017f': 's'}
+
+# Values that don't count as a match
+REJECT_VALUES = ('', '-', 'N/A')
+
+
+class FallbackPattern:
+    """One compiled fallback regex; group 1 is the value"""
+
+    def __init__(self, pattern, anchor, flags=0, reject=REJECT_VALUES):
+        self.pattern = pattern
+        self.anchor = anchor
+        self.flags = flags
+        self.regex = re.compile(pattern, flags)
+        self.reject = set(reject)
+
+        # Anchor lookup shares the pattern's case sensitivity
+        self.ignorecase = bool(flags & re.IGNORECASE)
+        self.anchor_key = (anchor, self.ignorecase)
+        self.anchor_regex = re.compile(re.escape(anchor), flags & re.IGNORECASE)
+
+        # A match can start at most len(lead) characters before the anchor
+        # (lead has to be plain literal text, e.g. '"' or '>')
+        lead = pattern[:pattern.index(anchor)]
+        assert re.escape(lead) == lead, f"non-literal text before anchor in {pattern!r}"
+        self.lead = len(lead)
+
+        self.tries = 0
+        self.hits = 0
+        self.rejected = 0
+        self.skipped = 0
+        self.seconds = 0.0
+
+    def find(self, content, anchors):
+        """Return the matched value or None; anchors caches anchor positions for this page"""
+        start = time.perf_counter()
+
+        position = anchors.get(self.anchor_key)
+        if position is None:
+            position = anchors[self.anchor_key] = self._find_anchor(content, anchors)
+
+        if position < 0:
+            self.skipped += 1
+            self.seconds += time.perf_counter() - start
+            return None
+
+        self.tries += 1
+        match = self.regex.search(content, max(position - self.lead, 0))
+        value = None
+        if match:
+            value = match.group(1).strip()
+            if value in self.reject:
+                self.rejected += 1
+                value = None
+            else:
+                self.hits += 1
+
+        self.seconds += time.perf_counter() - start
+        return value
+
+    def _find_anchor(self, content, anchors):
+        if not self.ignorecase:
+            return content.find(self.anchor)
+
+        # str.find on the lowercased page is much faster than an IGNORECASE
+        # search; positions only line up if lowercasing kept every character
+        # one character long, otherwise use the regex
+        lowered = anchors.get('lowered')
+        if lowered is None:
+            lowered = content.lower()
+            for char, letter in IGNORECASE_FOLDS.items():
+                if char in lowered:
+                    lowered = lowered.replace(char, letter)
+            anchors['lowered'] = lowered
+        if len(lowered) == len(content):
+            return lowered.find(self.anchor.lower())
+        match = self.anchor_regex.search(content)
+        return match.start() if match else -1
+
+
+class FallbackField:
+    """Patterns for one spec field; the first acceptable match wins"""
+
+    def __init__(self, name, patterns, last):
+        self.name = name
+        self.patterns = list(patterns)
+        self.last = last
+        self.lookups = 0
+
+    def find(self, content, anchors):
+        self.lookups += 1
+        if self.lookups % REORDER_EVERY == 0:
+            self.reorder()
+
+        for pattern in self.patterns + [self.last]:
+            value = pattern.find(content, anchors)
+            if value is not None:
+                return value
+        return None
+
+    def reorder(self):
+        # Stable sort, so ties keep their current order
+        self.patterns.sort(key=lambda p: -p.hits)
+
+
+# Fully Built-Out Power (capacity)
+# Pattern: Fully Built-Out Power</td><td ...>6.8 MW</td>
+# Or in table format: | Fully Built-Out Power | 6.8 MW |
+CAPACITY = FallbackField('capacity', [
+    FallbackPattern(r'Fully Built-Out Power[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>', 'Fully Built-Out Power', re.IGNORECASE),
+    FallbackPattern(r'Fully Built-Out Power[^|<\n]*\|([^|<\n]+)', 'Fully Built-Out Power', re.IGNORECASE),
+    FallbackPattern(r'"Fully Built-Out Power"[^"<\n]*"([^"<\n]+)"', 'Fully Built-Out Power', re.IGNORECASE),
+    FallbackPattern(r'>Fully Built-Out Power</[^>]+>[^>]*>([^<]+)<', 'Fully Built-Out Power', re.IGNORECASE),
+], last=FallbackPattern(r'"power"\s*:\s*"([^"]+)"', '"power"', reject=REJECT_VALUES + ('null',)))
+
+# Year Operational
+# Pattern: Year Operational</td><td ...>2011</td>
+YEAR = FallbackField('operational_date', [
+    FallbackPattern(r'Year Operational[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>', 'Year Operational', re.IGNORECASE),
+    FallbackPattern(r'Year Operational[^|<\n]*\|([^|<\n]+)', 'Year Operational', re.IGNORECASE),
+    FallbackPattern(r'"Year Operational"[^"<\n]*"([^"<\n]+)"', 'Year Operational', re.IGNORECASE),
+    FallbackPattern(r'>Year Operational</[^>]+>[^>]*>([^<]+)<', 'Year Operational', re.IGNORECASE),
+    FallbackPattern(r'Year Operational[:\s]+(\d{4})', 'Year Operational', re.IGNORECASE),
+], last=FallbackPattern(r'"yearOperational"\s*:\s*"?(\d{4})"?', '"yearOperational"'))
+
+FIELDS = [CAPACITY, YEAR]
+
+def extract_fallback_specs(content):
+    """Capacity and operational date from specs page HTML by regex ("NA" when not found)"""
+    anchors = {}
+    capacity = CAPACITY.find(content, anchors)
+    operational_date = YEAR.find(content, anchors)
+    return capacity or "NA", operational_date or "NA"
+
+
+def report():
+    """Print per-pattern counters, in the current (adaptive) order"""
+    if not any(field.lookups for field in FIELDS):
+        return
+
+    print("\nRegex fallback patterns:")
+    for field in FIELDS:
+        print(f"  {field.name} ({field.lookups} pages)")
+        for pattern in field.patterns + [field.last]:
+            dead = "  <- no hits" if field.lookups and not pattern.hits else ""
+            print(f"    {pattern.hits:6d} hits {pattern.tries:6d} tried {pattern.skipped:6d} no anchor "
+                  f"{pattern.rejected:4d} rejected {pattern.seconds * 1000:8.1f} ms  {pattern.pattern}{dead}")
+
+
+# The fallback regexes as extract_specs.py / merge_datacenter_specs.py had
+# them before this module: (table patterns, JSON pattern, JSON rejects) per field
+ORIGINAL_FALLBACKS = [
+    ([
+        r'Fully Built-Out Power[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>',
+        r'Fully Built-Out Power[^|]*\|[^|]*\|\s*([^\|<]+)',
+        r'"Fully Built-Out Power"[^"]*"([^"]+)"',
+        r'>Fully Built-Out Power</[^>]+>[^>]*>([^<]+)<',
+    ], r'"power"\s*:\s*"([^"]+)"', REJECT_VALUES + ('null',)),
+    ([
+        r'Year Operational[^<]*</td>[^<]*<td[^>]*>([^<]+)</td>',
+        r'Year Operational[^|]*\|[^|]*\|\s*([^\|<]+)',
+        r'"Year Operational"[^"]*"([^"]+)"',
+        r'>Year Operational</[^>]+>[^>]*>([^<]+)<',
+        r'Year Operational[:\s]+(\d{4})',
+    ], r'"yearOperational"\s*:\s*"?(\d{4})"?', REJECT_VALUES),
+]
+
+
+def _sequential_specs(content):
+    # The original fallback: uncompiled re.search over the whole page, fixed order
+    values = []
+    for patterns, last, last_reject in ORIGINAL_FALLBACKS:
+        value = "NA"
+        for pattern in patterns:
+            match = re.search(pattern, content, re.IGNORECASE)
+            if match and match.group(1).strip() not in REJECT_VALUES:
+                value = match.group(1).strip()
+                break
+        if value == "NA":
+            match = re.search(last, content)
+            if match and match.group(1).strip() not in last_reject:
+                value = match.group(1).strip()
+        values.append(value)
+    return tuple(values)
+
+
+def bench(html_dir=HTML_DIR):
+    """Run the fallbacks (and the original regexes, searched sequentially) over every saved specs page"""
+    store = open_store(html_dir)
+    pages = []
+    for path, text in store.iter_pages('state/*/city/*/dc/*/specs.txt'):
+        page = Page.from_html(text, path)
+        if not (page.has_marker('no_data_supplied') or page.has_marker('page_view_limit')
+                or page.has_marker('security_checkpoint')):
+            pages.append(text)
+    store.close()
+
+    print(f"Benchmarking regex fallbacks on {len(pages)} specs pages...")
+
+    start = time.time()
+    sequential = [_sequential_specs(text) for text in pages]
+    sequential_time = time.time() - start
+
+    start = time.time()
+    compiled = [extract_fallback_specs(text) for text in pages]
+    compiled_time = time.time() - start
+
+    differ = sum(1 for a, b in zip(sequential, compiled) if a != b)
+    print(f"Sequential re.search: {sequential_time:.2f}s")
+    print(f"Anchored, compiled:   {compiled_time:.2f}s ({sequential_time / max(compiled_time, 1e-9):.1f}x)")
+    print(f"Pages with different results than the original regexes: {differ}")
+
+    report()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Specs page regex fallbacks')
+    parser.add_argument('command', choices=['bench'])
+    parser.add_argument('--html-dir', default=HTML_DIR)
+    args = parser.parse_args()
+
+    bench(args.html_dir)
@@ -0,0 +1,50 @@
+"""
+Specs page regex fallbacks (spec_patterns.py)
+
+Usage:
+    python -m pytest parsers/tests
+"""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import spec_patterns
+from spec_patterns import CAPACITY, YEAR, extract_fallback_specs
+
+# Pages with the two fields in different layouts: (html, capacity, operational date)
+MIXED_LAYOUT_PAGES = [
+    ('<table><tr><th>Fully Built-Out Power</th><td>6.8 MW</td></tr></table>\n'
+     '<pre>\n| Year Operational | 2011 |\n| Tier | III |\n</pre>', '6.8 MW', '2011'),
+    ('<pre>\n| Fully Built-Out Power | 6.8 MW |\n| Tier | III |\n</pre>\n'
+     '<table><tr><td>Year Operational</td><td>2011</td></tr></table>', '6.8 MW', '2011'),
+    ('<table><tr><td>Fully Built-Out Power</td><td>-</td></tr></table>\n'
+     '<script>{"Year Operational": "2011"}</script>\n<pre>| Owner | Acme |</pre>', 'NA', '2011'),
+]
+
+
+@pytest.mark.parametrize('field', [CAPACITY, YEAR], ids=lambda field: field.name)
+@pytest.mark.parametrize('html,capacity,operational_date', MIXED_LAYOUT_PAGES)
+def test_table_pattern_order_does_not_change_result(field, html, capacity, operational_date):
+    expected = {'capacity': capacity, 'operational_date': operational_date}[field.name]
+    patterns = field.patterns
+    try:
+        for order in itertools.permutations(patterns):
+            field.patterns = list(order)
+            assert (field.find(html, {}) or "NA") == expected
+    finally:
+        field.patterns = patterns
+
+
+@pytest.mark.parametrize('html,capacity,operational_date', MIXED_LAYOUT_PAGES)
+def test_fallback_specs(html, capacity, operational_date):
+    assert extract_fallback_specs(html) == (capacity, operational_date)
+
+
+def test_html_rows_match_original_regexes():
+    html = ('<table><tr><td>Fully Built-Out Power</td><td>6.8 MW</td></tr>'
+            '<tr><td>Year Operational</td><td>2011</td></tr></table>')
+    assert extract_fallback_specs(html) == spec_patterns._sequential_specs(html) == ('6.8 MW', '2011')
@@ -3,37 +3,36 @@
 City Web Scraper
 Loops through all city_links.txt files in each state folder
 and scrapes each city page, saving to data/raw/html/state/{state}/city/{city}/{city}.txt
+Already-scraped pages are looked up in the crawl manifest.
+
+Refresh mode (--refresh) re-requests already-scraped cities with
+If-None-Match / If-Modified-Since; a city page is only rewritten when its
+data changed.
+
+Usage:
+    python city_scraper.py
+    python city_scraper.py --refresh
 """
 
+import argparse
 import requests
 import os
 import time
 
+from crawl_manifest import CrawlManifest, manifest_path_for
+
 # Delay between requests in seconds (increase to avoid rate limiting)
 REQUEST_DELAY = 5
 
-def is_rate_limited(file_path):
-    """Check if a file contains rate limit message"""
-    if not os.path.exists(file_path):
-        return False
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    return 'Page View Limit Reached' in content
-
-def has_valid_content(file_path):
-    """Check if file exists and has valid (non-rate-limited) content"""
-    if not os.path.exists(file_path):
-        return False
-    return not is_rate_limited(file_path)
-
-def scrape_cities():
-    """Scrape all city pages from city_links.txt files"""
+def scrape_cities(refresh=False):
+    """Scrape all city pages from city_links.txt files (refresh: re-check scraped ones)"""
     
     headers = {
         'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
     }
     
     state_dir = '../data/raw/html/state'
+    manifest = CrawlManifest(manifest_path_for(state_dir))
     
     # Get all state folders
     states = [d for d in os.listdir(state_dir) if os.path.isdir(os.path.join(state_dir, d))]
@@ -44,6 +43,7 @@ def scrape_cities():
     total_success = 0
     total_skipped = 0
     total_errors = 0
+    total_unchanged = 0
     
     for state in sorted(states):
         city_links_file = f'{state_dir}/{state}/city_links.txt'
@@ -71,29 +71,42 @@ def scrape_cities():
             city_dir = f'{state_dir}/{state}/city/{city_name}'
             output_path = f'{city_dir}/{city_name}.txt'
             
-            if has_valid_content(output_path):
+            valid = manifest.has_valid(url, output_path)
+            if valid and not refresh:
                 print(f"  Skipping: {city_name} (already scraped)")
                 total_skipped += 1
                 continue
             
             print(f"  Scraping: {city_name}...", end=" ")
             
+            request_headers = dict(headers)
+            if valid:
+                request_headers.update(manifest.conditional_headers(url))
+            
             try:
-                response = requests.get(url, headers=headers, timeout=30)
+                response = requests.get(url, headers=request_headers, timeout=30)
                 response.raise_for_status()
                 
+                if response.status_code == 304 or (valid and not manifest.is_changed(url, response.text)):
+                    print("unchanged")
+                    manifest.record_unchanged(url, response.headers)
+                    total_unchanged += 1
+                    time.sleep(REQUEST_DELAY)
+                    continue
+                
                 # Check if we got rate limited
                 if 'Page View Limit Reached' in response.text:
                     print("RATE LIMITED - stopping")
                     print("\nRate limit hit! Wait a while and run again.")
+                    if not valid:
+                        manifest.record_page(url, output_path, response.text, response.status_code)
+                    manifest.close()
                     return
                 
-                # Create directory html/state/{state}/city/{city}/
-                os.makedirs(city_dir, exist_ok=True)
-                
-                # Save HTML as {city}.txt
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(response.text)
+                # Save HTML as html/state/{state}/city/{city}/{city}.txt
+                manifest.store.write(output_path, response.text)
+                manifest.record_page(url, output_path, response.text, response.status_code,
+                                     headers=response.headers)
                 
                 print(f"OK ({len(response.text)} chars)")
                 total_success += 1
@@ -104,6 +117,9 @@ def scrape_cities():
             except requests.RequestException as e:
                 print(f"ERROR: {e}")
                 total_errors += 1
+                manifest.record_error(url, output_path, getattr(e.response, 'status_code', None))
+    
+    manifest.close()
     
     print("\n" + "="*50)
     print("SCRAPING COMPLETE")
@@ -111,7 +127,14 @@ def scrape_cities():
     print(f"Successful: {total_success}")
     print(f"Skipped (already done): {total_skipped}")
     print(f"Errors: {total_errors}")
+    if refresh:
+        print(f"Unchanged: {total_unchanged}")
     print(f"Files saved to: data/raw/html/state/{{state}}/city/{{city}}/{{city}}.txt")
 
 if __name__ == "__main__":
-    scrape_cities()
+    parser = argparse.ArgumentParser(description='Scrape city pages from city_links.txt files')
+    parser.add_argument('--refresh', action='store_true',
+                        help='re-check already scraped cities with conditional requests, rewrite only changed ones')
+    args = parser.parse_args()
+    
+    scrape_cities(refresh=args.refresh)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Async Crawl Engine
+Runs page fetches through a bounded pool of asyncio workers that share a
+per-host token bucket. Network waits overlap, but the request rate to each
+host stays within the same politeness budget as the sequential scrapers
+(REQUEST_DELAY + jitter between requests).
+
+Requests are still made with requests.Session (one per worker, run in a
+thread), so no extra HTTP library is needed.
+
+Rate limit handling:
+- A "Page View Limit Reached" / "Vercel Security Checkpoint" response pauses
+  the whole host bucket, not just the worker that saw it
+- Each page is retried up to max_retries times before the crawl stops
+
+Conditional requests (refresh mode):
+- A job may carry 'headers' (If-None-Match / If-Modified-Since); a 304
+  response is counted as not_modified and nothing is written
+- An optional should_save(job, response) callback can veto writing a page
+  whose content hasn't changed; those are counted as unchanged
+"""
+
+import asyncio
+import os
+import random
+import time
+from urllib.parse import urlparse
+
+import requests
+
+# Markers returned by datacentermap.com instead of real content
+BLOCKED_MARKERS = ['Page View Limit Reached', 'Vercel Security Checkpoint']
+
+
+def is_blocked_page(text):
+    """Check if page text is a rate limit or security checkpoint page"""
+    return any(marker in text for marker in BLOCKED_MARKERS)
+
+
+class TokenBucket:
+    """Token bucket limiting the request rate to a single host"""
+
+    def __init__(self, rate, capacity=1, jitter=0):
+        self.rate = rate            # tokens per second
+        self.capacity = capacity    # max burst size
+        self.jitter = jitter        # random extra delay (seconds) per token
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def pause(self, seconds):
+        """Hand out no tokens for the given number of seconds (rate limit backoff)"""
+        resume_at = time.monotonic() + seconds
+        self.tokens = 0
+        self.updated = max(self.updated, resume_at)
+
+    async def acquire(self):
+        """Wait until a token is available and take it"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.updated:
+                    # Paused (or jitter pushed the refill clock forward)
+                    await asyncio.sleep(self.updated - now)
+                    continue
+
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    if self.jitter:
+                        self.updated += random.uniform(0, self.jitter)
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+async def _worker(queue, buckets, make_session, stats, stop, options):
+    """Fetch jobs from the queue until it is empty or the crawl is stopped"""
+    session = make_session()
+
+    while not stop.is_set():
+        try:
+            job = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+
+        bucket = buckets[urlparse(job['url']).netloc]
+        retries = 0
+
+        while not stop.is_set():
+            await bucket.acquire()
+
+            try:
+                response = await asyncio.to_thread(
+                    session.get, job['url'], headers=job.get('headers'), timeout=30
+                )
+                response.raise_for_status()
+            except requests.RequestException as e:
+                print(f"  ERROR: {job['label']}: {e}")
+                stats['errors'] += 1
+                if options['on_error']:
+                    options['on_error'](job, e)
+                break
+
+            if response.status_code == 304:
+                print(f"  NOT MODIFIED: {job['label']}")
+                stats['not_modified'] += 1
+                if options['on_unchanged']:
+                    options['on_unchanged'](job, response)
+                break
+
+            if is_blocked_page(response.text):
+                retries += 1
+                if retries > options['max_retries']:
+                    print(f"  RATE LIMITED: {job['label']} - max retries ({options['max_retries']}) exceeded, stopping")
+                    stop.set()
+                    break
+
+                print(f"  RATE LIMITED: {job['label']} - pausing {urlparse(job['url']).netloc} for "
+                      f"{options['rate_limit_wait']}s (retry {retries}/{options['max_retries']})")
+                bucket.pause(options['rate_limit_wait'])
+                # Rotate user agent after rate limit
+                session.close()
+                session = make_session()
+                continue
+
+            if options['should_save'] and not options['should_save'](job, response):
+                print(f"  UNCHANGED: {job['label']}")
+                stats['unchanged'] += 1
+                if options['on_unchanged']:
+                    options['on_unchanged'](job, response)
+                break
+
+            if options['store']:
+                options['store'].write(job['output_path'], response.text)
+            else:
+                os.makedirs(os.path.dirname(job['output_path']), exist_ok=True)
+                with open(job['output_path'], 'w', encoding='utf-8') as f:
+                    f.write(response.text)
+
+            print(f"  OK: {job['label']} ({len(response.text)} chars)")
+            stats['success'] += 1
+
+            if options['on_saved']:
+                options['on_saved'](job, response)
+            break
+
+    session.close()
+
+
+async def crawl(jobs, make_session, concurrency, delay, jitter=0, rate_limit_wait=15,
+                max_retries=10, store=None, on_saved=None, on_error=None, should_save=None,
+                on_unchanged=None):
+    """
+    Fetch and save jobs concurrently
+
+    Args:
+        jobs: list of dicts with 'url', 'output_path', 'label' and
+            optionally 'headers' (extra request headers)
+        make_session: callable returning a configured requests.Session
+        concurrency: number of workers
+        delay: minimum seconds between requests to the same host
+        jitter: random extra delay (0 to jitter seconds) per request
+        rate_limit_wait: seconds to pause a host after a rate limit page
+        max_retries: rate limit retries per page before stopping the crawl
+        store: optional page store (see page_store.py) to save pages into;
+            pages are written as loose files otherwise
+        on_saved: optional callback(job, response) after a page is saved
+        on_error: optional callback(job, exception) after a failed request
+        should_save: optional callback(job, response) returning False to skip
+            writing a page (e.g. its data is unchanged)
+        on_unchanged: optional callback(job, response) after a 304 or a page
+            skipped by should_save
+
+    Returns:
+        dict with 'success', 'errors', 'not_modified', 'unchanged' and 'stopped'
+    """
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    buckets = {}
+    for job in jobs:
+        host = urlparse(job['url']).netloc
+        if host not in buckets:
+            buckets[host] = TokenBucket(rate=1 / delay, jitter=jitter)
+
+    stats = {'success': 0, 'errors': 0, 'not_modified': 0, 'unchanged': 0}
+    stop = asyncio.Event()
+    options = {
+        'rate_limit_wait': rate_limit_wait,
+        'max_retries': max_retries,
+        'store': store,
+        'on_saved': on_saved,
+        'on_error': on_error,
+        'should_save': should_save,
+        'on_unchanged': on_unchanged,
+    }
+
+    workers = [
+        asyncio.create_task(_worker(queue, buckets, make_session, stats, stop, options))
+        for _ in range(max(1, min(concurrency, len(jobs))))
+    ]
+    await asyncio.gather(*workers)
+
+    stats['stopped'] = stop.is_set()
+    return stats
+
+
+def run_crawl(jobs, make_session, concurrency, delay, **kwargs):
+    """Synchronous wrapper around crawl()"""
+    return asyncio.run(crawl(jobs, make_session, concurrency, delay, **kwargs))
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Crawl Manifest
+SQLite record of every page the scrapers have fetched, keyed by URL.
+Resumed crawls look pages up here instead of opening and reading each saved
+HTML file to decide whether to skip it.
+
+Each row records:
+- path: where the page is saved under data/raw/html
+- status: 'ok', 'rate_limited' or 'error'
+- http_status, byte_size, content_hash (sha256), fetched_at
+- rate_limited: 1 if the page was a rate limit / security checkpoint page
+- etag, last_modified: validators from the response, sent back as
+  If-None-Match / If-Modified-Since when refreshing
+- data_hash: hash of the page's __NEXT_DATA__ pageProps (minus volatile
+  keys), so a redeploy or new geo cookie doesn't count as a change
+- checked_at: last time the page was requested; changed_at: last time its
+  data_hash changed
+
+Pages saved before the manifest existed are picked up lazily (first lookup
+falls back to reading the file) or all at once with the backfill command.
+To force a page to be refetched, delete its row (or the whole manifest) or
+the saved page.
+
+Usage:
+    python crawl_manifest.py backfill          # build from data/raw/html
+    python crawl_manifest.py stats
+    python crawl_manifest.py changed --since 2026-01-01   # pages changed since
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+from crawl_engine import is_blocked_page
+from next_data import page_data_hash
+from page_store import open_store
+
+HTML_DIR = '../data/raw/html'
+MANIFEST_NAME = 'crawl_manifest.sqlite'
+BASE_URL = 'https://www.datacentermap.com'
+
+# Columns added after the first manifest version (migrated in place)
+ADDED_COLUMNS = {
+    'etag': 'TEXT',
+    'last_modified': 'TEXT',
+    'data_hash': 'TEXT',
+    'checked_at': 'TEXT',
+    'changed_at': 'TEXT',
+}
+
+
+def manifest_path_for(state_dir):
+    """Manifest location for a data/raw/html/state tree (stored next to it)"""
+    return os.path.join(os.path.dirname(os.path.normpath(state_dir)), MANIFEST_NAME)
+
+
+def content_hash(text):
+    """sha256 of page text"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class CrawlManifest:
+    """URL-keyed record of fetched pages"""
+
+    def __init__(self, db_path=os.path.join(HTML_DIR, MANIFEST_NAME)):
+        self.db_path = db_path
+        # Pages live in the store for the html dir the manifest sits in
+        self.store = open_store(os.path.dirname(db_path) or '.')
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                path TEXT,
+                status TEXT,
+                http_status INTEGER,
+                byte_size INTEGER,
+                content_hash TEXT,
+                rate_limited INTEGER,
+                fetched_at TEXT
+            )
+        """)
+        existing = {row['name'] for row in self.conn.execute("PRAGMA table_info(pages)")}
+        for column, column_type in ADDED_COLUMNS.items():
+            if column not in existing:
+                self.conn.execute(f"ALTER TABLE pages ADD COLUMN {column} {column_type}")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_path ON pages (path)")
+        self.conn.commit()
+
+    def get(self, url):
+        """Return the manifest row for a URL as a dict, or None"""
+        row = self.conn.execute("SELECT * FROM pages WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def has_valid(self, url, path=None):
+        """
+        Check if a URL has been fetched with valid (non-rate-limited) content.
+        With a path, the page must also still be in the store (a deleted page
+        is fetched again). If the URL isn't in the manifest but a saved file
+        exists at path, the file is read once and recorded.
+        """
+        row = self.get(url)
+        if row is not None:
+            return row['status'] == 'ok' and (path is None or self.store.exists(path))
+
+        text = self.store.read(path) if path else None
+        if text is None:
+            return False
+
+        self.record_page(url, path, text, fetched_at=_file_time(path))
+        return not is_blocked_page(text)
+
+    def record_page(self, url, path, text, http_status=200, fetched_at=None, headers=None, commit=True):
+        """
+        Record a fetched page (rate limit pages are flagged, not treated as ok)
+
+        Returns:
+            True if the page's data differs from what was recorded before
+            (always True for new URLs), False otherwise
+        """
+        previous = self.get(url)
+        rate_limited = is_blocked_page(text)
+        data_hash = None if rate_limited else page_data_hash(text)
+        fetched_at = fetched_at or _now()
+        headers = headers or {}
+
+        changed = not rate_limited and (previous is None or self._stored_data_hash(previous) != data_hash)
+        if changed or previous is None:
+            changed_at = fetched_at
+        else:
+            changed_at = previous['changed_at'] or previous['fetched_at']
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, path, status, http_status, byte_size, content_hash, "
+            "rate_limited, fetched_at, etag, last_modified, data_hash, checked_at, changed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                url,
+                path,
+                'rate_limited' if rate_limited else 'ok',
+                http_status,
+                len(text.encode('utf-8')),
+                content_hash(text),
+                int(rate_limited),
+                fetched_at,
+                headers.get('ETag'),
+                headers.get('Last-Modified'),
+                data_hash,
+                fetched_at,
+                changed_at,
+            )
+        )
+        if commit:
+            self.conn.commit()
+        return changed
+
+    def record_unchanged(self, url, headers=None, commit=True):
+        """Record a refresh that found no change (304, or same data_hash)"""
+        headers = headers or {}
+        self.conn.execute(
+            "UPDATE pages SET checked_at = ?, "
+            "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE url = ?",
+            (_now(), headers.get('ETag'), headers.get('Last-Modified'), url)
+        )
+        if commit:
+            self.conn.commit()
+
+    def conditional_headers(self, url):
+        """If-None-Match / If-Modified-Since headers for refetching a URL"""
+        row = self.get(url)
+        headers = {}
+        if row is None or row['status'] != 'ok':
+            return headers
+        if row['etag']:
+            headers['If-None-Match'] = row['etag']
+        if row['last_modified']:
+            headers['If-Modified-Since'] = row['last_modified']
+        return headers
+
+    def is_changed(self, url, text):
+        """Check if text carries different data than the recorded page"""
+        row = self.get(url)
+        if row is None or row['status'] != 'ok':
+            return True
+        return self._stored_data_hash(row) != page_data_hash(text)
+
+    def _stored_data_hash(self, row):
+        """data_hash for a manifest row, computed from the saved page for rows recorded before it existed"""
+        if row['data_hash']:
+            return row['data_hash']
+        text = self.store.read(row['path']) if row['path'] else None
+        return page_data_hash(text) if text is not None else None
+
+    def changed_since(self, since):
+        """Return (url, path) for pages whose data changed at or after an ISO timestamp"""
+        rows = self.conn.execute(
+            "SELECT url, path FROM pages WHERE status = 'ok' AND changed_at >= ? ORDER BY path",
+            (since,)
+        ).fetchall()
+        return [(row['url'], row['path']) for row in rows]
+
+    def record_error(self, url, path, http_status=None):
+        """Record a failed fetch"""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO pages (url, path, status, http_status, rate_limited, fetched_at) "
+            "VALUES (?, ?, 'error', ?, 0, ?)",
+            (url, path, http_status, _now())
+        )
+        self.conn.commit()
+
+    def stats(self):
+        """Return {status: count}"""
+        rows = self.conn.execute("SELECT status, COUNT(*) FROM pages GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+        self.store.close()
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+def _file_time(path):
+    if not os.path.exists(path):
+        # Page only exists in a pack store
+        return _now()
+    return datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).isoformat(timespec='seconds')
+
+
+def iter_saved_pages(html_dir=HTML_DIR, base_url=BASE_URL, store=None):
+    """
+    Yield (url, path) for every crawl target the scrapers save under html_dir,
+    using the same URL -> path rules as usa/state/city/specs scrapers
+    """
+    from specs_scraper import extract_dc_urls_from_city
+
+    if store is None:
+        store = open_store(html_dir)
+
+    yield f'{base_url}/usa/', f'{html_dir}/usa.txt'
+
+    state_dir = f'{html_dir}/state'
+    states = sorted({path.split('/')[-2] for path in store.paths('state/*/*.txt')})
+
+    for state in states:
+        yield f'{base_url}/usa/{state}/', f'{state_dir}/{state}/{state}.txt'
+
+        city_links_file = f'{state_dir}/{state}/city_links.txt'
+        if not os.path.exists(city_links_file):
+            continue
+
+        with open(city_links_file, 'r', encoding='utf-8') as f:
+            city_urls = [line.strip() for line in f if line.strip()]
+
+        for city_url in city_urls:
+            city = city_url.rstrip('/').split('/')[-1]
+            city_file = f'{state_dir}/{state}/city/{city}/{city}.txt'
+            yield city_url, city_file
+
+            for dc_info in extract_dc_urls_from_city(city_file, base_url, store):
+                yield dc_info['specs_url'], f"{state_dir}/{state}/city/{city}/dc/{dc_info['link']}/specs.txt"
+
+
+def backfill(html_dir=HTML_DIR, db_path=None):
+    """Build the manifest from pages already saved under html_dir"""
+    manifest = CrawlManifest(db_path or os.path.join(html_dir, MANIFEST_NAME))
+
+    recorded = 0
+    for url, path in iter_saved_pages(html_dir, store=manifest.store):
+        text = manifest.store.read(path)
+        if text is None:
+            continue
+
+        manifest.record_page(url, path, text, fetched_at=_file_time(path), commit=False)
+        recorded += 1
+
+    manifest.commit()
+    stats = manifest.stats()
+    manifest.close()
+
+    print(f"Recorded {recorded} saved pages in {manifest.db_path}")
+    for status, count in sorted(stats.items()):
+        print(f"  {status}: {count}")
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Crawl manifest tools')
+    parser.add_argument('command', choices=['backfill', 'stats', 'changed'])
+    parser.add_argument('--html-dir', default=HTML_DIR)
+    parser.add_argument('--since', default='', help='ISO timestamp for the changed command')
+    args = parser.parse_args()
+
+    if args.command == 'backfill':
+        backfill(args.html_dir)
+    else:
+        db_path = os.path.join(args.html_dir, MANIFEST_NAME)
+        if not os.path.exists(db_path):
+            print(f"No manifest at {db_path} - run: python crawl_manifest.py backfill")
+            sys.exit(1)
+        manifest = CrawlManifest(db_path)
+        if args.command == 'changed':
+            for url, path in manifest.changed_since(args.since):
+                print(path)
+        else:
+            for status, count in sorted(manifest.stats().items()):
+                print(f"{status}: {count}")
+        manifest.close()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+__NEXT_DATA__ helpers
+datacentermap.com pages are Next.js pages: the data behind each page is a
+JSON blob in <script id="__NEXT_DATA__">. These helpers pull it out once so
+callers don't each re-run the regex and json.loads.
+
+Sidecar:
+Whenever a page is saved through the page store, its decoded pageProps are
+appended to data/raw/html/next_data.jsonl, one record per line:
+
+    {"path": "state/alabama/city/mobile/dc/server-corps/specs.txt",
+     "markers": ["no_data_supplied"], "page_props": {...}}
+
+page_props is null when the page has no (valid) __NEXT_DATA__; markers
+lists the PAGE_MARKERS phrases found anywhere in the page text. Later
+records for a path replace earlier ones. Parsers read the sidecar and only
+open the HTML when they need a regex fallback (see Page).
+
+Usage:
+    python next_data.py build     # (re)build the sidecar from saved pages
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+
+NEXT_DATA_RE = re.compile(r'<script id="__NEXT_DATA__" type="application/json">(.+?)</script>')
+
+HTML_DIR = '../data/raw/html'
+SIDECAR_NAME = 'next_data.jsonl'
+
+# Phrases parsers look for in the page text (not only in __NEXT_DATA__)
+PAGE_MARKERS = {
+    'no_data_supplied': 'No data supplied by',
+    'page_view_limit': 'Page View Limit Reached',
+    'security_checkpoint': 'Vercel Security Checkpoint',
+}
+
+# pageProps keys that change between requests without the page data changing
+# (geo cookies differ per request, promotions rotate)
+VOLATILE_PAGE_PROPS = ['cookies', 'promotion', 'promotions']
+
+
+def extract_next_data(content):
+    """Return the decoded __NEXT_DATA__ JSON, or None"""
+    match = NEXT_DATA_RE.search(content)
+    if not match:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return None
+
+
+def extract_page_props(content):
+    """Return props.pageProps from __NEXT_DATA__, or None"""
+    data = extract_next_data(content)
+    if data is None:
+        return None
+    return data.get('props', {}).get('pageProps', {})
+
+
+def page_data_hash(content):
+    """
+    Hash of the page's data rather than its bytes
+    Uses pageProps without volatile keys, so redeploys (new buildId) and
+    per-request cookies don't count as changes. Falls back to the raw text.
+    """
+    page_props = extract_page_props(content)
+    if page_props is None:
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    stable = {k: v for k, v in page_props.items() if k not in VOLATILE_PAGE_PROPS}
+    blob = json.dumps(stable, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(blob.encode('utf-8')).hexdigest()
+
+
+def make_record(key, text):
+    """Sidecar record for a page saved at key (path relative to the html dir)"""
+    return {
+        'path': key,
+        'markers': [name for name, phrase in PAGE_MARKERS.items() if phrase in text],
+        'page_props': extract_page_props(text),
+    }
+
+
+class NextDataSidecar:
+    """Append-only JSONL of decoded pageProps, next to the saved pages"""
+
+    def __init__(self, html_dir=HTML_DIR):
+        self.html_dir = html_dir
+        self.path = os.path.join(html_dir, SIDECAR_NAME)
+
+    def append(self, path, text):
+        key = os.path.relpath(path, self.html_dir).replace(os.sep, '/')
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(make_record(key, text), separators=(',', ':')) + '\n')
+
+
+def load_sidecar(html_dir=HTML_DIR):
+    """Return {path: record} from the sidecar (paths as the page store builds them)"""
+    records = {}
+    sidecar_path = os.path.join(html_dir, SIDECAR_NAME)
+    if not os.path.exists(sidecar_path):
+        return records
+
+    with open(sidecar_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            records[f"{html_dir}/{record['path']}"] = record
+    return records
+
+
+def load_sidecar_lines(html_dir=HTML_DIR):
+    """
+    Like load_sidecar, but leave each record as its raw JSON line so it can
+    be decoded later (e.g. in a worker process). Relies on records being
+    written with "path" as their first key.
+    """
+    lines = {}
+    sidecar_path = os.path.join(html_dir, SIDECAR_NAME)
+    if not os.path.exists(sidecar_path):
+        return lines
+
+    prefix = len('{"path":"')
+    with open(sidecar_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            key = line[prefix:line.index('"', prefix)]
+            lines[f'{html_dir}/{key}'] = line
+    return lines
+
+
+class Page:
+    """
+    A saved page as the parsers see it: pageProps and markers come from the
+    sidecar record when there is one; the HTML is only read from the store
+    if a caller asks for it (or there is no record)
+    """
+
+    def __init__(self, path, record=None, store=None, html=None):
+        self.path = path
+        self.record = record
+        self.store = store
+        self._html = html
+
+    @classmethod
+    def from_html(cls, html, path=None):
+        return cls(path, html=html)
+
+    @property
+    def html(self):
+        if self._html is None:
+            self._html = self.store.read(self.path) or ''
+        return self._html
+
+    @property
+    def page_props(self):
+        if self.record is None:
+            self.record = make_record(self.path, self.html)
+        return self.record['page_props']
+
+    def has_marker(self, name):
+        if self.record is None:
+            return PAGE_MARKERS[name] in self.html
+        return name in self.record['markers']
+
+
+def iter_pages(store, pattern, records=None):
+    """
+    Yield Page objects for every page in the store matching pattern,
+    backed by sidecar records (loaded from the store's html dir if not given)
+    """
+    if records is None:
+        records = load_sidecar(store.html_dir)
+    for path in store.paths(pattern):
+        yield Page(path, records.get(path), store)
+
+
+def build_sidecar(html_dir=HTML_DIR):
+    """Rewrite the sidecar from every page currently in the page store"""
+    from page_store import PAGE_PATTERNS, is_page_path, open_store
+
+    store = open_store(html_dir)
+    sidecar_path = os.path.join(html_dir, SIDECAR_NAME)
+    tmp_path = sidecar_path + '.tmp'
+
+    start = time.time()
+    written = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for pattern in PAGE_PATTERNS:
+            for path, text in store.iter_pages(pattern):
+                if not is_page_path(path):
+                    continue
+                key = os.path.relpath(path, html_dir).replace(os.sep, '/')
+                f.write(json.dumps(make_record(key, text), separators=(',', ':')) + '\n')
+                written += 1
+    os.replace(tmp_path, sidecar_path)
+    store.close()
+
+    print(f"Wrote {written} records to {sidecar_path} in {time.time() - start:.1f}s "
+          f"({os.path.getsize(sidecar_path) / 1e6:.1f} MB)")
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='__NEXT_DATA__ sidecar tools')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--html-dir', default=HTML_DIR)
+    args = parser.parse_args()
+
+    build_sidecar(args.html_dir)
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Raw Page Store
+Storage for the scraped HTML under data/raw/html, behind one small interface
+so scrapers and parsers don't care how pages are kept on disk:
+
+- DirectoryStore: loose .txt files (the original layout)
+- PackStore: compressed, content-addressed pack files with a SQLite index
+
+PackStore layout (data/raw/html/pack/):
+- pages-00.pack ... pages-03.pack: compressed page blobs, appended to the
+  shard picked by the blob's sha256 (identical pages are stored once)
+- index.sqlite: blobs(hash -> shard, offset, length, codec) and
+  pages(path -> hash), where path is relative to data/raw/html
+  (e.g. state/alabama/city/mobile/dc/server-corps/specs.txt)
+
+Blobs are compressed with zstd when the zstandard package is installed,
+otherwise gzip. The codec is stored per blob, so packs written with either
+can be read as long as the codec is available.
+
+Pages are stored byte for byte (no newline translation), so an export
+reproduces the original files exactly. Both stores take paths the way the
+scrapers build them ('../data/raw/html/state/...'). open_store() returns the PackStore once
+data/raw/html/pack exists, otherwise the DirectoryStore.
+
+Usage:
+    python page_store.py import     # loose files -> pack
+    python page_store.py export     # pack -> loose files
+    python page_store.py stats
+"""
+
+import argparse
+import fnmatch
+import glob
+import gzip
+import hashlib
+import os
+import sqlite3
+import time
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from next_data import NextDataSidecar
+
+HTML_DIR = '../data/raw/html'
+PACK_DIR_NAME = 'pack'
+INDEX_NAME = 'index.sqlite'
+NUM_SHARDS = 4
+DEFAULT_CODEC = 'zstd' if zstandard else 'gzip'
+
+# Everything the scrapers save under data/raw/html (filtered by is_page_path)
+PAGE_PATTERNS = [
+    'usa.txt',
+    'state/*/*.txt',
+    'state/*/city/*/*.txt',
+    'state/*/city/*/dc/*/specs.txt',
+]
+
+
+def compress(text, codec=DEFAULT_CODEC):
+    data = text.encode('utf-8')
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+
+def decompress(blob, codec):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Pack contains zstd blobs - install zstandard to read them")
+        return zstandard.ZstdDecompressor().decompress(blob).decode('utf-8')
+    return gzip.decompress(blob).decode('utf-8')
+
+
+class DirectoryStore:
+    """Pages as loose files under html_dir"""
+
+    def __init__(self, html_dir=HTML_DIR, sidecar=None):
+        self.html_dir = html_dir
+        self.sidecar = sidecar
+
+    def read(self, path):
+        """Return page text, or None if there is no such page"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            return f.read()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(text)
+        if self.sidecar and is_page_path(path):
+            self.sidecar.append(path, text)
+
+    def exists(self, path):
+        return os.path.exists(path)
+
+    def fingerprint(self, path):
+        """Cheap change marker for a page (mtime + size), or None if missing"""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return f'{st.st_mtime_ns}-{st.st_size}'
+
+    def paths(self, pattern):
+        """Sorted paths matching a glob relative to html_dir"""
+        return sorted(glob.glob(f'{self.html_dir}/{pattern}'))
+
+    def iter_pages(self, pattern):
+        """Yield (path, text) for pages matching a glob relative to html_dir"""
+        for path in self.paths(pattern):
+            yield path, self.read(path)
+
+    def close(self):
+        pass
+
+
+class PackStore:
+    """Compressed, content-addressed pages in a few pack files"""
+
+    def __init__(self, pack_dir=os.path.join(HTML_DIR, PACK_DIR_NAME), html_dir=None, codec=DEFAULT_CODEC,
+                 sidecar=None):
+        self.pack_dir = pack_dir
+        self.html_dir = html_dir or os.path.dirname(os.path.normpath(pack_dir))
+        self.codec = codec
+        self.sidecar = sidecar
+        self.handles = {}
+        os.makedirs(pack_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(os.path.join(pack_dir, INDEX_NAME))
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                shard INTEGER,
+                offset INTEGER,
+                length INTEGER,
+                size INTEGER,
+                codec TEXT
+            )
+        """)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                path TEXT PRIMARY KEY,
+                hash TEXT
+            )
+        """)
+        self.conn.commit()
+
+    def _key(self, path):
+        return os.path.relpath(path, self.html_dir).replace(os.sep, '/')
+
+    def _path(self, key):
+        return f'{self.html_dir}/{key}'
+
+    def _shard_file(self, shard):
+        return os.path.join(self.pack_dir, f'pages-{shard:02d}.pack')
+
+    def _read_blob(self, shard, offset, length, codec):
+        handle = self.handles.get(shard)
+        if handle is None:
+            handle = self.handles[shard] = open(self._shard_file(shard), 'rb')
+        handle.seek(offset)
+        return decompress(handle.read(length), codec)
+
+    def read(self, path):
+        """Return page text, or None if there is no such page"""
+        row = self.conn.execute(
+            "SELECT b.shard, b.offset, b.length, b.codec FROM pages p JOIN blobs b ON p.hash = b.hash "
+            "WHERE p.path = ?", (self._key(path),)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._read_blob(*row)
+
+    def write(self, path, text, commit=True):
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+        if self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+            blob = compress(text, self.codec)
+            shard = int(digest[:2], 16) % NUM_SHARDS
+
+            # Close any cached read handle so it sees the appended data
+            handle = self.handles.pop(shard, None)
+            if handle:
+                handle.close()
+
+            with open(self._shard_file(shard), 'ab') as f:
+                offset = f.tell()
+                f.write(blob)
+
+            self.conn.execute(
+                "INSERT INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, shard, offset, len(blob), len(text.encode('utf-8')), self.codec)
+            )
+
+        self.conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?)", (self._key(path), digest))
+        if commit:
+            self.conn.commit()
+        if self.sidecar and is_page_path(path):
+            self.sidecar.append(path, text)
+
+    def exists(self, path):
+        return self.conn.execute("SELECT 1 FROM pages WHERE path = ?", (self._key(path),)).fetchone() is not None
+
+    def fingerprint(self, path):
+        """Change marker for a page (its content hash), or None if missing"""
+        row = self.conn.execute("SELECT hash FROM pages WHERE path = ?", (self._key(path),)).fetchone()
+        return row[0] if row else None
+
+    def paths(self, pattern):
+        """Sorted paths matching a glob relative to html_dir"""
+        keys = [row[0] for row in self.conn.execute("SELECT path FROM pages ORDER BY path")]
+        return [self._path(key) for key in keys if _match(key, pattern)]
+
+    def iter_pages(self, pattern):
+        """Yield (path, text) for pages matching a glob relative to html_dir, in path order"""
+        rows = self.conn.execute(
+            "SELECT p.path, b.shard, b.offset, b.length, b.codec FROM pages p JOIN blobs b ON p.hash = b.hash "
+            "ORDER BY p.path"
+        ).fetchall()
+        for key, shard, offset, length, codec in rows:
+            if _match(key, pattern):
+                yield self._path(key), self._read_blob(shard, offset, length, codec)
+
+    def stats(self):
+        pages, = self.conn.execute("SELECT COUNT(*) FROM pages").fetchone()
+        blobs, stored, raw = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()
+        pack_bytes = sum(os.path.getsize(self._shard_file(s)) for s in range(NUM_SHARDS)
+                         if os.path.exists(self._shard_file(s)))
+        return {'pages': pages, 'blobs': blobs, 'raw_bytes': raw, 'stored_bytes': stored, 'pack_bytes': pack_bytes}
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        for handle in self.handles.values():
+            handle.close()
+        self.handles = {}
+        self.conn.commit()
+        self.conn.close()
+
+
+def _match(key, pattern):
+    # Path-segment aware glob: '*' doesn't cross '/'
+    key_parts = key.split('/')
+    pattern_parts = pattern.split('/')
+    return len(key_parts) == len(pattern_parts) and all(
+        fnmatch.fnmatchcase(k, p) for k, p in zip(key_parts, pattern_parts)
+    )
+
+
+def is_page_path(path):
+    """True for scraped pages, False for derived files like state/{state}/city_links.txt"""
+    parts = path.split('/')
+    return parts[-1] in ('usa.txt', 'specs.txt') or parts[-1] == f'{parts[-2]}.txt'
+
+
+def pack_dir_for(html_dir=HTML_DIR):
+    return os.path.join(html_dir, PACK_DIR_NAME)
+
+
+def open_store(html_dir=HTML_DIR):
+    """
+    PackStore if html_dir has been imported into a pack, otherwise
+    DirectoryStore; pages written through it are added to the
+    __NEXT_DATA__ sidecar (next_data.jsonl)
+    """
+    sidecar = NextDataSidecar(html_dir)
+    pack_dir = pack_dir_for(html_dir)
+    if os.path.exists(os.path.join(pack_dir, INDEX_NAME)):
+        return PackStore(pack_dir, html_dir, sidecar=sidecar)
+    return DirectoryStore(html_dir, sidecar=sidecar)
+
+
+def import_directory(html_dir=HTML_DIR, delete_loose=False):
+    """Copy every loose page under html_dir into the pack"""
+    source = DirectoryStore(html_dir)
+    pack = PackStore(pack_dir_for(html_dir), html_dir)
+
+    start = time.time()
+    imported = 0
+    for pattern in PAGE_PATTERNS:
+        for path, text in source.iter_pages(pattern):
+            if not is_page_path(path):
+                continue
+            pack.write(path, text, commit=False)
+            imported += 1
+            if delete_loose:
+                os.remove(path)
+    pack.commit()
+
+    stats = pack.stats()
+    pack.close()
+    print(f"Imported {imported} pages into {pack.pack_dir} in {time.time() - start:.1f}s")
+    _print_stats(stats)
+    return stats
+
+
+def export_directory(html_dir=HTML_DIR):
+    """Write every page in the pack back out as loose files"""
+    pack = PackStore(pack_dir_for(html_dir), html_dir)
+    target = DirectoryStore(html_dir)
+
+    exported = 0
+    for pattern in PAGE_PATTERNS:
+        for path, text in pack.iter_pages(pattern):
+            target.write(path, text)
+            exported += 1
+    pack.close()
+
+    print(f"Exported {exported} pages to {html_dir}")
+    return exported
+
+
+def _print_stats(stats):
+    print(f"  pages: {stats['pages']} ({stats['blobs']} unique)")
+    print(f"  raw: {stats['raw_bytes'] / 1e6:.1f} MB")
+    print(f"  packed: {stats['pack_bytes'] / 1e6:.1f} MB ({DEFAULT_CODEC} default codec)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Raw page store tools')
+    parser.add_argument('command', choices=['import', 'export', 'stats'])
+    parser.add_argument('--html-dir', default=HTML_DIR)
+    parser.add_argument('--delete-loose', action='store_true',
+                        help='remove loose files once they are in the pack (import)')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        import_directory(args.html_dir, args.delete_loose)
+    elif args.command == 'export':
+        export_directory(args.html_dir)
+    else:
+        pack = PackStore(pack_dir_for(args.html_dir), args.html_dir)
+        _print_stats(pack.stats())
+        pack.close()
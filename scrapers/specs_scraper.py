@@ -7,19 +7,36 @@ Saves to data/raw/html/state/{state}/city/{city}/dc/{dc-name}/specs.txt
 
 Implements rate limiting strategies:
 - Configurable delay between requests
-- Skip already-scraped content
+- Skip already-scraped content (looked up in the crawl manifest)
 - Detect and stop on rate limit
 - Resumable (run multiple times)
 - Uses requests Session for cookie persistence
+- Optional async mode (--async): concurrent workers sharing a per-host
+  token bucket, so network waits overlap at the same request rate
+- Refresh mode (--refresh): re-request every specs page with
+  If-None-Match / If-Modified-Since from the manifest; only pages whose data
+  changed are rewritten
+
+Usage:
+    python specs_scraper.py
+    python specs_scraper.py --async --concurrency 4
+    python specs_scraper.py --refresh
+    python specs_scraper.py --async --base-url http://localhost:8000  # stub server
 """
 
+import argparse
 import requests
-import os
 import time
 import re
 import json
 import random
 
+from crawl_engine import run_crawl
+from crawl_manifest import CrawlManifest, manifest_path_for
+from page_store import open_store
+
+BASE_URL = 'https://www.datacentermap.com'
+
 # Delay between requests in seconds (increase to avoid rate limiting)
 REQUEST_DELAY = 3
 # Add random jitter to delay (0 to this value in seconds)
@@ -28,6 +45,9 @@ JITTER_MAX = 1
 RATE_LIMIT_WAIT_MINUTES = 0.25
 # Maximum retries after rate limit before giving up
 MAX_RATE_LIMIT_RETRIES = 10
+# Number of concurrent workers in async mode (request rate is still
+# limited to one request per REQUEST_DELAY + jitter per host)
+CONCURRENCY = 4
 
 # Rotate user agents to reduce detection
 USER_AGENTS = [
@@ -37,27 +57,27 @@ USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:121.0) Gecko/20100101 Firefox/121.0',
 ]
 
-def is_rate_limited(file_path):
-    """Check if a file contains rate limit message"""
-    if not os.path.exists(file_path):
-        return False
-    with open(file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    return 'Page View Limit Reached' in content
-
-def has_valid_content(file_path):
-    """Check if file exists and has valid (non-rate-limited) content"""
-    if not os.path.exists(file_path):
-        return False
-    return not is_rate_limited(file_path)
+def make_session():
+    """Create a requests Session with browser-like headers and a random user agent"""
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': random.choice(USER_AGENTS),
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1',
+    })
+    return session
 
-def extract_dc_urls_from_city(city_file_path):
-    """Extract data center URLs from a city txt file"""
-    if not os.path.exists(city_file_path):
-        return []
+def extract_dc_urls_from_city(city_file_path, base_url=BASE_URL, store=None):
+    """Extract data center URLs from a city txt file (read through the page store)"""
+    if store is None:
+        store = open_store()
     
-    with open(city_file_path, 'r', encoding='utf-8') as f:
-        content = f.read()
+    content = store.read(city_file_path)
+    if content is None:
+        return []
     
     # Skip rate-limited files
     if 'Page View Limit Reached' in content:
@@ -85,7 +105,7 @@ def extract_dc_urls_from_city(city_file_path):
                     'url': url,
                     'name': name,
                     'link': link,
-                    'specs_url': f"https://www.datacentermap.com{url}specs/"
+                    'specs_url': f"{base_url}{url}specs/"
                 })
         
         return urls
@@ -93,26 +113,29 @@ def extract_dc_urls_from_city(city_file_path):
     except json.JSONDecodeError:
         return []
 
+def list_cities(store):
+    """Return {state: [city, ...]} for every saved city page in the store"""
+    cities_by_state = {}
+    for path in store.paths('state/*/city/*/*.txt'):
+        parts = path.split('/')
+        state, city = parts[-4], parts[-2]
+        if parts[-1] == f'{city}.txt':
+            cities_by_state.setdefault(state, []).append(city)
+    return cities_by_state
+
 def scrape_specs():
     """Scrape all data center specs pages"""
     
     # Use a session to maintain cookies across requests
-    session = requests.Session()
-    
-    # Set initial headers
-    session.headers.update({
-        'User-Agent': random.choice(USER_AGENTS),
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate, br',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1',
-    })
+    session = make_session()
     
     state_dir = '../data/raw/html/state'
+    manifest = CrawlManifest(manifest_path_for(state_dir))
+    store = manifest.store
     
     # Get all state folders
-    states = [d for d in os.listdir(state_dir) if os.path.isdir(os.path.join(state_dir, d))]
+    cities_by_state = list_cities(store)
+    states = list(cities_by_state)
     
     print(f"Found {len(states)} state folders")
     print(f"Using {REQUEST_DELAY}s delay (+0-{JITTER_MAX}s jitter) between requests")
@@ -124,11 +147,7 @@ def scrape_specs():
     
     for state in sorted(states):
         city_dir = f'{state_dir}/{state}/city'
-        
-        if not os.path.exists(city_dir):
-            continue
-        
-        cities = [d for d in os.listdir(city_dir) if os.path.isdir(os.path.join(city_dir, d))]
+        cities = cities_by_state[state]
         
         state_dcs = 0
         
@@ -136,7 +155,7 @@ def scrape_specs():
             city_file = f'{city_dir}/{city}/{city}.txt'
             
             # Get all DC URLs from this city
-            dc_urls = extract_dc_urls_from_city(city_file)
+            dc_urls = extract_dc_urls_from_city(city_file, store=store)
             
             if not dc_urls:
                 continue
@@ -154,7 +173,7 @@ def scrape_specs():
                 output_path = f'{dc_dir}/specs.txt'
                 
                 # Check if we already have valid content
-                if has_valid_content(output_path):
+                if manifest.has_valid(specs_url, output_path):
                     total_skipped += 1
                     continue
                 
@@ -179,6 +198,9 @@ def scrape_specs():
                                 print("\n" + "="*50)
                                 print(f"Progress: {total_success} scraped, {total_skipped} skipped, {total_errors} errors")
                                 print("="*50)
+                                manifest.record_page(specs_url, output_path, response.text, response.status_code,
+                                                     headers=response.headers)
+                                manifest.close()
                                 return
                             
                             wait_time = RATE_LIMIT_WAIT_MINUTES * 60
@@ -194,6 +216,7 @@ def scrape_specs():
                     except requests.RequestException as e:
                         print(f"ERROR: {e}")
                         total_errors += 1
+                        manifest.record_error(specs_url, output_path, getattr(e.response, 'status_code', None))
                         break
                 else:
                     # Max retries exceeded in while loop
@@ -201,12 +224,10 @@ def scrape_specs():
                 
                 # Only save if we got a valid response (not rate limited)
                 if 'Page View Limit Reached' not in response.text and 'Vercel Security Checkpoint' not in response.text:
-                    # Create directory
-                    os.makedirs(dc_dir, exist_ok=True)
-                    
                     # Save HTML as specs.txt
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        f.write(response.text)
+                    store.write(output_path, response.text)
+                    manifest.record_page(specs_url, output_path, response.text, response.status_code,
+                                         headers=response.headers)
                     
                     print(f"OK ({len(response.text)} chars)")
                     total_success += 1
@@ -218,6 +239,8 @@ def scrape_specs():
         if state_dcs > 0:
             print(f"\n{state.upper()}: {state_dcs} data centers processed\n")
     
+    manifest.close()
+    
     print("\n" + "="*50)
     print("SCRAPING COMPLETE")
     print("="*50)
@@ -227,5 +250,137 @@ def scrape_specs():
     print(f"Errors: {total_errors}")
     print(f"Files saved to: data/raw/html/state/{{state}}/city/{{city}}/dc/{{dc}}/specs.txt")
 
+def find_pending_specs(manifest, state_dir='../data/raw/html/state', base_url=BASE_URL, refresh=False):
+    """
+    Walk the city pages and return (jobs, total_dcs, total_skipped)
+    Jobs are specs pages that don't have valid content in the manifest yet,
+    or with refresh=True every specs page (with conditional request headers).
+    """
+    jobs = []
+    total_dcs = 0
+    total_skipped = 0
+    
+    cities_by_state = list_cities(manifest.store)
+    
+    for state in sorted(cities_by_state):
+        city_dir = f'{state_dir}/{state}/city'
+        
+        for city in sorted(cities_by_state[state]):
+            for dc_info in extract_dc_urls_from_city(f'{city_dir}/{city}/{city}.txt', base_url, manifest.store):
+                total_dcs += 1
+                output_path = f"{city_dir}/{city}/dc/{dc_info['link']}/specs.txt"
+                
+                valid = manifest.has_valid(dc_info['specs_url'], output_path)
+                if valid and not refresh:
+                    total_skipped += 1
+                    continue
+                
+                jobs.append({
+                    'url': dc_info['specs_url'],
+                    'output_path': output_path,
+                    'label': f"{state}/{city}/{dc_info['link']}",
+                    'headers': manifest.conditional_headers(dc_info['specs_url']) if valid else {},
+                })
+    
+    return jobs, total_dcs, total_skipped
+
+def scrape_specs_async(state_dir='../data/raw/html/state', base_url=BASE_URL, concurrency=CONCURRENCY):
+    """Scrape all data center specs pages with concurrent workers"""
+    
+    manifest = CrawlManifest(manifest_path_for(state_dir))
+    jobs, total_dcs, total_skipped = find_pending_specs(manifest, state_dir, base_url)
+    
+    print(f"Found {total_dcs} data centers ({total_skipped} already scraped, {len(jobs)} to fetch)")
+    print(f"Using {concurrency} workers, {REQUEST_DELAY}s delay (+0-{JITTER_MAX}s jitter) between requests per host")
+    
+    stats = run_crawl(
+        jobs,
+        make_session,
+        concurrency=concurrency,
+        delay=REQUEST_DELAY,
+        jitter=JITTER_MAX,
+        rate_limit_wait=RATE_LIMIT_WAIT_MINUTES * 60,
+        max_retries=MAX_RATE_LIMIT_RETRIES,
+        store=manifest.store,
+        on_saved=lambda job, response: manifest.record_page(
+            job['url'], job['output_path'], response.text, response.status_code, headers=response.headers),
+        on_error=lambda job, e: manifest.record_error(
+            job['url'], job['output_path'], getattr(e.response, 'status_code', None)),
+    )
+    manifest.close()
+    
+    print("\n" + "="*50)
+    print("SCRAPING STOPPED (rate limited)" if stats['stopped'] else "SCRAPING COMPLETE")
+    print("="*50)
+    print(f"Total data centers found: {total_dcs}")
+    print(f"Successful: {stats['success']}")
+    print(f"Skipped (already done): {total_skipped}")
+    print(f"Errors: {stats['errors']}")
+    print(f"Files saved to: {state_dir}/{{state}}/city/{{city}}/dc/{{dc}}/specs.txt")
+    
+    return stats
+
+def refresh_specs(state_dir='../data/raw/html/state', base_url=BASE_URL, concurrency=CONCURRENCY):
+    """
+    Re-check every specs page with conditional requests
+    Pages are only rewritten when their data changed (parse_corpus then
+    re-parses just those, through its parse cache).
+    """
+    
+    manifest = CrawlManifest(manifest_path_for(state_dir))
+    jobs, total_dcs, _ = find_pending_specs(manifest, state_dir, base_url, refresh=True)
+    def on_saved(job, response):
+        manifest.record_page(job['url'], job['output_path'], response.text,
+                             response.status_code, headers=response.headers)
+    
+    print(f"Refreshing {len(jobs)} data center specs pages")
+    print(f"Using {concurrency} workers, {REQUEST_DELAY}s delay (+0-{JITTER_MAX}s jitter) between requests per host")
+    
+    stats = run_crawl(
+        jobs,
+        make_session,
+        concurrency=concurrency,
+        delay=REQUEST_DELAY,
+        jitter=JITTER_MAX,
+        rate_limit_wait=RATE_LIMIT_WAIT_MINUTES * 60,
+        max_retries=MAX_RATE_LIMIT_RETRIES,
+        store=manifest.store,
+        should_save=lambda job, response: manifest.is_changed(job['url'], response.text),
+        on_saved=on_saved,
+        on_unchanged=lambda job, response: manifest.record_unchanged(job['url'], response.headers),
+        on_error=lambda job, e: manifest.record_error(
+            job['url'], job['output_path'], getattr(e.response, 'status_code', None)),
+    )
+    manifest.close()
+    
+    print("\n" + "="*50)
+    print("REFRESH STOPPED (rate limited)" if stats['stopped'] else "REFRESH COMPLETE")
+    print("="*50)
+    print(f"Total data centers found: {total_dcs}")
+    print(f"Changed (rewritten): {stats['success']}")
+    print(f"Not modified (304): {stats['not_modified']}")
+    print(f"Unchanged data: {stats['unchanged']}")
+    print(f"Errors: {stats['errors']}")
+    
+    return stats
+
 if __name__ == "__main__":
-    scrape_specs()
+    parser = argparse.ArgumentParser(description='Scrape data center /specs/ pages')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='use concurrent workers with a shared per-host rate limit')
+    parser.add_argument('--refresh', action='store_true',
+                        help='re-check already scraped pages with conditional requests, rewrite only changed ones')
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY,
+                        help=f'number of async workers (default: {CONCURRENCY})')
+    parser.add_argument('--base-url', default=BASE_URL,
+                        help='site to fetch from, e.g. a local stub server (async/refresh mode)')
+    parser.add_argument('--state-dir', default='../data/raw/html/state',
+                        help='root of the state/city/dc tree (async/refresh mode)')
+    args = parser.parse_args()
+    
+    if args.refresh:
+        refresh_specs(args.state_dir, args.base_url, args.concurrency)
+    elif args.use_async:
+        scrape_specs_async(args.state_dir, args.base_url, args.concurrency)
+    else:
+        scrape_specs()
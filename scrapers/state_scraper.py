@@ -3,12 +3,14 @@
 State Web Scraper
 Loops through state_links.txt and scrapes each state page,
 saving the HTML to data/raw/html/state/{state}/{state}.txt
+States already recorded in the crawl manifest are skipped.
 """
 
 import requests
-import os
 import time
 
+from crawl_manifest import CrawlManifest, manifest_path_for
+
 def scrape_states():
     """Scrape all state pages from state_links.txt"""
     
@@ -22,7 +24,10 @@ def scrape_states():
     
     print(f"Found {len(urls)} URLs to scrape")
     
+    manifest = CrawlManifest(manifest_path_for('../data/raw/html/state'))
+    
     success_count = 0
+    skipped_count = 0
     error_count = 0
     
     for url in urls:
@@ -35,20 +40,23 @@ def scrape_states():
             print(f"Skipping non-state URL: {url}")
             continue
         
+        state_dir = f'../data/raw/html/state/{state_name}'
+        output_path = f'{state_dir}/{state_name}.txt'
+        
+        if manifest.has_valid(url, output_path):
+            print(f"Skipping: {state_name} (already scraped)")
+            skipped_count += 1
+            continue
+        
         print(f"Scraping: {state_name}...", end=" ")
         
         try:
             response = requests.get(url, headers=headers, timeout=30)
             response.raise_for_status()
             
-            # Create directory data/raw/html/state/{state}/
-            state_dir = f'../data/raw/html/state/{state_name}'
-            os.makedirs(state_dir, exist_ok=True)
-            
-            # Save HTML as {state}.txt
-            output_path = f'{state_dir}/{state_name}.txt'
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(response.text)
+            # Save HTML as data/raw/html/state/{state}/{state}.txt
+            manifest.store.write(output_path, response.text)
+            manifest.record_page(url, output_path, response.text, response.status_code)
             
             print(f"OK ({len(response.text)} chars)")
             success_count += 1
@@ -59,11 +67,15 @@ def scrape_states():
         except requests.RequestException as e:
             print(f"ERROR: {e}")
             error_count += 1
+            manifest.record_error(url, output_path, getattr(e.response, 'status_code', None))
+    
+    manifest.close()
     
     print("\n" + "="*50)
     print("SCRAPING COMPLETE")
     print("="*50)
     print(f"Successful: {success_count}")
+    print(f"Skipped (already done): {skipped_count}")
     print(f"Errors: {error_count}")
     print(f"Files saved to: data/raw/html/state/{{state}}/{{state}}.txt")
 
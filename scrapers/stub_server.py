@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Local Stub Server
+Serves the saved HTML in data/raw/html under the same URL paths as
+datacentermap.com, so the scrapers can be exercised without hitting the site:
+
+    /usa/                               -> usa.txt
+    /usa/{state}/                       -> state/{state}/{state}.txt
+    /usa/{state}/{city}/                -> state/{state}/city/{city}/{city}.txt
+    /usa/{state}/{city}/{dc}/specs/     -> state/{state}/city/{city}/dc/{dc}/specs.txt
+
+Usage:
+    python stub_server.py --port 8000
+    python stub_server.py --port 8000 --rate-limit-every 25   # test backoff
+    python specs_scraper.py --async --base-url http://localhost:8000 --state-dir /tmp/copy/state
+    python specs_scraper.py --refresh --base-url http://localhost:8000 --state-dir /tmp/copy/state
+
+Saved pages are served with an ETag (sha1 of the file) and a matching
+If-None-Match gets a 304, so refresh mode (--refresh above) can be
+exercised too.
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATE_LIMIT_PAGE = '<html><body><h1>Page View Limit Reached</h1></body></html>'
+
+
+def resolve_path(html_dir, url_path):
+    """Map a datacentermap.com URL path to a saved file, or None"""
+    parts = [p for p in url_path.split('?')[0].strip('/').split('/') if p]
+
+    if not parts or parts[0] != 'usa':
+        return None
+    parts = parts[1:]
+
+    if not parts:
+        return f'{html_dir}/usa.txt'
+    if len(parts) == 1:
+        state = parts[0]
+        return f'{html_dir}/state/{state}/{state}.txt'
+    if len(parts) == 2:
+        state, city = parts
+        return f'{html_dir}/state/{state}/city/{city}/{city}.txt'
+    if len(parts) == 4 and parts[3] == 'specs':
+        state, city, dc = parts[:3]
+        path = f'{html_dir}/state/{state}/city/{city}/dc/{dc}/specs.txt'
+        if os.path.exists(path):
+            return path
+        # DCs can be listed on a neighbouring city's page
+        matches = glob.glob(f'{html_dir}/state/{state}/city/*/dc/{dc}/specs.txt')
+        return matches[0] if matches else path
+
+    return None
+
+
+def make_handler(html_dir, rate_limit_every):
+    """Build a request handler class bound to the given html directory"""
+    counter = {'requests': 0}
+    lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                counter['requests'] += 1
+                n = counter['requests']
+
+            if rate_limit_every and n % rate_limit_every == 0:
+                self._send(200, RATE_LIMIT_PAGE.encode('utf-8'))
+                return
+
+            path = resolve_path(html_dir, self.path)
+            if path is None or not os.path.exists(path):
+                self._send(404, b'Not Found')
+                return
+
+            with open(path, 'rb') as f:
+                body = f.read()
+
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get('If-None-Match') == etag:
+                self._send(304, b'', etag)
+                return
+
+            self._send(200, body, etag)
+
+        def _send(self, status, body, etag=None):
+            self.send_response(status)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            if etag:
+                self.send_header('ETag', etag)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+def serve(html_dir='../data/raw/html', port=8000, rate_limit_every=0):
+    """Run the stub server until interrupted"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(html_dir, rate_limit_every))
+    print(f"Serving {html_dir} at http://127.0.0.1:{port}/usa/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve saved HTML as a local datacentermap.com stub')
+    parser.add_argument('--html-dir', default='../data/raw/html')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--rate-limit-every', type=int, default=0,
+                        help='return a "Page View Limit Reached" page every N requests')
+    args = parser.parse_args()
+
+    serve(args.html_dir, args.port, args.rate_limit_every)
@@ -1,5 +1,6 @@
 import requests
-import os
+
+from page_store import open_store
 
 def scrape_usa_datacenters():
     """Scrape the USA datacenters page from datacentermap.com and save as txt."""
@@ -13,12 +14,10 @@ def scrape_usa_datacenters():
         response = requests.get(url, headers=headers)
         response.raise_for_status()
         
-        # Create output folder if it doesn't exist
-        os.makedirs('../data/raw/html', exist_ok=True)
-        
-        # Save the HTML content as txt file
-        with open('../data/raw/html/usa.txt', 'w', encoding='utf-8') as f:
-            f.write(response.text)
+        # Save the HTML content through the page store (folder or pack)
+        store = open_store()
+        store.write('../data/raw/html/usa.txt', response.text)
+        store.close()
         
         print(f"Successfully saved HTML to data/raw/html/usa.txt")
         print(f"File size: {len(response.text)} characters")